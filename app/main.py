@@ -1,11 +1,36 @@
 import asyncio
+import json
 import logging
 import sys
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import time
+from contextlib import asynccontextmanager, suppress
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
+from .scraper_service.admission import AdmissionController, AdmissionRejected, Ticket
+from .scraper_service.browser_pool import BrowserPool
+from .scraper_service.cache import ResultCache, cache_key, place_cache
+from .scraper_service.coalescing import SingleFlight, coalescing_stats
+from .scraper_service.deadline import deadline_after, remaining, use_deadline_at
+from .scraper_service.extraction import extraction_stats
+from .scraper_service.jobs import JobManager, JobManagerClosedError, QueueFullError
+from .scraper_service.link_resolver import close_resolver, resolver_stats
+from .scraper_service.metrics import collect_timings, registry
+from .scraper_service.pacing import get_policy, wait_stats
+from .scraper_service.resource_blocking import blocking_stats, parse_blocking
+from .scraper_service.settings import EXTRACTION_SOURCE, SCRAPER_WORKERS, TILE_GRID
+from .scraper_service.sinks import create_sink, set_sink
+from .scraper_service.snapshots import close_snapshots, snapshot_stats
+from .scraper_service.storage_state import storage_stats
+from .scraper_service.tiling import bbox_around, parse_bbox, scrape_tiled
+from .scraper_service.watchdog import ResourceWatchdog, live_handles
+from .scraper_service.workers import WorkerPool
+from .scraper_service.xhr import xhr_stats
 from .scraper_service.services import (
+    ScrapeResults,
     scrape_page,
 )  # Ajusta la ruta según tu estructura
 
@@ -13,8 +38,6 @@ from .scraper_service.services import (
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-app = FastAPI(title="Google Maps Scraper API")
-
 # Configure logging
 logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
@@ -22,19 +45,239 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# Pydantic model for response
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the shared browser pool (or the worker processes) on boot and close it on shutdown.
+
+    With SCRAPER_WORKERS > 0 this process only serves the API and dispatches every
+    scrape to a worker process that owns its own Playwright and browser pool (and
+    its own resource watchdog); otherwise the watchdog runs here. Workers send
+    their counter increments back with each scrape, so /metrics and the stats
+    endpoints cover both modes.
+    """
+    pool = workers = watchdog = None
+    if SCRAPER_WORKERS > 0:
+        workers = WorkerPool()
+        await workers.start()
+        app.state.scrape = workers.scrape_page
+        registry.gauge(
+            "scraper_worker_in_flight", "Scrapes running in worker processes."
+        ).set_function(lambda: workers.in_flight)
+        logger.info(f"Started {SCRAPER_WORKERS} scraper worker processes")
+    else:
+        pool = BrowserPool()
+        await pool.start()
+        app.state.scrape = scrape_page
+        registry.gauge(
+            "scraper_browsers", "Browsers currently running in the pool."
+        ).set_function(lambda: pool.browser_count)
+        watchdog = ResourceWatchdog(pool)
+        watchdog.start()
+        registry.gauge(
+            "scraper_browser_pages", "Pages open across the pool's browsers."
+        ).set_function(lambda: sum(slot["pages"] for slot in pool.usage()))
+    # Worker processes report their handle counters with every finished scrape
+    registry.gauge(
+        "scraper_element_handles_live", "Element handles created and not yet disposed."
+    ).set_function(live_handles)
+    app.state.browser_pool = pool
+    app.state.watchdog = watchdog
+    app.state.workers = workers
+    app.state.result_cache = ResultCache()
+    app.state.single_flight = SingleFlight()
+    admission = app.state.admission = AdmissionController()
+    registry.gauge(
+        "scraper_admission_active", "Browser sessions granted by admission control."
+    ).set_function(lambda: admission.active)
+    registry.gauge(
+        "scraper_admission_waiting", "Scrapes waiting in the admission queue."
+    ).set_function(lambda: admission.queued)
+    # En modo workers cada proceso escribe con su propio sink (y su propio fichero)
+    sink = create_sink("none") if workers else create_sink()
+    await sink.start()
+    set_sink(sink)
+    # Los trabajos esperan su turno sin límite de cola: ya están encolados
+    app.state.jobs = JobManager(runner=admission.wrap(app.state.scrape, "jobs", bounded=False))
+    app.state.jobs.start()
+    try:
+        yield
+    finally:
+        await app.state.jobs.stop()
+        if workers is not None:
+            logger.info("Stopping scraper workers...")
+            await workers.close()
+        else:
+            # Cerrar el navegador al apagar la aplicación
+            logger.info("Cerrando el navegador...")
+            await watchdog.close()
+            await pool.close()
+        await close_resolver()
+        close_snapshots()
+        await sink.close()
+        app.state.result_cache.close()
+
+
+app = FastAPI(title="Google Maps Scraper API", lifespan=lifespan)
+
+
+# Pydantic models for response
+class CacheInfo(BaseModel):
+    status: str
+    age: Optional[float] = None
+
+
 class ScrapeResponse(BaseModel):
     results: Optional[List[dict]]
+    cache: Optional[CacheInfo] = None
+    timings: Optional[Dict[str, dict]] = None
+    tiling: Optional[dict] = None
+    partial: bool = False
 
 
-@app.get("/scrape", response_model=ScrapeResponse)
-async def scrape_maps(
-    service: str,
-    location: str,
-    ads_limit: int = 5,
-    social_links: Optional[str] = None,
-    debug: bool = False,
+class JobRequest(BaseModel):
+    service: str
+    location: str
+    ads_limit: int = Field(5, ge=1)
+    social_links: Optional[str] = None
+    tabs: int = Field(1, ge=1, le=16)
+    pacing: str = "polite"
+    min_delay: Optional[float] = None
+    max_delay: Optional[float] = None
+    block: Optional[str] = None
+    mode: str = Field("detail", pattern="^(detail|listing)$")
+    source: str = Field(EXTRACTION_SOURCE, pattern="^(dom|xhr)$")
+    incremental: bool = False
+    timeout_ms: Optional[int] = Field(None, ge=100)
+    priority: int = 0
+
+
+class JobCreated(BaseModel):
+    id: str
+    status: str
+
+
+class ScrapeParams:
+    """Query parameters shared by /scrape and /scrape/stream."""
+
+    def __init__(
+        self,
+        service: str,
+        location: str,
+        ads_limit: int = 5,
+        social_links: Optional[str] = None,
+        tabs: int = Query(1, ge=1, le=16),
+        pacing: str = "polite",
+        min_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        block: Optional[str] = None,
+        mode: str = Query("detail", pattern="^(detail|listing)$"),
+        source: str = Query(EXTRACTION_SOURCE, pattern="^(dom|xhr)$"),
+        cache: str = Query("use", pattern="^(use|bypass|refresh)$"),
+        debug: bool = False,
+        bbox: Optional[str] = None,
+        center: Optional[str] = None,
+        radius_km: Optional[float] = None,
+        grid: int = Query(TILE_GRID, ge=2, le=8),
+        timeout_ms: Optional[int] = Query(None, ge=100),
+        incremental: bool = False,
+    ):
+        try:
+            self.pacing = get_policy(pacing, min_delay, max_delay)
+            if bbox:
+                self.bbox = parse_bbox(bbox)
+            elif center:
+                self.bbox = bbox_around(center, radius_km or 0)
+            else:
+                self.bbox = None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self.service = service
+        self.location = location
+        self.ads_limit = ads_limit
+        # Convert comma-separated social_links string to list if provided
+        self.social_links = social_links.split(",") if social_links else []
+        self.tabs = tabs
+        self.blocking = parse_blocking(block)
+        self.mode = mode
+        self.source = source
+        self.incremental = incremental
+        # An incremental refresh always re-scrapes; its point is comparing with the snapshots
+        self.cache = "bypass" if incremental else cache
+        self.debug = debug
+        self.grid = grid
+        self.timeout_ms = timeout_ms
+
+    @property
+    def cache_key(self) -> str:
+        location = self.location
+        if self.bbox is not None:
+            # Una búsqueda por cuadrícula no comparte resultados con la normal
+            location = f"{location} @{','.join(f'{value:.5f}' for value in self.bbox)}"
+        key = cache_key(self.service, location, self.social_links, self.mode)
+        # Incremental results carry change labels, so they are not shared with plain runs
+        return f"{key}#incremental" if self.incremental else key
+
+    def scrape_kwargs(self, request: Request) -> dict:
+        return {
+            "service": self.service,
+            "location": self.location,
+            "ads_limit": self.ads_limit,
+            "social_links": self.social_links,
+            "pool": request.app.state.browser_pool,
+            "tabs": self.tabs,
+            "pacing": self.pacing,
+            "blocking": self.blocking,
+            "mode": self.mode,
+            "source": self.source,
+            "incremental": self.incremental,
+            "timeout_ms": self.timeout_ms,
+        }
+
+
+def _client_id(request: Request) -> str:
+    """Tenant used for fair sharing: the X-Client-Id header or the caller's address."""
+    client_id = request.headers.get("x-client-id")
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "anonymous"
+
+
+async def _scrape(
+    request: Request, params: ScrapeParams, ticket: Optional[Ticket] = None, **extra
 ):
+    """Run scrape_page, collecting a per-phase timing breakdown when debug is set.
+
+    The request goes through the bounded admission queue once, unless the caller
+    already holds its `ticket`. The caller sets the request deadline
+    (`use_deadline_at`) so the queue wait and the scrape share it. With a bounding
+    box the area is split into tiles searched concurrently under that admission:
+    one tile uses the ticket's session and the extra ones queue for more sessions,
+    so an admitted tiling run is never cut short. The tiling report (coverage and
+    per-tile timings) is returned as well.
+    """
+    admission: AdmissionController = request.app.state.admission
+    if ticket is None:
+        async with admission.session(_client_id(request)) as ticket:
+            return await _scrape(request, params, ticket, **extra)
+    runner = request.app.state.scrape
+    tiling = None
+    with collect_timings(params.debug) as timings:
+        if params.bbox is None:
+            results = await runner(**params.scrape_kwargs(request), **extra)
+        else:
+            results, tiling = await scrape_tiled(
+                admission.wrap_tiles(runner, ticket),
+                params.bbox,
+                grid=params.grid,
+                **params.scrape_kwargs(request),
+                **extra,
+            )
+            results = ScrapeResults(results, partial=tiling["partial"])
+    return results, timings, tiling
+
+
+@app.get("/scrape", response_model=ScrapeResponse)
+async def scrape_maps(request: Request, params: ScrapeParams = Depends()):
     """
     Endpoint to scrape Google Maps data based on provided query parameters.
 
@@ -43,30 +286,63 @@ async def scrape_maps(
     - location: The location to search in (e.g., "New York").
     - ads_limit: Maximum number of ads to scrape (default: 5).
     - social_links: Comma-separated list of social media platforms to extract (e.g., "facebook,instagram").
-    - debug: Enable debug logging if true (default: false).
-    """
-    try:
-        # Set logging level based on debug parameter
-        if debug:
-            logging.getLogger().setLevel(logging.DEBUG)
-            logger.debug("Debug mode enabled")
-        else:
-            logging.getLogger().setLevel(logging.INFO)
+    - tabs: Number of tabs used to extract ad details concurrently (default: 1, sequential clicks).
+    - pacing: Wait policy: "fast" (page signals only), "polite" (signals plus jitter) or "custom".
+    - min_delay / max_delay: Delay range in seconds for the "custom" pacing policy.
+    - block: Resources to block: "default", "none" or comma-separated resource types (e.g., "image,font").
+    - mode: "detail" (default) opens every place; "listing" only reads the result cards (name, URL, rating, category, short address).
+    - source: "dom" reads the page; "xhr" parses Maps' internal search responses and only reads the page for fields missing from them (places are not opened unless a field is missing or social_links is set).
+    - cache: "use" (default), "bypass" to skip the result cache or "refresh" to re-scrape and overwrite it.
+    - debug: Include a per-phase timing breakdown in the response (default: false).
+    - bbox: "south,west,north,east" to split the area into tiles and search each one (beyond the ~120 results of one search).
+    - center / radius_km: Alternative to bbox: "lat,lng" and a radius in kilometres.
+    - grid: Tiles per side at each subdivision level (default: 2).
+    - timeout_ms: Deadline for the whole scrape. When it runs out the ads extracted so far are returned with `partial: true`; every ad has a `status` ("ok", "cached" or "error").
+    - incremental: Only open places that are new or whose listing card (name, rating, review count, short address) changed since the last snapshot; the rest come from the snapshot. Every ad gets `change`: "new", "changed" or "unchanged". Detail mode only; the result cache is bypassed.
 
-        # Convert comma-separated social_links string to list if provided
-        social_links_list = social_links.split(",") if social_links else []
+    Concurrent requests with the same normalized parameters (and `debug` value)
+    share one in-flight scrape (cache status "coalesced"), including smaller
+    ads_limit requests served by a larger run. A request only joins a run that does
+    not stop before its own `timeout_ms`; if its deadline passes first it gets the
+    ads collected so far with `partial: true`.
 
+    Browser sessions are capped by admission control: when the wait queue is full
+    or the wait exceeds its limit (or `timeout_ms`, which includes the wait) the
+    response is 429 with `Retry-After`. Clients are identified by the `X-Client-Id`
+    header (or their address) for fair sharing.
+    """
+    # The deadline starts now: time spent queueing for admission counts against it
+    deadline = deadline_after(params.timeout_ms)
+    try:
         logger.debug(
-            f"Parameters: service={service}, location={location}, ads_limit={ads_limit}, social_links={social_links_list}"
+            f"Parameters: service={params.service}, location={params.location}, ads_limit={params.ads_limit}, social_links={params.social_links}, tabs={params.tabs}"
         )
 
-        # Call the scrape_page function
-        results = await scrape_page(
-            service=service,
-            location=location,
-            ads_limit=ads_limit,
-            social_links=social_links_list,
-        )
+        result_cache: ResultCache = request.app.state.result_cache
+        key = params.cache_key
+        if params.cache == "use":
+            cached = await result_cache.get(key, params.ads_limit)
+            if cached is not None:
+                results, age = cached
+                logger.info(f"Cache hit for {key} ({age:.0f}s old)")
+                return {"results": results, "cache": {"status": "hit", "age": age}}
+
+        # Identical concurrent requests share one scrape (a larger in-flight run also serves)
+        single_flight: SingleFlight = request.app.state.single_flight
+        # Only runs collecting timings can answer debug requests (and vice versa)
+        flight_key = f"{key}#debug" if params.debug else key
+        with use_deadline_at(deadline):
+            (results, timings, tiling), shared = await single_flight.run(
+                flight_key,
+                params.ads_limit,
+                lambda on_result: _scrape(request, params, on_result=on_result),
+                timeout=remaining(),
+                partial=lambda collected: (ScrapeResults(collected, partial=True), None, None),
+            )
+        partial = getattr(results, "partial", False)
+        if shared:
+            logger.info(f"Coalesced with an in-flight scrape for {key}")
+            results = results[: params.ads_limit] if results is not None else None
 
         if results is None:
             logger.error("Scraping returned no results")
@@ -74,17 +350,310 @@ async def scrape_maps(
                 status_code=500, detail="Failed to scrape data from Google Maps"
             )
 
-        logger.info(f"Successfully scraped {len(results)} ads")
-        return {"results": results}
+        logger.info(f"Successfully scraped {len(results)} ads" + (" (partial)" if partial else ""))
+        # Un resultado parcial no se cachea: la siguiente petición lo completará
+        if params.cache != "bypass" and results and not shared and not partial:
+            await result_cache.put(
+                key, params.ads_limit, results, replace=params.cache == "refresh"
+            )
+        status = "miss" if params.cache == "use" else params.cache
+        if shared:
+            status = "coalesced"
+        return {
+            "results": results,
+            "cache": {"status": status},
+            "timings": timings,
+            "tiling": tiling,
+            "partial": partial,
+        }
 
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected scrape from {_client_id(request)}: {e.reason}")
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Error during scraping: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error during scraping: {str(e)}")
 
 
-# Cerrar el navegador al apagar la aplicación
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Cerrando el navegador...")
-    
-    
+def _encode_event(kind: str, payload: dict, sse: bool) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    if sse:
+        return f"event: {kind}\ndata: {data}\n\n"
+    return json.dumps({"type": kind, **payload}, ensure_ascii=False) + "\n"
+
+
+@app.get("/scrape/stream")
+async def scrape_maps_stream(request: Request, params: ScrapeParams = Depends()):
+    """
+    Stream each ad as soon as it is extracted, followed by a summary record.
+
+    Accepts the same query parameters as /scrape. The format is NDJSON by default,
+    or Server-Sent Events when the client sends `Accept: text/event-stream`.
+    Browser work is cancelled if the client disconnects.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    deadline = deadline_after(params.timeout_ms)
+    result_cache: ResultCache = request.app.state.result_cache
+    admission: AdmissionController = request.app.state.admission
+    key = params.cache_key
+    cached = None
+    if params.cache == "use":
+        cached = await result_cache.get(key, params.ads_limit)
+
+    # Admission is decided before streaming starts so a rejection can still be a 429
+    ticket = None
+    if cached is None:
+        try:
+            with use_deadline_at(deadline):
+                ticket = await admission.acquire(_client_id(request))
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+            )
+
+    def release() -> None:
+        if ticket is not None:
+            admission.release(ticket)
+
+    async def events():
+        started = time.perf_counter()
+        if cached is not None:
+            results, age = cached
+            for index, data in enumerate(results):
+                yield _encode_event("result", {"index": index, "data": data}, sse)
+            yield _encode_event(
+                "summary",
+                {"count": len(results), "ok": True, "cache": "hit", "age": age},
+                sse,
+            )
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        # The task inherits the deadline started when the request arrived
+        with use_deadline_at(deadline):
+            task = asyncio.create_task(
+                _scrape(
+                    request,
+                    params,
+                    ticket,
+                    on_result=lambda index, data: queue.put_nowait((index, data)),
+                )
+            )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        sent = 0
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        logger.info("Client disconnected, cancelling scrape")
+                        return
+                    continue
+                if item is None:
+                    break
+                index, data = item
+                sent += 1
+                yield _encode_event("result", {"index": index, "data": data}, sse)
+
+            results, timings, tiling = task.result()
+            partial = getattr(results, "partial", False)
+            if results and params.cache != "bypass" and not partial:
+                await result_cache.put(
+                    key, params.ads_limit, results, replace=params.cache == "refresh"
+                )
+            yield _encode_event(
+                "summary",
+                {
+                    "count": sent,
+                    "ok": results is not None,
+                    "partial": partial,
+                    "cache": "miss" if params.cache == "use" else params.cache,
+                    "elapsed": time.perf_counter() - started,
+                    "timings": timings,
+                    "tiling": tiling,
+                },
+                sse,
+            )
+        finally:
+            # Runs on normal completion and when the client goes away
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+            release()
+
+    # The background task also releases the slot if the body never starts streaming
+    return StreamingResponse(events(), media_type=media_type, background=BackgroundTask(release))
+
+
+@app.post("/jobs", response_model=JobCreated, status_code=202)
+async def create_job(request: Request, body: JobRequest):
+    """
+    Enqueue a scrape and return its job ID right away.
+
+    Higher `priority` values run first. Returns 429 when the queue is full and
+    503 when the job workers are not accepting work.
+    """
+    params = ScrapeParams(
+        **body.model_dump(exclude={"priority"}), cache="bypass", debug=False, grid=TILE_GRID
+    )
+    jobs: JobManager = request.app.state.jobs
+    try:
+        job = jobs.submit(params.scrape_kwargs(request), priority=body.priority)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except JobManagerClosedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    logger.info(f"Job {job.id} queued (priority={job.priority}, queued={jobs.queued})")
+    return {"id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(request: Request, job_id: str):
+    """Status, progress (ads done out of ads_limit) and partial results of a job."""
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(request: Request, job_id: str):
+    """Cancel a queued or running job."""
+    job = request.app.state.jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"id": job.id, "status": job.status}
+
+
+@app.get("/pacing/stats")
+async def pacing_stats():
+    """Time spent waiting per pacing policy since the server started."""
+    return wait_stats()
+
+
+@app.get("/links/stats")
+async def link_stats():
+    """How social links were resolved: locally, over HTTP or by opening a page."""
+    return resolver_stats()
+
+
+@app.get("/blocking/stats")
+async def resource_blocking_stats():
+    """Requests blocked by the resource-blocking layer and estimated bytes saved."""
+    return blocking_stats()
+
+
+@app.get("/workers/stats")
+async def worker_stats(request: Request):
+    """Worker processes, their in-flight scrapes and memory, and restart counters."""
+    workers: Optional[WorkerPool] = request.app.state.workers
+    if workers is None:
+        raise HTTPException(status_code=404, detail="Worker processes are disabled")
+    return workers.stats()
+
+
+@app.get("/watchdog/stats")
+async def resource_watchdog_stats(request: Request):
+    """Memory of this process, the driver and each browser, open pages, live handles and recycles."""
+    watchdog: Optional[ResourceWatchdog] = request.app.state.watchdog
+    if watchdog is None:
+        # Each worker process runs its own watchdog; see /workers/stats for their memory
+        return {"enabled": False}
+    return watchdog.to_dict()
+
+
+@app.get("/snapshots/stats")
+async def incremental_refresh_stats():
+    """Places labelled new, changed or unchanged by incremental refreshes, and detail passes skipped."""
+    return snapshot_stats()
+
+
+@app.get("/coalescing/stats")
+async def single_flight_stats():
+    """Requests that reused an in-flight scrape instead of starting a browser session."""
+    return coalescing_stats()
+
+
+@app.get("/admission/stats")
+async def admission_stats(request: Request):
+    """Active and waiting browser sessions per client, wait time and rejections."""
+    return request.app.state.admission.to_dict()
+
+
+@app.get("/storage/stats")
+async def browser_storage_stats():
+    """Reuse and refreshes of the persisted browser storage state (cookies, consent)."""
+    return storage_stats()
+
+
+@app.get("/places/stats")
+async def place_cache_stats():
+    """Size and hit rate of the per-place detail cache."""
+    return place_cache.stats()
+
+
+@app.get("/extraction/stats")
+async def place_extraction_stats():
+    """Per-place extraction time for each extraction engine."""
+    return extraction_stats()
+
+
+@app.get("/extraction/xhr/stats")
+async def search_capture_stats():
+    """Captured search responses, parse errors and fields taken from them or from the page."""
+    return xhr_stats()
+
+
+def _stats_lines() -> List[str]:
+    """Export the per-subsystem stats counters alongside the phase metrics."""
+    lines = ["# TYPE scraper_pacing_wait_seconds_total counter"]
+    for policy, stats in wait_stats().items():
+        lines.append(f'scraper_pacing_wait_seconds_total{{policy="{policy}"}} {stats["seconds"]}')
+    lines.append("# TYPE scraper_links_resolved_total counter")
+    for method, count in resolver_stats().items():
+        lines.append(f'scraper_links_resolved_total{{method="{method}"}} {count}')
+    blocked = blocking_stats()
+    lines.append("# TYPE scraper_blocked_requests_total counter")
+    for resource_type, count in blocked["by_type"].items():
+        lines.append(f'scraper_blocked_requests_total{{type="{resource_type}"}} {count}')
+    lines.append("# TYPE scraper_blocked_bytes_estimated_total counter")
+    lines.append(f"scraper_blocked_bytes_estimated_total {blocked['estimated_bytes_saved']}")
+    places = place_cache.stats()
+    lines.append("# TYPE scraper_place_cache_hits_total counter")
+    lines.append(f"scraper_place_cache_hits_total {places['hits']}")
+    lines.append("# TYPE scraper_place_cache_misses_total counter")
+    lines.append(f"scraper_place_cache_misses_total {places['misses']}")
+    coalescing = coalescing_stats()
+    lines.append("# TYPE scraper_sessions_saved_total counter")
+    lines.append(f"scraper_sessions_saved_total {coalescing['coalesced']}")
+    lines.append("# TYPE scraper_single_flight_leaders_total counter")
+    lines.append(f"scraper_single_flight_leaders_total {coalescing['leaders']}")
+    captured = xhr_stats()
+    lines.append("# TYPE scraper_xhr_fields_total counter")
+    for source in ("xhr", "dom"):
+        count = captured[f"fields_from_{source}"]
+        lines.append(f'scraper_xhr_fields_total{{source="{source}"}} {count}')
+    lines.append("# TYPE scraper_incremental_places_total counter")
+    for change, count in snapshot_stats().items():
+        if change != "details_skipped":
+            lines.append(f'scraper_incremental_places_total{{change="{change}"}} {count}')
+    lines.append("# TYPE scraper_xhr_parse_errors_total counter")
+    lines.append(f"scraper_xhr_parse_errors_total {captured['parse_errors']}")
+    return lines
+
+
+registry.add_collector(_stats_lines)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Phase latency histograms, error counters and gauges in Prometheus text format."""
+    jobs: JobManager = request.app.state.jobs
+    registry.gauge("scraper_jobs_queued", "Jobs waiting in the job queue.").set(jobs.queued)
+    registry.gauge("scraper_jobs_running", "Jobs currently running.").set(jobs.running)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
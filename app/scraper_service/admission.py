@@ -0,0 +1,236 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict
+
+from .deadline import remaining
+from .metrics import registry
+from .settings import (
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_QUEUE_PER_CLIENT,
+    ADMISSION_MAX_SESSIONS,
+    ADMISSION_MAX_WAIT_SECONDS,
+)
+
+WAIT_SECONDS = registry.histogram(
+    "scraper_admission_wait_seconds",
+    "Time scrapes waited in the admission queue before getting a browser session.",
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+REJECTIONS = registry.counter(
+    "scraper_admission_rejections_total", "Scrapes rejected by admission control."
+)
+
+
+class AdmissionRejected(Exception):
+    """No hay sitio: la cola está llena o se superó el tiempo máximo de espera."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"Servidor ocupado ({reason}), reintenta en {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Sesión de navegador concedida a un cliente."""
+
+    def __init__(self, client: str) -> None:
+        self.client = client
+        self.granted_at = time.monotonic()
+        self.released = False
+
+
+class _Waiter:
+    def __init__(self, client: str) -> None:
+        self.client = client
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """Limita las sesiones de navegador simultáneas con una cola de espera acotada.
+
+    Cuando se libera una sesión pasa primero el cliente en espera con menos sesiones
+    activas, de modo que un cliente con muchas peticiones no acapara el servicio.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = ADMISSION_MAX_SESSIONS,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_queue_per_client: int = ADMISSION_MAX_QUEUE_PER_CLIENT,
+        max_wait_seconds: float = ADMISSION_MAX_WAIT_SECONDS,
+    ) -> None:
+        self.max_sessions = max(1, max_sessions)
+        self.max_queue = max(0, max_queue)
+        self.max_queue_per_client = max_queue_per_client
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self._active_by_client: Dict[str, int] = {}
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.queued = 0
+        # Media móvil de la duración de una sesión, para estimar Retry-After
+        self._avg_hold = 0.0
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "wait_seconds": 0.0}
+
+    def retry_after(self) -> int:
+        hold = self._avg_hold or 5.0
+        return max(1, math.ceil(hold * (self.queued + 1) / self.max_sessions))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        REJECTIONS.inc(reason=reason)
+        self.stats["rejected"] += 1
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _grant(self, client: str) -> Ticket:
+        self.active += 1
+        self._active_by_client[client] = self._active_by_client.get(client, 0) + 1
+        self.stats["admitted"] += 1
+        return Ticket(client)
+
+    async def acquire(self, client: str, bounded: bool = True) -> Ticket:
+        """Espera una sesión libre; con bounded puede rechazar con AdmissionRejected.
+
+        La espera nunca pasa del plazo de la petición en curso (ver deadline.py):
+        si vence en la cola se rechaza con el motivo "deadline".
+        """
+        if self.active < self.max_sessions and not self.queued:
+            WAIT_SECONDS.observe(0.0)
+            return self._grant(client)
+        queue = self._queues.get(client)
+        if bounded:
+            if self.queued >= self.max_queue:
+                raise self._reject("queue_full")
+            if self.max_queue_per_client and queue and len(queue) >= self.max_queue_per_client:
+                raise self._reject("client_queue_full")
+
+        waiter = _Waiter(client)
+        self._queues.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        self.stats["queued"] += 1
+        timeout = self.max_wait_seconds if bounded else None
+        left = remaining()
+        # La espera gasta el mismo plazo que el scraping, no uno aparte
+        if left is not None and (timeout is None or left < timeout):
+            timeout, reason = max(0.0, left), "deadline"
+        else:
+            reason = "wait_timeout"
+        try:
+            ticket = await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Se concedió justo al vencer la espera: se devuelve la sesión
+                self.release(waiter.future.result())
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(reason)
+        waited = time.monotonic() - waiter.enqueued_at
+        WAIT_SECONDS.observe(waited)
+        self.stats["wait_seconds"] += waited
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        if ticket.released:
+            return
+        ticket.released = True
+        self.active -= 1
+        remaining = self._active_by_client.get(ticket.client, 1) - 1
+        if remaining:
+            self._active_by_client[ticket.client] = remaining
+        else:
+            self._active_by_client.pop(ticket.client, None)
+        held = time.monotonic() - ticket.granted_at
+        self._avg_hold = held if not self._avg_hold else 0.8 * self._avg_hold + 0.2 * held
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.client)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self.queued -= 1
+        if not queue:
+            del self._queues[waiter.client]
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_sessions and self._queues:
+            # El cliente con menos sesiones activas; a igualdad, el que lleva más esperando
+            client = min(
+                self._queues,
+                key=lambda name: (
+                    self._active_by_client.get(name, 0),
+                    self._queues[name][0].enqueued_at,
+                ),
+            )
+            queue = self._queues[client]
+            waiter = queue.popleft()
+            self.queued -= 1
+            if not queue:
+                del self._queues[client]
+            if not waiter.future.done():
+                waiter.future.set_result(self._grant(client))
+
+    @asynccontextmanager
+    async def session(self, client: str, bounded: bool = True) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire(client, bounded)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def wrap(
+        self, runner: Callable[..., Awaitable], client: str, bounded: bool = True
+    ) -> Callable[..., Awaitable]:
+        """Runner (scrape_page o el de los workers) que pasa antes por la admisión."""
+
+        async def admitted(**kwargs):
+            async with self.session(client, bounded):
+                return await runner(**kwargs)
+
+        return admitted
+
+    def wrap_tiles(
+        self, runner: Callable[..., Awaitable], ticket: Ticket
+    ) -> Callable[..., Awaitable]:
+        """Runner para las casillas de una búsqueda por cuadrícula ya admitida.
+
+        Una casilla usa la sesión del ticket y las que corren a la vez piden otra
+        sin cola acotada: la petición ya pasó por ella al obtener el ticket, y sus
+        casillas en espera no pasan de la concurrencia de la cuadrícula. Una casilla
+        cuyo plazo vence en la cola devuelve None sin buscar.
+        """
+        held = asyncio.Lock()
+
+        async def tile(**kwargs):
+            if not held.locked():
+                async with held:
+                    return await runner(**kwargs)
+            try:
+                extra = await self.acquire(ticket.client, bounded=False)
+            except AdmissionRejected as e:
+                if e.reason != "deadline":
+                    raise
+                return None
+            try:
+                return await runner(**kwargs)
+            finally:
+                self.release(extra)
+
+        return tile
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "active": self.active,
+            "waiting": self.queued,
+            "max_sessions": self.max_sessions,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait_seconds,
+            "active_by_client": dict(self._active_by_client),
+            "waiting_by_client": {client: len(queue) for client, queue in self._queues.items()},
+        }
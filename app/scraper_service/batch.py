@@ -0,0 +1,249 @@
+"""Ejecuta en lote las consultas de un fichero CSV o JSONL con un pool compartido.
+
+Cada línea (o fila) es una consulta con ``service`` y ``location`` y, de forma
+opcional, ``id``, ``ads_limit``, ``social_links`` (separadas por comas), ``mode`` y
+``source``; lo que falte se toma de los argumentos. Los resultados se escriben en
+JSONL a medida que terminan y cada consulta terminada se anota en un fichero de
+control, de modo que una ejecución interrumpida continúa donde se quedó (las
+consultas fallidas o parciales, cortadas por el plazo, se reintentan):
+
+    python -m app.scraper_service.batch consultas.csv --output resultados.jsonl \\
+        --concurrency 4 --ads-limit 20
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Set
+
+from .browser_pool import BrowserPool
+from .cache import cache_key
+from .pacing import get_policy
+from .services import scrape_page
+from .settings import BROWSER_POOL_SIZE, EXTRACTION_SOURCE
+from .sinks import create_sink, set_sink
+from .snapshots import close_snapshots
+from .watchdog import ResourceWatchdog
+
+
+def _social_links(value) -> List[str]:
+    if isinstance(value, list):
+        return [link for link in value if link]
+    return [link.strip() for link in (value or "").split(",") if link.strip()]
+
+
+def read_queries(path: str, defaults: Dict) -> Iterator[Dict]:
+    """Consultas del fichero (CSV con cabecera o JSONL) completadas con los valores por defecto."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for number, row in enumerate(rows, start=1):
+            if not row.get("service") or not row.get("location"):
+                print(f"Línea {number} sin service o location, se omite")
+                continue
+            try:
+                ads_limit = int(row.get("ads_limit") or defaults["ads_limit"])
+            except (TypeError, ValueError):
+                print(f"Línea {number} con ads_limit no válido ({row.get('ads_limit')!r}), se omite")
+                continue
+            query = {
+                "service": row["service"],
+                "location": row["location"],
+                "ads_limit": ads_limit,
+                "social_links": _social_links(row.get("social_links") or defaults["social_links"]),
+                "mode": row.get("mode") or defaults["mode"],
+                "source": row.get("source") or defaults["source"],
+            }
+            key = cache_key(
+                query["service"], query["location"], query["social_links"], query["mode"]
+            )
+            query["id"] = str(row.get("id") or f"{key}#{query['ads_limit']}")
+            yield query
+
+
+class Checkpoint:
+    """Fichero de control con una línea por consulta terminada (id y estado)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Última línea a medio escribir si el proceso murió
+                        continue
+                    # Una consulta parcial se cortó por el plazo: se repite entera
+                    if entry["status"] in ("failed", "partial"):
+                        self.done.discard(entry["id"])
+                    else:
+                        self.done.add(entry["id"])
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, query_id: str, status: str) -> None:
+        self._file.write(json.dumps({"id": query_id, "status": status}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BatchRunner:
+    """Reparte las consultas entre concurrency tareas que comparten un BrowserPool."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.pacing = get_policy(args.pacing)
+        self.counts = {"queries": 0, "ok": 0, "partial": 0, "failed": 0, "skipped": 0, "ads": 0}
+        self.started = time.monotonic()
+
+    async def run(self, queries: List[Dict]) -> Dict:
+        args = self.args
+        checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint")
+        pending: "asyncio.Queue[Dict]" = asyncio.Queue()
+        for query in queries:
+            if query["id"] in checkpoint.done:
+                self.counts["skipped"] += 1
+            else:
+                pending.put_nowait(query)
+        print(f"{pending.qsize()} consultas pendientes, {self.counts['skipped']} ya hechas")
+        if pending.empty():
+            checkpoint.close()
+            return self.summary()
+
+        # Los resultados van al JSONL de salida; el sink global no debe duplicarlos
+        set_sink(create_sink("none"))
+        pool = BrowserPool(size=args.concurrency)
+        await pool.start()
+        watchdog = ResourceWatchdog(pool)
+        watchdog.start()
+        self.started = time.monotonic()
+        try:
+            with open(args.output, "a", encoding="utf-8") as output:
+                workers = min(args.concurrency, pending.qsize())
+                await asyncio.gather(
+                    *(self._worker(pool, pending, output, checkpoint) for _ in range(workers))
+                )
+        finally:
+            await watchdog.close()
+            await pool.close()
+            checkpoint.close()
+            close_snapshots()
+        return self.summary()
+
+    async def _worker(self, pool: BrowserPool, pending, output, checkpoint: Checkpoint) -> None:
+        while True:
+            try:
+                query = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                results = await scrape_page(
+                    service=query["service"],
+                    location=query["location"],
+                    ads_limit=query["ads_limit"],
+                    social_links=query["social_links"],
+                    pool=pool,
+                    tabs=self.args.tabs,
+                    pacing=self.pacing,
+                    mode=query["mode"],
+                    source=query["source"],
+                    timeout_ms=self.args.timeout_ms,
+                    incremental=self.args.incremental,
+                )
+            except Exception as e:
+                print(f"Error en la consulta {query['id']}: {e}")
+                results = None
+            if results is None:
+                status = "failed"
+            elif getattr(results, "partial", False):
+                status = "partial"
+            else:
+                status = "ok"
+
+            record = {
+                "id": query["id"],
+                "service": query["service"],
+                "location": query["location"],
+                "status": status,
+                "seconds": round(time.perf_counter() - started, 3),
+                "created_at": time.time(),
+                "results": list(results) if results is not None else None,
+            }
+            # Primero el resultado y después el control: como mucho se repite una consulta
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            checkpoint.mark(query["id"], status)
+
+            self.counts["queries"] += 1
+            self.counts[status] += 1
+            self.counts["ads"] += len(results or [])
+            if self.counts["queries"] % self.args.progress_every == 0:
+                self._progress()
+
+    def _progress(self) -> None:
+        summary = self.summary()
+        print(
+            f"{summary['queries']} consultas ({summary['failed']} fallidas), "
+            f"{summary['queries_per_minute']:.1f} consultas/min, "
+            f"{summary['ads_per_minute']:.1f} anuncios/min"
+        )
+
+    def summary(self) -> Dict:
+        minutes = (time.monotonic() - self.started) / 60
+        return {
+            **self.counts,
+            "minutes": round(minutes, 2),
+            "queries_per_minute": self.counts["queries"] / minutes if minutes else 0.0,
+            "ads_per_minute": self.counts["ads"] / minutes if minutes else 0.0,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scraping en lote de un fichero de consultas")
+    parser.add_argument("queries", help="Fichero CSV (con cabecera) o JSONL de consultas")
+    parser.add_argument("--output", default="batch_results.jsonl")
+    parser.add_argument("--checkpoint", help="Fichero de control (por defecto <output>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=BROWSER_POOL_SIZE)
+    parser.add_argument("--ads-limit", type=int, default=5)
+    parser.add_argument("--social-links", default="", help="Redes separadas por comas")
+    parser.add_argument("--mode", choices=("detail", "listing"), default="detail")
+    parser.add_argument("--source", choices=("dom", "xhr"), default=EXTRACTION_SOURCE)
+    parser.add_argument("--tabs", type=int, default=1)
+    parser.add_argument("--pacing", default="polite")
+    parser.add_argument("--timeout-ms", type=int)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Abrir solo los lugares nuevos o con la tarjeta cambiada (ver snapshots.py)",
+    )
+    parser.add_argument("--progress-every", type=int, default=10)
+    args = parser.parse_args()
+
+    defaults = {
+        "ads_limit": args.ads_limit,
+        "social_links": args.social_links,
+        "mode": args.mode,
+        "source": args.source,
+    }
+    queries = list(read_queries(args.queries, defaults))
+    summary = asyncio.run(BatchRunner(args).run(queries))
+    print(
+        f"Terminado: {summary['queries']} consultas en {summary['minutes']} min "
+        f"({summary['queries_per_minute']:.1f}/min), {summary['ads']} anuncios "
+        f"({summary['ads_per_minute']:.1f}/min), {summary['failed']} fallidas, "
+        f"{summary['partial']} parciales, {summary['skipped']} ya hechas"
+    )
+
+
+if __name__ == "__main__":
+    main()
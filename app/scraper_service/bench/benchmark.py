@@ -0,0 +1,245 @@
+"""Benchmark del scraper contra el servidor local de pruebas.
+
+Recorre combinaciones de ads_limit y concurrencia, y guarda en JSON anuncios por
+segundo, latencia p50/p95 por anuncio, pico de RSS y procesos de Chromium:
+
+    python -m app.scraper_service.bench.benchmark --ads-limits 5,20 \\
+        --concurrency 1,4 --output bench.json --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from ..browser_pool import BrowserPool
+from ..pacing import get_policy
+from ..procstats import chromium_processes, chromium_rss_bytes, rss_bytes
+from ..services import scrape_page
+from ..sinks import create_sink, set_sink
+from .fixture_server import FixtureServer
+
+COMPARED_FIELDS = ("ads_per_second", "latency_p50", "latency_p95", "peak_rss_total")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ResourceSampler:
+    """Muestrea periódicamente la memoria y los procesos de Chromium."""
+
+    def __init__(self, interval: float = 0.25) -> None:
+        self.interval = interval
+        self.peak_python = 0
+        self.peak_chromium = 0
+        self.peak_total = 0
+        self.peak_processes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self) -> None:
+        python = rss_bytes()
+        chromium = chromium_rss_bytes()
+        self.peak_python = max(self.peak_python, python)
+        self.peak_chromium = max(self.peak_chromium, chromium)
+        self.peak_total = max(self.peak_total, python + chromium)
+        self.peak_processes = max(self.peak_processes, len(chromium_processes()))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.sample)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self) -> "ResourceSampler":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+async def run_once(
+    base_url: str,
+    ads_limit: int,
+    concurrency: int,
+    mode: str,
+    tabs: int,
+    pacing: str,
+    source: str = "dom",
+    social_links: Tuple[str, ...] = ("facebook", "instagram"),
+) -> Dict:
+    """Lanza `concurrency` scrapings simultáneos y mide el conjunto."""
+    # Sin estado calentado: calentarlo abriría Google y la medida dejaría de ser local
+    pool = BrowserPool(size=concurrency, storage_state=False)
+    await pool.start()
+    latencies: List[float] = []
+    failures = 0
+    ads = 0
+
+    async def one(run: int) -> None:
+        nonlocal failures, ads
+        last = time.perf_counter()
+
+        def on_result(index: int, data: Dict) -> None:
+            nonlocal last
+            now = time.perf_counter()
+            latencies.append(now - last)
+            last = now
+
+        # Búsqueda única por ejecución: ninguna caché puede acortar el trabajo
+        results = await scrape_page(
+            service=f"bench {uuid.uuid4().hex[:8]}",
+            location=f"run {run}",
+            ads_limit=ads_limit,
+            social_links=list(social_links),
+            pool=pool,
+            tabs=tabs,
+            pacing=get_policy(pacing),
+            on_result=on_result,
+            mode=mode,
+            base_url=base_url,
+            source=source,
+        )
+        if results is None:
+            failures += 1
+        else:
+            ads += len(results)
+
+    try:
+        with ResourceSampler() as sampler:
+            started = time.perf_counter()
+            await asyncio.gather(*(one(run) for run in range(concurrency)))
+            wall = time.perf_counter() - started
+            sampler.sample()
+    finally:
+        await pool.close()
+
+    return {
+        "ads_limit": ads_limit,
+        "concurrency": concurrency,
+        "mode": mode,
+        "source": source,
+        "tabs": tabs,
+        "pacing": pacing,
+        "ads": ads,
+        "failures": failures,
+        "wall_seconds": wall,
+        "ads_per_second": ads / wall if wall else 0.0,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "peak_rss_python": sampler.peak_python,
+        "peak_rss_chromium": sampler.peak_chromium,
+        "peak_rss_total": sampler.peak_total,
+        "chromium_processes_peak": sampler.peak_processes,
+    }
+
+
+def compare(current: List[Dict], baseline_path: str) -> None:
+    """Imprime la variación frente a un resultado anterior guardado en JSON."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {
+            (run["ads_limit"], run["concurrency"], run["mode"], run["tabs"]): run
+            for run in json.load(f)["runs"]
+        }
+    for run in current:
+        previous = baseline.get((run["ads_limit"], run["concurrency"], run["mode"], run["tabs"]))
+        if previous is None:
+            continue
+        changes = []
+        for field in COMPARED_FIELDS:
+            old, new = previous.get(field), run.get(field)
+            if old and new is not None:
+                changes.append(f"{field} {(new - old) / old * 100:+.1f}%")
+        print(f"ads_limit={run['ads_limit']} concurrency={run['concurrency']}: " + ", ".join(changes))
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    # Los resultados del servidor de pruebas no se guardan ni cuentan en la medida
+    set_sink(create_sink("none"))
+    server = FixtureServer(
+        total=args.total, latency_ms=args.latency_ms, opaque_links=args.opaque_links
+    ).start()
+    try:
+        runs = []
+        for ads_limit in args.ads_limits:
+            for concurrency in args.concurrency:
+                for _ in range(args.repeat):
+                    run = await run_once(
+                        server.base_url,
+                        ads_limit,
+                        concurrency,
+                        args.mode,
+                        args.tabs,
+                        args.pacing,
+                        args.source,
+                        args.social_links,
+                    )
+                    print(
+                        f"ads_limit={ads_limit} concurrency={concurrency}: "
+                        f"{run['ads_per_second']:.2f} ads/s, "
+                        f"p50={run['latency_p50']} p95={run['latency_p95']}, "
+                        f"peak RSS={run['peak_rss_total'] / 2**20:.0f} MiB, "
+                        f"chromium={run['chromium_processes_peak']}"
+                    )
+                    runs.append(run)
+    finally:
+        server.stop()
+    return {
+        "created_at": time.time(),
+        "config": {
+            "total": args.total,
+            "latency_ms": args.latency_ms,
+            "opaque_links": args.opaque_links,
+            "mode": args.mode,
+            "source": args.source,
+            "social_links": args.social_links,
+            "tabs": args.tabs,
+            "pacing": args.pacing,
+        },
+        "runs": runs,
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del scraper sin conexión")
+    parser.add_argument("--ads-limits", type=_int_list, default=[5, 20])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2])
+    parser.add_argument("--mode", choices=("detail", "listing"), default="detail")
+    parser.add_argument("--source", choices=("dom", "xhr"), default="dom")
+    parser.add_argument(
+        "--social-links",
+        type=lambda value: tuple(filter(None, value.split(","))),
+        default=("facebook", "instagram"),
+        help="Redes a extraer separadas por comas; vacío para no abrir el panel por ellas",
+    )
+    parser.add_argument("--tabs", type=int, default=1)
+    parser.add_argument("--pacing", default="fast")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--total", type=int, default=120)
+    parser.add_argument("--latency-ms", type=int, default=150)
+    parser.add_argument("--opaque-links", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Resultados guardados en {args.output}")
+    if args.compare:
+        compare(report["runs"], args.compare)
+
+
+if __name__ == "__main__":
+    main()
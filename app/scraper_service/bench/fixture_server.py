@@ -0,0 +1,460 @@
+"""Servidor local que imita las páginas de Google Maps que usa el scraper.
+
+Sirve una página de búsqueda con ``#searchboxinput``, un feed ``role='feed'`` con
+anclas ``hfpxzc`` que se carga por páginas al desplazarse, el panel de detalle de
+cada lugar y el iframe de redes sociales. Todo coincide con los XPaths de
+``utils/XPATHs/config.py``, así que ``scrape_page`` funciona contra él cambiando
+solo la URL base.
+
+Como en Maps, cada página del feed llega en una respuesta ``/search?tbm=map`` con
+el payload interno (``)]}'`` + arrays anidados) y la página pinta las tarjetas a
+partir de él. Con ``replay_dir`` se sirven en su lugar respuestas grabadas con
+``XHR_RECORD_DIR``, una por página del feed.
+
+    python -m app.scraper_service.bench.fixture_server --port 8765
+"""
+
+import argparse
+import asyncio
+import hashlib
+import html
+import json
+import math
+import os
+import re
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+from ..xhr import PLACE_PATHS, XSSI_PREFIX
+
+CATEGORIES = ("Plumber", "Carpenter", "Electrician", "Restaurant", "Bakery", "Locksmith")
+SOCIAL_SITES = ("facebook", "instagram", "twitter", "linkedin", "example")
+
+_SEARCH_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Maps fixture</title>
+<style>
+  body { margin: 0; font-family: sans-serif; display: flex; }
+  #left { width: 420px; }
+  div[role=feed] { height: 700px; overflow-y: auto; }
+  .Nv2PK { position: relative; height: 110px; border-bottom: 1px solid #ddd; }
+  a.hfpxzc { position: absolute; inset: 0; display: block; }
+  #detail { flex: 1; }
+  .m6QErb { height: 700px; overflow-y: auto; }
+  .filler { height: 900px; }
+</style></head>
+<body>
+<div id="left">
+  <input id="searchboxinput" type="text">
+  <button id="searchbox-searchbutton">Search</button>
+  <div id="results"></div>
+</div>
+<div id="detail"></div>
+<script>
+const state = {q: "", at: "", offset: 0, loading: false, done: false};
+const options = window.location.search;
+
+async function loadMore(feed) {
+  if (state.loading || state.done) return;
+  state.loading = true;
+  const sep = options ? "&" : "?";
+  const at = state.at ? `&at=${encodeURIComponent(state.at)}` : "";
+  const response = await fetch(`/search${options}${sep}tbm=map&q=${encodeURIComponent(state.q)}${at}&offset=${state.offset}`);
+  const text = await response.text();
+  const data = JSON.parse(text.slice(text.indexOf("\\n") + 1));
+  for (const entry of data[0][1] || []) {
+    if (Array.isArray(entry) && Array.isArray(entry[14])) feed.appendChild(renderCard(entry[14]));
+  }
+  state.offset = Number(response.headers.get("X-Fixture-Next"));
+  state.done = response.headers.get("X-Fixture-Done") === "1";
+  if (state.done) {
+    feed.insertAdjacentHTML("beforeend", '<p><span class="HlvSq">You\\'ve reached the end of the list.</span></p>');
+  }
+  state.loading = false;
+  if (!state.done && feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 5) {
+    loadMore(feed);
+  }
+}
+
+const dig = (value, ...path) => path.reduce((node, index) => Array.isArray(node) ? node[index] : undefined, value);
+
+// Tarjeta del feed a partir de un lugar del payload (mismas posiciones que xhr.PLACE_PATHS)
+function renderCard(place) {
+  const card = document.createElement("div");
+  card.className = "Nv2PK";
+  const anchor = document.createElement("a");
+  anchor.className = "hfpxzc";
+  const name = dig(place, 11) || "";
+  anchor.setAttribute("aria-label", name);
+  anchor.href = `/maps/place/${encodeURIComponent(name.replace(/ /g, "+"))}/data=!4m2!3m1!1s${dig(place, 10)}`;
+  card.appendChild(anchor);
+  const info = document.createElement("div");
+  info.innerHTML = '<div class="W4Efsd"><div class="W4Efsd"><span><span></span></span><span><span>·</span><span></span></span></div></div>'
+    + '<span class="MW4etd"></span><span class="UY7F9"></span>';
+  const spans = info.querySelectorAll(".W4Efsd .W4Efsd > span > span");
+  spans[0].textContent = dig(place, 13, 0) || "";
+  spans[2].textContent = dig(place, 2, 0) || "";
+  const rating = dig(place, 4, 7);
+  const reviews = dig(place, 4, 8);
+  info.querySelector(".MW4etd").textContent = rating == null ? "" : rating.toFixed(1);
+  info.querySelector(".UY7F9").textContent = reviews == null ? "" : `(${reviews})`;
+  card.append(...info.childNodes);
+  return card;
+}
+
+document.getElementById("searchbox-searchbutton").addEventListener("click", async () => {
+  state.q = document.getElementById("searchboxinput").value;
+  state.at = window.fixtureViewport || "";
+  state.offset = 0;
+  state.done = false;
+  const feed = document.createElement("div");
+  feed.setAttribute("role", "feed");
+  feed.addEventListener("scroll", () => {
+    if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 5) loadMore(feed);
+  });
+  document.getElementById("results").replaceChildren(feed);
+  await loadMore(feed);
+});
+
+// URL directa /maps/search/<consulta>[/@lat,lng,zoomz]: busca sin usar la caja
+const direct = window.location.pathname.match(/^\/maps\/search\/([^/]+)(?:\/(@[^/]+))?/);
+if (direct) {
+  document.getElementById("searchboxinput").value = decodeURIComponent(direct[1].replace(/\+/g, " "));
+  window.fixtureViewport = direct[2] ? decodeURIComponent(direct[2]) : "";
+  document.getElementById("searchbox-searchbutton").click();
+}
+
+document.addEventListener("click", async (event) => {
+  const anchor = event.target.closest("a.hfpxzc");
+  if (!anchor) return;
+  event.preventDefault();
+  const sep = options ? "&" : "?";
+  const response = await fetch(`/fixture/api/place${options}${sep}href=${encodeURIComponent(anchor.href)}`);
+  document.getElementById("detail").innerHTML = (await response.json()).html;
+});
+</script>
+</body></html>
+"""
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def feature_id_for(query: str, index: int) -> str:
+    """Identificador estilo Maps (0x...:0x...) del lugar en la posición index."""
+    digest = _digest(query.lower(), str(index))
+    return f"0x{digest[:16]}:0x{digest[16:32]}"
+
+
+def make_place(feature_id: str) -> Dict[str, str]:
+    """Lugar sintético y determinista a partir de su identificador."""
+    digest = _digest(feature_id)
+    category = CATEGORIES[int(digest[:2], 16) % len(CATEGORIES)]
+    name = f"{category} {digest[:6].upper()}"
+    return {
+        "name": name,
+        "feature_id": feature_id,
+        "category": category,
+        "rating": f"{3 + int(digest[38], 16) % 20 / 10:.1f}",
+        "reviews": str(int(digest[:4], 16) % 900 + 5),
+        "short_address": f"{int(digest[4:6], 16)} Fixture St",
+        "address": f"{int(digest[4:6], 16)} Fixture St, Test City",
+        "phone": f"+1 555-{int(digest[8:12], 16) % 10000:04d}",
+    }
+
+
+def parse_viewport(at: str) -> Optional[Tuple[float, float, float]]:
+    match = re.match(r"@(-?[\d.]+),(-?[\d.]+),([\d.]+)z", at)
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2)), float(match.group(3))
+
+
+def viewport_feature_ids(query: str, at: str, spacing: float, limit: int) -> List[str]:
+    """Lugares de una rejilla fija de separación spacing que caen en la vista.
+
+    Vistas que se solapan devuelven los mismos lugares, como en Maps, y el número
+    de resultados de la vista se corta en limit (el tope de una búsqueda).
+    """
+    viewport = parse_viewport(at)
+    if viewport is None:
+        return []
+    lat, lng, zoom = viewport
+    width = 360 * 1000 / (256 * 2**zoom)
+    height = width * 0.75
+    first_row = math.ceil((lat - height / 2) / spacing)
+    first_col = math.ceil((lng - width / 2) / spacing)
+    ids = []
+    row = first_row
+    while row * spacing <= lat + height / 2 and len(ids) < limit:
+        col = first_col
+        while col * spacing <= lng + width / 2 and len(ids) < limit:
+            ids.append(feature_id_for(f"{query}@{row},{col}", 0))
+            col += 1
+        row += 1
+    return ids
+
+
+def _put(slots: List, path: Tuple[int, ...], value) -> None:
+    for index, child in zip(path, path[1:]):
+        if slots[index] is None:
+            slots[index] = []
+        slots = slots[index]
+        slots.extend([None] * (child + 1 - len(slots)))
+    slots[path[-1]] = value
+
+
+def maps_place(place: Dict[str, str], omit: Tuple[str, ...] = ()) -> List:
+    """Array del lugar tal y como aparece en entrada[14] del payload de búsqueda.
+
+    omit deja fuera campos para probar el respaldo a la página.
+    """
+    values = {
+        "title": place["name"],
+        "address": place["address"],
+        "phone": place["phone"],
+        "rating": float(place["rating"]),
+        "reviews": int(place["reviews"]),
+        "category": place["category"],
+        "short_address": place["short_address"],
+        "feature_id": place["feature_id"],
+    }
+    slots: List = [None] * (max(path[0] for path in PLACE_PATHS.values()) + 1)
+    for name, value in values.items():
+        if name not in omit:
+            _put(slots, PLACE_PATHS[name], value)
+    return slots
+
+
+def search_payload(query: str, places: List[Dict[str, str]], omit: Tuple[str, ...] = ()) -> str:
+    entries = [[None] * 14 + [maps_place(place, omit)] for place in places]
+    return f"{XSSI_PREFIX}\n" + json.dumps([[query, entries]])
+
+
+def render_detail(place: Dict[str, str], options: str) -> str:
+    return (
+        '<div class="m6QErb DxyBCb kA9KIf dS8AEf XiKgde ">'
+        f'<h1 class="DUwDvf lfPIob">{html.escape(place["name"])}</h1>'
+        '<button data-item-id="address">'
+        f'<div class="rogA2c "><div>{html.escape(place["address"])}</div></div></button>'
+        f'<button data-item-id="phone:tel:{html.escape(place["phone"])}">'
+        f'<div class="rogA2c "><div>{html.escape(place["phone"])}</div></div></button>'
+        f'<iframe src="/fixture/social/{quote(place["feature_id"])}{options}"></iframe>'
+        '<div class="filler"></div>'
+        "</div>"
+    )
+
+
+def _find_place(href: str) -> Optional[Dict[str, str]]:
+    # Todos los datos del lugar se derivan de su identificador
+    match = re.search(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", href)
+    return make_place(match.group(1)) if match else None
+
+
+def create_fixture_app(
+    total: int = 120,
+    page_size: int = 20,
+    latency_ms: int = 150,
+    opaque_links: bool = False,
+    spacing: float = 0.005,
+    replay_dir: Optional[str] = None,
+) -> FastAPI:
+    """Crea la app del servidor de pruebas.
+
+    Los parámetros por defecto se pueden cambiar por petición con la query string
+    de la URL base (``?total=&page_size=&latency_ms=&opaque_links=&spacing=&omit=``).
+    En las búsquedas directas por vista, ``total`` es el tope por búsqueda y
+    ``spacing`` la separación en grados de la rejilla de lugares. ``omit`` son los
+    campos (separados por comas) que no se incluyen en el payload de búsqueda.
+    """
+    fixture = FastAPI(title="Google Maps fixture")
+    recordings = (
+        [os.path.join(replay_dir, name) for name in sorted(os.listdir(replay_dir))]
+        if replay_dir
+        else []
+    )
+
+    def option(request: Request, name: str, default):
+        value = request.query_params.get(name)
+        if value is None:
+            return default
+        if isinstance(default, bool):
+            return value.lower() in ("1", "true", "yes")
+        return type(default)(value)
+
+    async def delay(request: Request) -> None:
+        wait = option(request, "latency_ms", latency_ms)
+        if wait:
+            await asyncio.sleep(wait / 1000)
+
+    def options_suffix(request: Request) -> str:
+        keep = {
+            key: value
+            for key, value in request.query_params.items()
+            if key in ("total", "page_size", "latency_ms", "opaque_links", "spacing", "omit")
+        }
+        return "?" + "&".join(f"{key}={quote(value)}" for key, value in keep.items()) if keep else ""
+
+    @fixture.get("/maps", response_class=HTMLResponse)
+    async def search_page():
+        return _SEARCH_PAGE
+
+    @fixture.get("/maps/search/{query}", response_class=HTMLResponse)
+    @fixture.get("/maps/search/{query}/{at}", response_class=HTMLResponse)
+    async def direct_search_page(query: str, at: str = ""):
+        return _SEARCH_PAGE
+
+    def payload_response(body: str, end: int, done: bool) -> Response:
+        # La paginación va en cabeceras para que el cuerpo sea el payload tal cual
+        headers = {"X-Fixture-Next": str(end), "X-Fixture-Done": "1" if done else "0"}
+        return Response(body, media_type="application/json", headers=headers)
+
+    @fixture.get("/search")
+    async def search(request: Request, q: str, offset: int = 0, at: str = ""):
+        await delay(request)
+        if recordings:
+            if not 0 <= offset < len(recordings):
+                # Más allá de lo grabado: página final vacía, como al agotar Maps
+                return payload_response(search_payload(q, []), offset, True)
+            # Una respuesta grabada por página del feed
+            with open(recordings[offset], encoding="utf-8") as f:
+                body = f.read()
+            return payload_response(body, offset + 1, offset + 1 >= len(recordings))
+        count = option(request, "total", total)
+        size = option(request, "page_size", page_size)
+        omit = tuple(filter(None, option(request, "omit", "").split(",")))
+        if at:
+            ids = viewport_feature_ids(q, at, option(request, "spacing", spacing), count)
+            count = len(ids)
+        else:
+            ids = None
+        end = min(offset + size, count)
+        places = [
+            make_place(ids[index] if ids else feature_id_for(q, index))
+            for index in range(offset, end)
+        ]
+        return payload_response(search_payload(q, places, omit), end, end >= count)
+
+    @fixture.get("/fixture/api/place")
+    async def place_panel(request: Request, href: str):
+        await delay(request)
+        place = _find_place(href)
+        if place is None:
+            return JSONResponse({"html": ""}, status_code=404)
+        return {"html": render_detail(place, options_suffix(request))}
+
+    @fixture.get("/maps/place/{slug}/{data}", response_class=HTMLResponse)
+    async def place_page(request: Request, slug: str, data: str):
+        await delay(request)
+        place = _find_place(data)
+        if place is None:
+            return HTMLResponse("<h1>Not found</h1>", status_code=404)
+        body = render_detail(place, options_suffix(request))
+        return f"<!doctype html><html><body>{body}</body></html>"
+
+    @fixture.get("/fixture/social/{feature_id}", response_class=HTMLResponse)
+    async def social(request: Request, feature_id: str):
+        opaque = option(request, "opaque_links", opaque_links)
+        base_url = str(request.base_url)
+        links = []
+        for site in SOCIAL_SITES:
+            target = f"{base_url}fixture/external/{site}/{quote(feature_id)}"
+            image = f'<img alt="www.{site}.com" src="data:,">'
+            if opaque:
+                # Sin href: obliga al scraper a abrir la pestaña
+                links.append(
+                    f'<div class="HTomEb P0BCpd GLttn wFAQK" '
+                    f"onclick=\"window.open('{target}')\">{image}</div>"
+                )
+            else:
+                wrapped = f"https://www.google.com/url?q={quote(target, safe='')}"
+                links.append(
+                    f'<div class="HTomEb P0BCpd GLttn wFAQK">'
+                    f'<a href="{wrapped}" target="_blank">{image}</a></div>'
+                )
+        return "<!doctype html><html><body>" + "".join(links) + "</body></html>"
+
+    @fixture.get("/fixture/external/{site}/{feature_id}", response_class=HTMLResponse)
+    async def external(site: str, feature_id: str):
+        return f"<!doctype html><html><body><h1>{html.escape(site)}</h1></body></html>"
+
+    return fixture
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FixtureServer:
+    """Ejecuta el servidor de pruebas en un hilo aparte."""
+
+    def __init__(self, port: int = 0, **options) -> None:
+        self.port = port or _free_port()
+        config = uvicorn.Config(
+            create_fixture_app(**options),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+        )
+        self._server = uvicorn.Server(config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/maps"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("El servidor de pruebas no arrancó")
+            time.sleep(0.05)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor local que imita Google Maps")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--total", type=int, default=120)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=150)
+    parser.add_argument("--opaque-links", action="store_true")
+    parser.add_argument("--replay-dir", help="Respuestas de búsqueda grabadas con XHR_RECORD_DIR")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_fixture_app(
+            args.total,
+            args.page_size,
+            args.latency_ms,
+            args.opaque_links,
+            replay_dir=args.replay_dir,
+        ),
+        host="127.0.0.1",
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
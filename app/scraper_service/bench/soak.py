@@ -0,0 +1,144 @@
+"""Prueba de larga duración contra el servidor local de pruebas.
+
+Repite scrapings sin parar con el pool y la vigilancia de recursos activos, anota
+cada cierto tiempo la memoria (este proceso, el driver de Playwright y Chromium),
+las páginas abiertas y los handles vivos, y al final calcula la tendencia del RSS
+total descartando el calentamiento. Termina con código 1 si la memoria crece más
+de lo permitido:
+
+    python -m app.scraper_service.bench.soak --hours 24 --concurrency 2 \\
+        --output soak.jsonl --max-growth-mb-per-hour 10
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from ..browser_pool import BrowserPool
+from ..pacing import get_policy
+from ..services import scrape_page
+from ..sinks import create_sink, set_sink
+from ..watchdog import ResourceWatchdog
+from .fixture_server import FixtureServer
+
+
+def growth_per_hour(samples: List[Tuple[float, float]]) -> Optional[float]:
+    """Pendiente (MiB por hora) de la recta de mínimos cuadrados de (horas, MiB)."""
+    if len(samples) < 2:
+        return None
+    mean_x = sum(x for x, _ in samples) / len(samples)
+    mean_y = sum(y for _, y in samples) / len(samples)
+    variance = sum((x - mean_x) ** 2 for x, _ in samples)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in samples) / variance
+
+
+async def run_soak(args: argparse.Namespace) -> Dict:
+    # Los resultados del servidor de pruebas no se guardan
+    set_sink(create_sink("none"))
+    server = FixtureServer(total=args.total, latency_ms=args.latency_ms).start()
+    # Sin estado calentado: calentarlo abriría Google en cada reciclado
+    pool = BrowserPool(size=args.concurrency, storage_state=False)
+    await pool.start()
+    # Sin bucle propio: cada muestra es también una revisión del watchdog
+    watchdog = ResourceWatchdog(pool, check_seconds=args.sample_seconds)
+    started = time.monotonic()
+    end = started + args.hours * 3600
+    counts = {"scrapes": 0, "failures": 0, "ads": 0}
+    samples: List[Tuple[float, float]] = []
+
+    async def scraper(worker: int) -> None:
+        while time.monotonic() < end:
+            # Búsqueda distinta cada vez, como en producción
+            results = await scrape_page(
+                service=f"soak {uuid.uuid4().hex[:8]}",
+                location=f"worker {worker}",
+                ads_limit=args.ads_limit,
+                social_links=list(args.social_links),
+                pool=pool,
+                tabs=args.tabs,
+                pacing=get_policy("fast"),
+                mode=args.mode,
+                base_url=server.base_url,
+                source=args.source,
+            )
+            counts["scrapes"] += 1
+            if results is None:
+                counts["failures"] += 1
+            else:
+                counts["ads"] += len(results)
+
+    async def sampler(output) -> None:
+        while True:
+            await asyncio.sleep(args.sample_seconds)
+            snapshot = await watchdog.check()
+            hours = (time.monotonic() - started) / 3600
+            total_mib = snapshot["rss_total"] / 2**20
+            samples.append((hours, total_mib))
+            record = {"hours": round(hours, 4), **counts, **snapshot}
+            output.write(json.dumps(record, default=str) + "\n")
+            output.flush()
+            print(
+                f"{hours:6.2f} h: {total_mib:.0f} MiB, {counts['scrapes']} scrapings, "
+                f"{snapshot['handles']['live']} handles, "
+                f"{sum(browser['pages'] for browser in snapshot['browsers'])} páginas"
+            )
+
+    try:
+        with open(args.output, "w", encoding="utf-8") as output:
+            sampling = asyncio.create_task(sampler(output))
+            try:
+                await asyncio.gather(*(scraper(worker) for worker in range(args.concurrency)))
+            finally:
+                sampling.cancel()
+    finally:
+        await pool.close()
+        server.stop()
+
+    # El calentamiento (cachés llenándose, primeros reciclados) no cuenta
+    warm = [sample for sample in samples if sample[0] >= args.hours * args.warmup]
+    growth = growth_per_hour(warm)
+    return {
+        **counts,
+        "hours": args.hours,
+        "samples": len(samples),
+        "growth_mb_per_hour": growth,
+        "recycles": watchdog.to_dict()["recycled_by_reason"],
+        "ok": growth is not None and growth <= args.max_growth_mb_per_hour,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de memoria de larga duración")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--ads-limit", type=int, default=20)
+    parser.add_argument("--mode", choices=("detail", "listing"), default="detail")
+    parser.add_argument("--source", choices=("dom", "xhr"), default="dom")
+    parser.add_argument(
+        "--social-links",
+        type=lambda value: tuple(filter(None, value.split(","))),
+        default=("facebook", "instagram"),
+    )
+    parser.add_argument("--tabs", type=int, default=1)
+    parser.add_argument("--total", type=int, default=120)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--sample-seconds", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=0.1, help="Fracción inicial descartada")
+    parser.add_argument("--max-growth-mb-per-hour", type=float, default=10)
+    parser.add_argument("--output", default="soak.jsonl")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_soak(args))
+    print(json.dumps(summary, indent=4))
+    if not summary["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from .settings import (
+    BROWSER_HEADLESS,
+    BROWSER_MAX_USES,
+    BROWSER_POOL_SIZE,
+    STORAGE_STATE_ENABLED,
+)
+from .storage_state import new_context, refreshing_contexts
+
+
+class _BrowserSlot:
+    """Un navegador del pool junto con su contexto precalentado."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.warm_context: Optional[BrowserContext] = None
+        self.leased: Optional[BrowserContext] = None
+        self.uses = 0
+        # Argumento inofensivo con el que se reconoce su proceso en /proc
+        self.marker = ""
+        # Motivo por el que hay que reciclarlo en cuanto quede libre
+        self.retire: Optional[str] = None
+
+
+class BrowserPool:
+    """Pool de navegadores Chromium de larga vida que presta contextos aislados.
+
+    storage_state indica si los contextos reutilizan el estado calentado de Maps
+    (ver storage_state.py); sin él el pool no visita Google al arrancar.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_uses: int = BROWSER_MAX_USES,
+        headless: bool = BROWSER_HEADLESS,
+        storage_state: bool = STORAGE_STATE_ENABLED,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.headless = headless
+        self.storage_state = storage_state
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[_BrowserSlot] = []
+        self._idle: "asyncio.Queue[_BrowserSlot]" = asyncio.Queue()
+        self._refills: set = set()
+        self.recycled = 0
+        self.recycled_by_reason: Dict[str, int] = {}
+
+    async def start(self) -> None:
+        """Arranca Playwright y precalienta los navegadores del pool."""
+        self._playwright = await async_playwright().start()
+        for index in range(self.size):
+            slot = _BrowserSlot(index)
+            await self._warm(slot)
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+        print(f"Pool de navegadores iniciado con {self.size} navegadores")
+
+    async def close(self) -> None:
+        """Cierra todos los navegadores y detiene Playwright."""
+        for task in list(self._refills):
+            task.cancel()
+        for slot in self._slots:
+            await self._shutdown_slot(slot)
+        self._slots.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[BrowserContext]:
+        """Presta un contexto aislado y lo devuelve al pool al terminar."""
+        slot = await self._idle.get()
+        context = slot.warm_context
+        slot.warm_context = None
+        try:
+            if context is None:
+                context = await self._new_context(slot)
+            slot.leased = context
+            yield context
+        finally:
+            slot.leased = None
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Error al cerrar el contexto: {e}")
+            slot.uses += 1
+            # Recalentar fuera del camino de la petición
+            task = asyncio.create_task(self._refill(slot))
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+
+    @property
+    def browser_count(self) -> int:
+        return sum(1 for slot in self._slots if slot.browser is not None)
+
+    def usage(self) -> List[Dict]:
+        """Contextos y páginas abiertos en cada navegador del pool."""
+        usage = []
+        for slot in self._slots:
+            contexts = slot.browser.contexts if slot.browser is not None else []
+            usage.append(
+                {
+                    "index": slot.index,
+                    "marker": slot.marker,
+                    "uses": slot.uses,
+                    "busy": slot.leased is not None,
+                    "contexts": len(contexts),
+                    "pages": sum(len(context.pages) for context in contexts),
+                    "retiring": slot.retire,
+                }
+            )
+        return usage
+
+    def retire(self, index: int, reason: str) -> None:
+        """Marca un navegador para reciclarlo cuando termine su préstamo actual."""
+        slot = self._slots[index]
+        if slot.retire is None:
+            slot.retire = reason
+
+    def recycle_idle(self) -> None:
+        """Recicla ya los navegadores marcados que no están prestados."""
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+        for slot in idle:
+            if slot.retire is None:
+                self._idle.put_nowait(slot)
+                continue
+            task = asyncio.create_task(self._refill(slot))
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+
+    def orphan_contexts(self, index: int) -> List[BrowserContext]:
+        """Contextos del navegador que no son ni el precalentado ni el prestado.
+
+        No cuenta los que usa una renovación del estado calentado (storage_state).
+        Incluye los que se están creando en ese momento; quien los cierre debe
+        confirmar que siguen ahí en una revisión posterior.
+        """
+        slot = self._slots[index]
+        if slot.browser is None:
+            return []
+        known = (slot.warm_context, slot.leased)
+        refreshing = refreshing_contexts()
+        return [
+            context
+            for context in slot.browser.contexts
+            if context not in known and context not in refreshing
+        ]
+
+    async def _refill(self, slot: _BrowserSlot) -> None:
+        try:
+            if slot.uses >= self.max_uses or slot.retire:
+                reason = slot.retire or "max_uses"
+                await self._shutdown_slot(slot)
+                self.recycled += 1
+                self.recycled_by_reason[reason] = self.recycled_by_reason.get(reason, 0) + 1
+            await self._warm(slot)
+        except Exception as e:
+            print(f"Error al recalentar el navegador {slot.index}: {e}")
+            await self._shutdown_slot(slot)
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _warm(self, slot: _BrowserSlot) -> None:
+        if slot.browser is None or not slot.browser.is_connected():
+            slot.marker = f"--scraper-browser={uuid.uuid4().hex}"
+            slot.browser = await self._playwright.chromium.launch(
+                headless=self.headless, args=[slot.marker]
+            )
+            slot.uses = 0
+            slot.retire = None
+        slot.warm_context = await new_context(slot.browser, self.storage_state)
+
+    async def _new_context(self, slot: _BrowserSlot) -> BrowserContext:
+        if slot.browser is None or not slot.browser.is_connected():
+            await self._warm(slot)
+            context = slot.warm_context
+            slot.warm_context = None
+            return context
+        return await new_context(slot.browser, self.storage_state)
+
+    async def _shutdown_slot(self, slot: _BrowserSlot) -> None:
+        if slot.warm_context is not None:
+            try:
+                await slot.warm_context.close()
+            except Exception:
+                pass
+            slot.warm_context = None
+        if slot.browser is not None:
+            try:
+                await slot.browser.close()
+            except Exception as e:
+                print(f"Error al cerrar el navegador: {e}")
+            slot.browser = None
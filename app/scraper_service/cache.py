@@ -0,0 +1,215 @@
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .settings import (
+    CACHE_MAX_ENTRIES,
+    CACHE_SQLITE_PATH,
+    CACHE_TTL_SECONDS,
+    PLACE_CACHE_MAX_ENTRIES,
+    PLACE_CACHE_TTL_SECONDS,
+)
+
+# Identificadores de lugar que aparecen en los href de los anuncios
+PLACE_ID_PATTERNS = (
+    re.compile(r"!19s(ChIJ[\w-]+)"),
+    re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.IGNORECASE),
+    re.compile(r"[?&]cid=(\d+)"),
+    re.compile(r"[?&]place_id=([\w-]+)"),
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def cache_key(
+    service: str, location: str, social_links: Iterable[str], mode: str = "detail"
+) -> str:
+    """Clave normalizada de la consulta; ads_limit se resuelve al leer la entrada."""
+    links = sorted({_normalize(link) for link in social_links if link.strip()})
+    if mode == "listing":
+        # El listado no depende de las redes sociales pedidas
+        links = []
+    return json.dumps([_normalize(service), _normalize(location), links, mode])
+
+
+class CacheEntry:
+    """Resultados guardados junto al ads_limit con el que se obtuvieron."""
+
+    def __init__(self, ads_limit: int, results: List[Dict], created_at: float) -> None:
+        self.ads_limit = ads_limit
+        self.results = results
+        self.created_at = created_at
+
+    def covers(self, ads_limit: int) -> bool:
+        # Si se obtuvieron menos anuncios que el límite, la lista ya estaba agotada
+        return self.ads_limit >= ads_limit or len(self.results) < self.ads_limit
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+
+class ResultCache:
+    """Caché LRU en memoria con TTL y un nivel opcional persistido en SQLite."""
+
+    def __init__(
+        self,
+        ttl: float = CACHE_TTL_SECONDS,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        sqlite_path: str = CACHE_SQLITE_PATH,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = asyncio.Lock()
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, ads_limit INTEGER, results TEXT, created_at REAL)"
+            )
+            self._db.commit()
+
+    async def get(self, key: str, ads_limit: int) -> Optional[Tuple[List[Dict], float]]:
+        """Devuelve (resultados, edad) si hay una entrada vigente que cubra ads_limit."""
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            entry = await self._db_call(self._db_get, key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            return None
+        if entry.age() > self.ttl:
+            await self.delete(key)
+            return None
+        if not entry.covers(ads_limit):
+            return None
+        self._memory.move_to_end(key)
+        return entry.results[:ads_limit], entry.age()
+
+    async def put(
+        self, key: str, ads_limit: int, results: List[Dict], replace: bool = False
+    ) -> None:
+        current = self._memory.get(key)
+        if (
+            not replace
+            and current is not None
+            and current.age() <= self.ttl
+            and current.ads_limit > ads_limit
+        ):
+            # No reemplazar una entrada más amplia y vigente por una más pequeña
+            return
+        entry = CacheEntry(ads_limit, results, time.time())
+        self._remember(key, entry)
+        if self._db is not None:
+            await self._db_call(self._db_put, key, entry)
+
+    async def delete(self, key: str) -> None:
+        self._memory.pop(key, None)
+        if self._db is not None:
+            await self._db_call(self._db_delete, key)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _db_call(self, func, *args):
+        # SQLite se usa fuera del bucle de eventos y de una en una
+        async with self._db_lock:
+            return await asyncio.to_thread(func, *args)
+
+    def _db_get(self, key: str) -> Optional[CacheEntry]:
+        row = self._db.execute(
+            "SELECT ads_limit, results, created_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], json.loads(row[1]), row[2])
+
+    def _db_put(self, key: str, entry: CacheEntry) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+            (key, entry.ads_limit, json.dumps(entry.results, ensure_ascii=False), entry.created_at),
+        )
+        self._db.commit()
+
+    def _db_delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+        self._db.commit()
+
+
+def place_key(href: Optional[str]) -> Optional[str]:
+    """Extrae el identificador estable del lugar (place ID o CID) de su URL."""
+    if not href:
+        return None
+    for pattern in PLACE_ID_PATTERNS:
+        match = pattern.search(href)
+        if match:
+            return match.group(1)
+    return None
+
+
+class PlaceCache:
+    """Caché LRU con TTL de los detalles de cada lugar."""
+
+    def __init__(
+        self,
+        ttl: float = PLACE_CACHE_TTL_SECONDS,
+        max_entries: int = PLACE_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(place: str, social_links: Iterable[str]) -> str:
+        # Las redes sociales resueltas dependen de las plataformas pedidas
+        return json.dumps([place, sorted({_normalize(link) for link in social_links})])
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[0] > self.ttl:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return dict(entry[1])
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def put(self, key: str, data: Dict) -> None:
+        self._entries[key] = (time.time(), dict(data))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+place_cache = PlaceCache()
@@ -0,0 +1,129 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+COALESCING_STATS = {
+    "leaders": 0,
+    "coalesced": 0,
+    "coalesced_smaller": 0,
+    "abandoned": 0,
+    "timed_out": 0,
+}
+
+
+class _Flight:
+    """Scraping en curso, lo que lleva reunido y cuántas peticiones lo esperan."""
+
+    def __init__(self, ads_limit: int, deadline: Optional[float]) -> None:
+        self.ads_limit = ads_limit
+        # Instante (loop.time()) en que el scraping corta por su propio timeout
+        self.deadline = deadline
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.collected: Dict[int, Any] = {}
+
+    def record(self, index: int, data: Any) -> None:
+        self.collected[index] = data
+
+    def snapshot(self, ads_limit: int) -> List[Any]:
+        return [self.collected[index] for index in sorted(self.collected)][:ads_limit]
+
+
+class SingleFlight:
+    """Une las peticiones idénticas simultáneas en un único scraping.
+
+    Una petición con ads_limit menor o igual que el de un scraping en curso con la
+    misma clave se engancha a él y recibe los primeros ads_limit resultados. Solo se
+    engancha si ese scraping no corta antes que su propio plazo; si el plazo de la
+    petición vence antes de que termine, recibe lo reunido hasta entonces. Si una
+    petición se cancela, el trabajo sigue para las demás; solo se cancela cuando no
+    queda nadie esperándolo.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, List[_Flight]] = {}
+
+    def _find(self, key: str, ads_limit: int, deadline: Optional[float]) -> Optional[_Flight]:
+        candidates = [
+            flight
+            for flight in self._flights.get(key, [])
+            if flight.ads_limit >= ads_limit
+            and not flight.task.done()
+            # Uno que corta antes daría un parcial a quien aún tenía tiempo
+            and (
+                flight.deadline is None
+                or (deadline is not None and flight.deadline >= deadline)
+            )
+        ]
+        return min(candidates, key=lambda flight: flight.ads_limit, default=None)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        flights = self._flights.get(key, [])
+        if flight in flights:
+            flights.remove(flight)
+        if not flights:
+            self._flights.pop(key, None)
+
+    async def run(
+        self,
+        key: str,
+        ads_limit: int,
+        factory: Callable[[Callable[[int, Any], None]], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        partial: Optional[Callable[[List[Any]], Any]] = None,
+    ) -> Tuple[Any, bool]:
+        """Devuelve (resultado, compartido); compartido indica que se reutilizó otro scraping.
+
+        factory recibe el callback on_result con el que el scraping va entregando
+        cada resultado. timeout (segundos) es el plazo de la petición: el scraping
+        que lanza ya lo respeta, y si se engancha a otro y vence antes, devuelve
+        partial(resultados reunidos hasta ahora).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        flight = self._find(key, ads_limit, deadline)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(ads_limit, deadline)
+            flight.task = asyncio.create_task(factory(flight.record))
+            self._flights.setdefault(key, []).append(flight)
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            COALESCING_STATS["leaders"] += 1
+        else:
+            COALESCING_STATS["coalesced"] += 1
+            if flight.ads_limit > ads_limit:
+                COALESCING_STATS["coalesced_smaller"] += 1
+
+        flight.waiters += 1
+        try:
+            # shield: cancelar a un solicitante no cancela el trabajo compartido
+            if shared and deadline is not None:
+                result = await asyncio.wait_for(
+                    asyncio.shield(flight.task), max(0.0, deadline - loop.time())
+                )
+            else:
+                result = await asyncio.shield(flight.task)
+        except asyncio.TimeoutError:
+            COALESCING_STATS["timed_out"] += 1
+            self._abandon(flight)
+            collected = flight.snapshot(ads_limit)
+            return (partial(collected) if partial is not None else collected), shared
+        except asyncio.CancelledError:
+            self._abandon(flight)
+            raise
+        finally:
+            flight.waiters -= 1
+        return result, shared
+
+    def _abandon(self, flight: _Flight) -> None:
+        # El último en irse cancela el trabajo: ya no lo espera nadie
+        if flight.waiters == 1 and not flight.task.done():
+            COALESCING_STATS["abandoned"] += 1
+            flight.task.cancel()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(len(flights) for flights in self._flights.values())
+
+
+def coalescing_stats() -> Dict[str, int]:
+    return dict(COALESCING_STATS)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Margen para que las fases internas agoten su parte del presupuesto (y lo
+# registren) antes de que se cancele el scraping completo
+GRACE_SECONDS = 0.2
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+# Instante (time.monotonic) en el que vence la petición en curso
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def deadline_after(timeout_ms: Optional[int]) -> Optional[float]:
+    """Instante en que vence un plazo de timeout_ms que empieza ahora."""
+    return None if timeout_ms is None else time.monotonic() + timeout_ms / 1000
+
+
+@contextmanager
+def use_deadline(timeout_ms: Optional[int]) -> Iterator[None]:
+    """Fija el plazo del scraping en curso; todas las fases lo heredan."""
+    with use_deadline_at(deadline_after(timeout_ms)):
+        yield
+
+
+@contextmanager
+def use_deadline_at(deadline: Optional[float]) -> Iterator[None]:
+    """Como use_deadline, con un instante ya calculado (p. ej. al recibir la petición).
+
+    Si ya hay un plazo más cercano, se mantiene ese.
+    """
+    if deadline is None:
+        yield
+        return
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos que quedan, o None si la petición no tiene plazo."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def budget_ms(timeout_ms: int) -> int:
+    """Timeout de una operación de Playwright recortado al tiempo restante."""
+    left = remaining()
+    if left is None:
+        return timeout_ms
+    if left <= 0:
+        raise DeadlineExceeded("Se agotó el plazo de la petición")
+    return max(1, min(timeout_ms, int(left * 1000)))
+
+
+async def within(awaitable: Awaitable[T]) -> T:
+    """Espera awaitable como mucho hasta el plazo (más un pequeño margen)."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(0.0, left) + GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Se agotó el plazo de la petición")
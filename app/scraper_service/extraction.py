@@ -0,0 +1,185 @@
+import time
+from typing import Dict, List, Optional
+
+from playwright.async_api import Frame, Page
+
+from .utils.XPATHs import config
+
+# XPaths de config.py que no son campos del detalle de un lugar
+NON_FIELD_XPATHS = {
+    "ADS_CONTAINER_XPATH",
+    "ADS_XPATH",
+    "END_OF_LIST_XPATH",
+    "INFO_MODAL_XPATH",
+    "SOCIAL_MEDIA_LINK_XPATH",
+}
+CARD_SUFFIX = "_CARD_XPATH"
+# Nombre del campo en la respuesta cuando no coincide con el de la constante
+FIELD_NAMES = {"ADRESS_XPATH": "address"}
+
+KNOWN_SOCIAL_MEDIA = [
+    "facebook",
+    "twitter",
+    "instagram",
+    "linkedin",
+    "youtube",
+    "tiktok",
+]
+
+EXTRACTION_STATS: Dict[str, Dict[str, float]] = {}
+
+_FIELDS_SCRIPT = """fields => {
+    const result = {};
+    for (const [name, xpath] of Object.entries(fields)) {
+        const node = document.evaluate(xpath, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        result[name] = node ? node.innerText : null;
+    }
+    return result;
+}"""
+
+_LINKS_SCRIPT = """xpath => {
+    const snapshot = document.evaluate(xpath, document, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const links = [];
+    for (let i = 0; i < snapshot.snapshotLength; i++) {
+        const el = snapshot.snapshotItem(i);
+        const img = el.querySelector('img');
+        let target = null;
+        for (const node of [el, ...el.querySelectorAll('[href], [data-url], [data-href]')]) {
+            const value = node.getAttribute('href')
+                || node.getAttribute('data-url')
+                || node.getAttribute('data-href');
+            if (value && !value.startsWith('javascript:') && value !== '#') {
+                target = new URL(value, document.baseURI).href;
+                break;
+            }
+        }
+        const alt = img ? (img.getAttribute('alt') || '') : null;
+        links.push({index: i, alt, target});
+    }
+    return links;
+}"""
+
+
+_CARDS_SCRIPT = """([anchorXpath, fields, limit]) => {
+    const snapshot = document.evaluate(anchorXpath, document, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const cards = [];
+    const total = Math.min(snapshot.snapshotLength, limit);
+    for (let i = 0; i < total; i++) {
+        const anchor = snapshot.snapshotItem(i);
+        const card = anchor.parentElement || anchor;
+        const item = {
+            title: anchor.getAttribute('aria-label'),
+            url: anchor.href || anchor.getAttribute('href'),
+        };
+        for (const [name, xpath] of Object.entries(fields)) {
+            const node = document.evaluate(xpath, card, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            item[name] = node ? node.innerText : null;
+        }
+        cards.push(item);
+    }
+    return cards;
+}"""
+
+
+def field_name(constant: str) -> str:
+    if constant.endswith(CARD_SUFFIX):
+        return constant[: -len(CARD_SUFFIX)].lower()
+    return FIELD_NAMES.get(constant, constant[: -len("_XPATH")].lower())
+
+
+def detail_fields() -> Dict[str, str]:
+    """Campos del detalle tomados de config.py: toda constante *_XPATH que no sea estructural."""
+    return {
+        field_name(name): getattr(config, name)
+        for name in dir(config)
+        if name.endswith("_XPATH")
+        and not name.endswith(CARD_SUFFIX)
+        and name not in NON_FIELD_XPATHS
+    }
+
+
+def card_fields() -> Dict[str, str]:
+    """Campos de las tarjetas del listado: toda constante *_CARD_XPATH de config.py."""
+    return {
+        field_name(name): getattr(config, name)
+        for name in dir(config)
+        if name.endswith(CARD_SUFFIX)
+    }
+
+
+DETAIL_FIELDS = detail_fields()
+CARD_FIELDS = card_fields()
+
+
+async def extract_fields(page: Page) -> Dict[str, str]:
+    """Lee todos los campos del detalle en una sola evaluación dentro de la página."""
+    values = await page.evaluate(_FIELDS_SCRIPT, DETAIL_FIELDS)
+    return {name: values.get(name) or "N/A" for name in DETAIL_FIELDS}
+
+
+async def extract_listing_cards(page: Page, limit: int) -> List[Dict]:
+    """Lee nombre, URL y los campos de cada tarjeta del feed en una sola evaluación."""
+    cards = await page.evaluate(_CARDS_SCRIPT, [config.ADS_XPATH, CARD_FIELDS, limit])
+    return [
+        {name: value if value is not None else "N/A" for name, value in card.items()}
+        for card in cards
+    ]
+
+
+async def extract_link_candidates(frame: Frame, xpath: str) -> List[Dict]:
+    """Devuelve índice, alt y destino de cada enlace del iframe en una sola evaluación."""
+    return await frame.evaluate(_LINKS_SCRIPT, xpath)
+
+
+def link_domain(alt_text: Optional[str]) -> Optional[str]:
+    # Extrae el dominio del enlace (ejemplo: "facebook" de "www.facebook.com")
+    if alt_text is None:
+        return None
+    if not alt_text:
+        return "N/A"
+    parts = alt_text.split(".")
+    return parts[1].lower() if len(parts) > 1 else None
+
+
+def matches_social_links(domain: Optional[str], social_links: List[str]) -> bool:
+    if domain is None:
+        return False
+    # Si el dominio está en social_links, es válido
+    if domain in social_links:
+        return True
+    # Si "others" está en social_links, verifica que no sea una red social conocida
+    return "others" in social_links and domain not in KNOWN_SOCIAL_MEDIA
+
+
+def record_extraction(engine: str, elapsed: float) -> None:
+    stats = EXTRACTION_STATS.setdefault(engine, {"places": 0, "seconds": 0.0})
+    stats["places"] += 1
+    stats["seconds"] += elapsed
+
+
+def extraction_stats() -> Dict[str, Dict[str, float]]:
+    return {
+        engine: {
+            **stats,
+            "avg_seconds": stats["seconds"] / stats["places"] if stats["places"] else 0.0,
+        }
+        for engine, stats in EXTRACTION_STATS.items()
+    }
+
+
+class Timer:
+    """Mide el tiempo de extracción de un lugar con un motor dado."""
+
+    def __init__(self, engine: str) -> None:
+        self.engine = engine
+
+    def __enter__(self) -> "Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        record_extraction(self.engine, time.perf_counter() - self._start)
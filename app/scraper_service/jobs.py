@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .settings import JOB_QUEUE_SIZE, JOB_RETENTION, JOB_WORKERS
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """La cola de trabajos alcanzó su profundidad máxima."""
+
+
+class JobManagerClosedError(Exception):
+    """El gestor no acepta trabajos (no arrancado o apagándose)."""
+
+
+class Job:
+    """Un scraping encolado con su estado, progreso y resultados parciales."""
+
+    def __init__(self, kwargs: Dict[str, Any], priority: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.kwargs = kwargs
+        self.priority = priority
+        self.status = QUEUED
+        self.total = int(kwargs.get("ads_limit", 0))
+        self.partial: Dict[int, Dict] = {}
+        self.results: Optional[List[Dict]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_requested = False
+
+    def record(self, index: int, data: Dict) -> None:
+        self.partial[index] = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        results = self.results
+        if results is None:
+            results = [self.partial[index] for index in sorted(self.partial)]
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": {"done": len(self.partial), "total": self.total},
+            "results": results,
+            # El scraping terminó antes de tiempo (plazo agotado o error a mitad)
+            "partial": getattr(self.results, "partial", False),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Pool fijo de workers asíncronos sobre una cola con prioridad y profundidad acotada."""
+
+    def __init__(
+        self,
+        runner: Callable[..., Awaitable[Optional[List[Dict]]]],
+        workers: int = JOB_WORKERS,
+        max_queue: int = JOB_QUEUE_SIZE,
+        retention: int = JOB_RETENTION,
+    ) -> None:
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.retention = max(1, retention)
+        self._queue: "asyncio.PriorityQueue" = asyncio.PriorityQueue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        self._pending = 0
+        self.accepting = False
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.accepting = True
+
+    async def stop(self) -> None:
+        self.accepting = False
+        for job in self._jobs.values():
+            if job.status == RUNNING and job.task is not None:
+                job.task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kwargs: Dict[str, Any], priority: int = 0) -> Job:
+        """Encola un trabajo; mayor prioridad se atiende antes."""
+        if not self.accepting:
+            raise JobManagerClosedError("El gestor de trabajos no está disponible")
+        if self._pending >= self.max_queue:
+            raise QueueFullError(f"La cola está llena ({self.max_queue} trabajos)")
+        job = Job(kwargs, priority)
+        self._jobs[job.id] = job
+        self._pending += 1
+        self._queue.put_nowait((-priority, next(self._sequence), job))
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        if job.status == QUEUED:
+            # Se descarta cuando un worker lo saque de la cola
+            self._finish(job, CANCELLED)
+        elif job.task is not None:
+            job.cancel_requested = True
+            job.task.cancel()
+        return job
+
+    @property
+    def queued(self) -> int:
+        return self._pending
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == RUNNING)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            if job.status != QUEUED:
+                continue
+            self._pending -= 1
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.task = asyncio.create_task(self.runner(**job.kwargs, on_result=job.record))
+            try:
+                results = await job.task
+            except asyncio.CancelledError:
+                self._finish(job, CANCELLED)
+                if not job.cancel_requested:
+                    # Se está apagando el worker, no solo este trabajo
+                    raise
+                continue
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, FAILED)
+                continue
+            if results is None:
+                job.error = "Failed to scrape data from Google Maps"
+                self._finish(job, FAILED)
+            else:
+                job.results = results
+                self._finish(job, DONE)
+
+    def _finish(self, job: Job, status: str) -> None:
+        if job.status == QUEUED:
+            self._pending -= 1
+        job.status = status
+        job.finished_at = time.time()
+        job.task = None
+        job.kwargs = {}
+
+    def _prune(self) -> None:
+        # Olvida los trabajos terminados más antiguos
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[: max(0, len(self._jobs) - self.retention)]:
+            del self._jobs[job_id]
@@ -0,0 +1,124 @@
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urljoin, urlparse
+
+import httpx
+from playwright.async_api import ElementHandle
+
+# Hosts que solo redirigen y hay que seguir para conocer el destino
+REDIRECT_HOSTS = ("goo.gl", "g.page", "maps.app.goo.gl", "bit.ly", "linktr.ee")
+GOOGLE_REDIRECT_PATHS = ("/url", "/aclk", "/local_url")
+
+RESOLVER_STATS: Dict[str, int] = {
+    "local": 0,
+    "http": 0,
+    "browser_fallback": 0,
+    "failed": 0,
+}
+
+
+def _is_google_host(host: str) -> bool:
+    return ".google." in f".{host}"
+
+
+def unwrap_google_redirect(url: str) -> str:
+    """Quita el envoltorio /url?q= de Google, si lo hay."""
+    parsed = urlparse(url)
+    if _is_google_host(parsed.netloc.lower()) and parsed.path in GOOGLE_REDIRECT_PATHS:
+        params = parse_qs(parsed.query)
+        for key in ("q", "url", "adurl"):
+            if params.get(key):
+                return unwrap_google_redirect(params[key][0])
+    return url
+
+
+def needs_follow(url: str) -> bool:
+    """Indica si la URL sigue siendo una redirección que hay que resolver por HTTP."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if _is_google_host(host) and parsed.path in GOOGLE_REDIRECT_PATHS:
+        return True
+    return host in REDIRECT_HOSTS or host.endswith(tuple(f".{h}" for h in REDIRECT_HOSTS))
+
+
+async def read_link_target(link: ElementHandle, base_url: str = "") -> Optional[str]:
+    """Lee el destino del enlace desde href o atributos data-* sin hacer clic."""
+    target = await link.evaluate(
+        """el => {
+            const nodes = [el, ...el.querySelectorAll('[href], [data-url], [data-href]')];
+            for (const node of nodes) {
+                const value = node.getAttribute('href')
+                    || node.getAttribute('data-url')
+                    || node.getAttribute('data-href');
+                if (value && !value.startsWith('javascript:') && value !== '#') {
+                    return value;
+                }
+            }
+            return null;
+        }"""
+    )
+    if not target:
+        return None
+    return urljoin(base_url, target) if base_url else target
+
+
+class LinkResolver:
+    """Resuelve enlaces localmente o con peticiones HTTP ligeras, sin abrir pestañas."""
+
+    def __init__(self, timeout: float = 5.0, max_connections: int = 20) -> None:
+        self._client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            headers={"User-Agent": "Mozilla/5.0 (compatible; maps-scraper)"},
+        )
+
+    async def resolve(self, url: Optional[str]) -> Optional[str]:
+        """Devuelve la URL final o None si hay que recurrir al navegador."""
+        if not url:
+            return None
+        target = unwrap_google_redirect(url)
+        if not needs_follow(target):
+            RESOLVER_STATS["local"] += 1
+            return target
+        try:
+            response = await self._client.head(target)
+            if response.status_code >= 400:
+                # Algunos servidores no aceptan HEAD
+                async with self._client.stream("GET", target) as response:
+                    final_url = str(response.url)
+            else:
+                final_url = str(response.url)
+            RESOLVER_STATS["http"] += 1
+            return unwrap_google_redirect(final_url)
+        except httpx.HTTPError as e:
+            print(f"Error al resolver el enlace {target}: {e}")
+            RESOLVER_STATS["failed"] += 1
+            return None
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_resolver: Optional[LinkResolver] = None
+
+
+def get_resolver() -> LinkResolver:
+    """Devuelve el resolvedor compartido con su pool de conexiones."""
+    global _resolver
+    if _resolver is None:
+        _resolver = LinkResolver()
+    return _resolver
+
+
+async def close_resolver() -> None:
+    global _resolver
+    if _resolver is not None:
+        await _resolver.close()
+        _resolver = None
+
+
+def resolver_stats() -> Dict[str, int]:
+    return dict(RESOLVER_STATS)
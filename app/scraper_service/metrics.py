@@ -0,0 +1,279 @@
+import bisect
+import copy
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Límites de los buckets en segundos, de una consulta rápida a un scraping completo
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _labels(values: Dict[str, str]) -> Labels:
+    return tuple(sorted(values.items()))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[Labels, float]:
+        return dict(self._values)
+
+    def merge(self, values: Dict[Labels, float]) -> None:
+        for key, amount in values.items():
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._callback: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], float]) -> None:
+        """Lee el valor en el momento de exportar (p. ej. navegadores del pool)."""
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        if self._callback is not None:
+            lines.append(f"{self.name} {float(self._callback())}")
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: (conteo por bucket, suma, total)
+        self._values: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        counts, total_sum, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(counts):
+            counts[index] += 1
+        self._values[key] = (counts, total_sum + value, count + 1)
+
+    def snapshot(self) -> Dict[Labels, List[float]]:
+        # [suma, total, conteo por bucket...]: una lista de números, como los demás contadores
+        return {
+            key: [total_sum, count, *counts]
+            for key, (counts, total_sum, count) in self._values.items()
+        }
+
+    def merge(self, values: Dict[Labels, List[float]]) -> None:
+        for key, (extra_sum, extra_count, *extra_counts) in values.items():
+            counts, total_sum, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            counts = [a + b for a, b in zip(counts, extra_counts)]
+            self._values[key] = (counts, total_sum + extra_sum, count + extra_count)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total_sum, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total_sum}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Métricas del proceso en formato de texto de Prometheus."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._metrics.setdefault(name, Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Registra una función que devuelve líneas extra al exportar."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Valores de los contadores e histogramas (los gauges son de cada proceso)."""
+        return {
+            name: metric.snapshot()
+            for name, metric in self._metrics.items()
+            if hasattr(metric, "snapshot")
+        }
+
+    def merge(self, values: Dict[str, Dict]) -> None:
+        """Suma incrementos medidos en otro proceso (ver numeric_delta)."""
+        for name, metric_values in values.items():
+            metric = self._metrics.get(name)
+            if metric is not None and hasattr(metric, "merge"):
+                metric.merge(metric_values)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+PHASE_SECONDS = registry.histogram(
+    "scraper_phase_seconds", "Duration of each scraping phase in seconds."
+)
+PHASE_ERRORS = registry.counter(
+    "scraper_phase_errors_total", "Errors raised inside each scraping phase."
+)
+SCRAPES_TOTAL = registry.counter("scraper_scrapes_total", "Scrapes started.")
+IN_FLIGHT = registry.gauge("scraper_in_flight", "Scrapes currently running.")
+
+# Desglose por petición: solo se rellena si la petición lo pide
+_timings: ContextVar[Optional[Dict[str, Dict[str, float]]]] = ContextVar(
+    "phase_timings", default=None
+)
+
+
+def observe_phase(name: str, elapsed: float) -> None:
+    PHASE_SECONDS.observe(elapsed, phase=name)
+    timings = _timings.get()
+    if timings is not None:
+        entry = timings.setdefault(name, {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += elapsed
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Mide una fase del scraping y cuenta sus errores."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        PHASE_ERRORS.inc(phase=name)
+        raise
+    finally:
+        observe_phase(name, time.perf_counter() - start)
+
+
+@contextmanager
+def track_scrape() -> Iterator[None]:
+    """Cuenta el scraping y lo mantiene en el gauge de scrapings en curso."""
+    SCRAPES_TOTAL.inc()
+    IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        IN_FLIGHT.dec()
+
+
+@contextmanager
+def collect_timings(enabled: bool = True) -> Iterator[Optional[Dict[str, Dict[str, float]]]]:
+    """Activa el desglose de tiempos por fase para el scraping en curso."""
+    if not enabled:
+        yield None
+        return
+    timings: Dict[str, Dict[str, float]] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def merge_timings(timings: Optional[Dict[str, Dict[str, float]]]) -> None:
+    """Suma al desglose en curso los tiempos medidos en otro proceso."""
+    current = _timings.get()
+    if current is None or not timings:
+        return
+    for name, values in timings.items():
+        entry = current.setdefault(name, {"count": 0, "seconds": 0.0})
+        entry["count"] += values["count"]
+        entry["seconds"] += values["seconds"]
+
+
+def numeric_delta(current, previous):
+    """Diferencia entre dos árboles de contadores (dicts, listas y números).
+
+    Solo quedan las entradas que cambiaron, de modo que el resultado es pequeño y
+    se puede enviar a otro proceso y sumar con add_numeric. Las claves nuevas van
+    completas, con sus ceros, para que el destino tenga la misma forma.
+    """
+    if isinstance(current, dict):
+        previous = previous if isinstance(previous, dict) else {}
+        delta = {}
+        for key, value in current.items():
+            if key not in previous:
+                delta[key] = copy.deepcopy(value)
+                continue
+            change = numeric_delta(value, previous.get(key))
+            if change:
+                delta[key] = change
+        return delta
+    if isinstance(current, list):
+        if not isinstance(previous, list) or len(previous) != len(current):
+            previous = [0] * len(current)
+        change = [value - before for value, before in zip(current, previous)]
+        return change if any(change) else []
+    if isinstance(current, (int, float)) and not isinstance(current, bool):
+        return current - (previous or 0)
+    return 0
+
+
+def add_numeric(target: Dict, delta: Dict) -> None:
+    """Suma en el sitio un incremento calculado con numeric_delta."""
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            add_numeric(target.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = target.get(key)
+            target[key] = [a + b for a, b in zip(current, value)] if current else list(value)
+        else:
+            target[key] = target.get(key, 0) + value
@@ -0,0 +1,150 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from playwright.async_api import ElementHandle, Error as PlaywrightError, Page
+
+from .deadline import DeadlineExceeded, budget_ms, expired
+from .settings import PACING_DEFAULT_POLICY, PACING_SIGNAL_TIMEOUT_MS
+
+
+class PacingPolicy:
+    """Política de espera: señales de la página más un retardo opcional."""
+
+    def __init__(
+        self,
+        name: str,
+        min_delay: float = 0.0,
+        max_delay: float = 0.0,
+        signal_timeout_ms: int = PACING_SIGNAL_TIMEOUT_MS,
+    ) -> None:
+        if min_delay < 0 or max_delay < min_delay:
+            raise ValueError("Se requiere 0 <= min_delay <= max_delay")
+        self.name = name
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.signal_timeout_ms = signal_timeout_ms
+
+    async def pause(self) -> None:
+        if self.max_delay > 0:
+            await asyncio.sleep(random.uniform(self.min_delay, self.max_delay))
+
+
+POLICIES: Dict[str, PacingPolicy] = {
+    # Solo señales de la página
+    "fast": PacingPolicy("fast"),
+    # Señales más un jitter para no parecer un bot
+    "polite": PacingPolicy("polite", 0.3, 1.0),
+}
+
+WAIT_STATS: Dict[str, Dict[str, float]] = {}
+
+_current_policy: ContextVar[Optional[PacingPolicy]] = ContextVar(
+    "pacing_policy", default=None
+)
+
+
+def get_policy(
+    name: str, min_delay: Optional[float] = None, max_delay: Optional[float] = None
+) -> PacingPolicy:
+    """Devuelve la política por nombre; "custom" usa el rango min/max indicado."""
+    if name == "custom":
+        if min_delay is None or max_delay is None:
+            raise ValueError("La política 'custom' requiere min_delay y max_delay")
+        return PacingPolicy("custom", min_delay, max_delay)
+    if name not in POLICIES:
+        raise ValueError(f"Política de espera desconocida: {name}")
+    return POLICIES[name]
+
+
+def current_policy() -> PacingPolicy:
+    return _current_policy.get() or POLICIES[PACING_DEFAULT_POLICY]
+
+
+@contextmanager
+def use_policy(policy: Optional[PacingPolicy]) -> Iterator[None]:
+    """Fija la política de espera para el scraping en curso."""
+    if policy is None:
+        yield
+        return
+    token = _current_policy.set(policy)
+    try:
+        yield
+    finally:
+        _current_policy.reset(token)
+
+
+def wait_stats() -> Dict[str, Dict[str, float]]:
+    return {name: dict(stats) for name, stats in WAIT_STATS.items()}
+
+
+def record_wait(
+    policy: PacingPolicy, elapsed: float, signaled: bool, waits: int = 1
+) -> None:
+    stats = WAIT_STATS.setdefault(
+        policy.name, {"waits": 0, "seconds": 0.0, "timeouts": 0}
+    )
+    stats["waits"] += waits
+    stats["seconds"] += elapsed
+    if not signaled:
+        stats["timeouts"] += 1
+
+
+async def _wait_for_function(page: Page, expression: str, arg, timeout_ms: int) -> bool:
+    try:
+        await page.wait_for_function(expression, arg=arg, timeout=budget_ms(timeout_ms))
+        return True
+    except (PlaywrightError, DeadlineExceeded):
+        return False
+
+
+async def read_text(page: Page, xpath: str) -> Optional[str]:
+    """Lee el texto del primer nodo que coincide con el XPath, sin crear handles."""
+    return await page.evaluate(
+        """xpath => {
+            const node = document.evaluate(xpath, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            return node ? node.innerText : null;
+        }""",
+        xpath,
+    )
+
+
+async def wait_for_text_change(page: Page, xpath: str, previous: Optional[str]) -> bool:
+    """Espera a que el texto del XPath exista y sea distinto del anterior."""
+    policy = current_policy()
+    start = time.perf_counter()
+    signaled = await _wait_for_function(
+        page,
+        """([xpath, previous]) => {
+            const node = document.evaluate(xpath, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            return node && node.innerText && node.innerText !== previous;
+        }""",
+        [xpath, previous],
+        policy.signal_timeout_ms,
+    )
+    await policy.pause()
+    record_wait(policy, time.perf_counter() - start, signaled)
+    return signaled
+
+
+async def wait_for_element(element: ElementHandle) -> bool:
+    """Espera a que el elemento sea visible y estable antes de interactuar."""
+    if expired():
+        return False
+    policy = current_policy()
+    start = time.perf_counter()
+    try:
+        await element.wait_for_element_state(
+            "stable", timeout=budget_ms(policy.signal_timeout_ms)
+        )
+        signaled = True
+    except (PlaywrightError, DeadlineExceeded):
+        signaled = False
+    await policy.pause()
+    record_wait(policy, time.perf_counter() - start, signaled)
+    return signaled
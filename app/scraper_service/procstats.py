@@ -0,0 +1,93 @@
+import os
+from typing import Dict, List, Optional
+
+# Lectura de memoria y procesos desde /proc (Linux, como en el contenedor)
+CHROMIUM_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def _read_status(pid: int) -> Dict[str, str]:
+    status = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                status[key] = value.strip()
+    except OSError:
+        pass
+    return status
+
+
+def _kib(value: Optional[str]) -> int:
+    if not value:
+        return 0
+    return int(value.split()[0]) * 1024
+
+
+def rss_bytes(pid: Optional[int] = None) -> int:
+    """RSS actual del proceso (por defecto, este proceso)."""
+    return _kib(_read_status(pid or os.getpid()).get("VmRSS"))
+
+
+def peak_rss_bytes(pid: Optional[int] = None) -> int:
+    """Pico de RSS del proceso (VmHWM)."""
+    return _kib(_read_status(pid or os.getpid()).get("VmHWM"))
+
+
+def _children() -> Dict[int, List[int]]:
+    tree: Dict[int, List[int]] = {}
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return tree
+    for pid in pids:
+        ppid = _read_status(pid).get("PPid")
+        if ppid:
+            tree.setdefault(int(ppid), []).append(pid)
+    return tree
+
+
+def descendants(pid: Optional[int] = None) -> List[int]:
+    """Todos los procesos descendientes (Playwright, Chromium y sus renderers)."""
+    tree = _children()
+    pending = list(tree.get(pid or os.getpid(), []))
+    found = []
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(tree.get(child, []))
+    return found
+
+
+def chromium_processes(pid: Optional[int] = None) -> List[int]:
+    """Procesos de Chromium que cuelgan de este proceso."""
+    return [
+        child
+        for child in descendants(pid)
+        if any(name in _read_status(child).get("Name", "") for name in CHROMIUM_NAMES)
+    ]
+
+
+def chromium_rss_bytes(pid: Optional[int] = None) -> int:
+    """RSS sumado del árbol de procesos de Chromium."""
+    return sum(rss_bytes(child) for child in chromium_processes(pid))
+
+
+def _cmdline(pid: int) -> List[str]:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().decode("utf-8", "replace").split("\0")
+    except OSError:
+        return []
+
+
+def find_process(argument: str, pid: Optional[int] = None) -> Optional[int]:
+    """Primer descendiente lanzado con ese argumento (p. ej. la marca de un navegador)."""
+    for child in sorted(descendants(pid)):
+        if argument in _cmdline(child):
+            return child
+    return None
+
+
+def tree_rss_bytes(pid: int) -> int:
+    """RSS de un proceso más el de todos sus descendientes (navegador y renderers)."""
+    return rss_bytes(pid) + sum(rss_bytes(child) for child in descendants(pid))
@@ -0,0 +1,116 @@
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Request, Route
+
+from .settings import BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PATTERNS
+
+# Fragmentos de URL que no aportan datos: teselas del mapa, fotos y analítica
+DEFAULT_URL_PATTERNS: Tuple[str, ...] = (
+    "/maps/vt",
+    "/kh/v=",
+    "khms",
+    "streetviewpixels",
+    "lh3.googleusercontent.com",
+    "lh5.googleusercontent.com",
+    "fonts.gstatic.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "/gen_204",
+    "/maps/preview/log",
+    "/log?format=json",
+)
+
+# Tamaño medio aproximado por tipo, para estimar los bytes ahorrados
+AVERAGE_BYTES: Dict[str, int] = {
+    "image": 25_000,
+    "font": 40_000,
+    "media": 200_000,
+    "stylesheet": 15_000,
+    "script": 50_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_AVERAGE_BYTES = 5_000
+
+BLOCKING_STATS: Dict[str, object] = {
+    "blocked": 0,
+    "estimated_bytes_saved": 0,
+    "by_type": {},
+}
+
+
+def _split(value: str) -> Tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+class BlockingConfig:
+    """Qué tipos de recurso y patrones de URL se abortan en un contexto."""
+
+    def __init__(
+        self,
+        resource_types: Iterable[str] = (),
+        url_patterns: Iterable[str] = (),
+    ) -> None:
+        self.resource_types: FrozenSet[str] = frozenset(resource_types)
+        self.url_patterns: Tuple[str, ...] = tuple(url_patterns)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_types or self.url_patterns)
+
+    def should_block(self, request: Request) -> bool:
+        if request.resource_type in self.resource_types:
+            return True
+        url = request.url
+        return any(pattern in url for pattern in self.url_patterns)
+
+
+DEFAULT_BLOCKING = BlockingConfig(
+    _split(BLOCKED_RESOURCE_TYPES),
+    DEFAULT_URL_PATTERNS + _split(BLOCKED_URL_PATTERNS),
+)
+NO_BLOCKING = BlockingConfig()
+
+
+def parse_blocking(value: Optional[str]) -> BlockingConfig:
+    """Convierte la opción de la petición ("default", "none" o tipos separados por comas)."""
+    if value is None or value == "default":
+        return DEFAULT_BLOCKING
+    if value == "none":
+        return NO_BLOCKING
+    return BlockingConfig(_split(value), DEFAULT_BLOCKING.url_patterns)
+
+
+def _record(request: Request) -> None:
+    resource_type = request.resource_type
+    BLOCKING_STATS["blocked"] += 1
+    BLOCKING_STATS["estimated_bytes_saved"] += AVERAGE_BYTES.get(
+        resource_type, DEFAULT_AVERAGE_BYTES
+    )
+    by_type = BLOCKING_STATS["by_type"]
+    by_type[resource_type] = by_type.get(resource_type, 0) + 1
+
+
+async def apply_blocking(context: BrowserContext, config: BlockingConfig) -> None:
+    """Registra en el contexto la ruta que aborta los recursos bloqueados."""
+    if not config.enabled:
+        return
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        if config.should_block(request):
+            _record(request)
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+
+
+def blocking_stats() -> Dict[str, object]:
+    return {
+        "blocked": BLOCKING_STATS["blocked"],
+        "estimated_bytes_saved": BLOCKING_STATS["estimated_bytes_saved"],
+        "by_type": dict(BLOCKING_STATS["by_type"]),
+    }
@@ -0,0 +1,92 @@
+from typing import Dict
+
+from playwright.async_api import Page
+
+from .deadline import budget_ms
+from .pacing import current_policy, record_wait
+from .utils.XPATHs.config import ADS_CONTAINER_XPATH, ADS_XPATH, END_OF_LIST_XPATH
+
+# Desplaza el feed dentro de la página: cuenta tarjetas sin crear handles y espera
+# con un MutationObserver a que lleguen nuevas o aparezca el final de la lista.
+_SCROLL_FEED_SCRIPT = """async ([containerXpath, adsXpath, endXpath, limit, timeoutMs, minDelay, maxDelay]) => {
+    const find = xpath => document.evaluate(xpath, document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    const count = () => document.evaluate(`count(${adsXpath})`, document, null,
+        XPathResult.NUMBER_TYPE, null).numberValue;
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+    const container = find(containerXpath);
+    if (!container) {
+        return {count: 0, waits: 0, waited: 0, reason: 'no-container'};
+    }
+    let waits = 0;
+    let waited = 0;
+    let reason = 'limit';
+    // Cota de seguridad: cada ronda debe aportar al menos una tarjeta
+    for (let round = 0; round <= limit; round++) {
+        const before = count();
+        if (before >= limit) {
+            reason = 'limit';
+            break;
+        }
+        if (find(endXpath)) {
+            reason = 'end';
+            break;
+        }
+        const start = performance.now();
+        const grew = await new Promise(resolve => {
+            let timer = null;
+            const observer = new MutationObserver(() => {
+                if (count() > before || find(endXpath)) {
+                    observer.disconnect();
+                    clearTimeout(timer);
+                    resolve(true);
+                }
+            });
+            timer = setTimeout(() => {
+                observer.disconnect();
+                resolve(false);
+            }, timeoutMs);
+            observer.observe(container, {childList: true, subtree: true});
+            container.scrollTop = container.scrollHeight;
+        });
+        if (maxDelay > 0) {
+            await sleep((minDelay + Math.random() * (maxDelay - minDelay)) * 1000);
+        }
+        waits++;
+        waited += performance.now() - start;
+        if (!grew) {
+            reason = 'stalled';
+            break;
+        }
+    }
+    return {count: count(), waits, waited: waited / 1000, reason};
+}"""
+
+
+async def scroll_feed(page: Page, ads_limit: int) -> Dict:
+    """Desplaza el feed hasta tener ads_limit tarjetas, llegar al final o dejar de crecer."""
+    policy = current_policy()
+    await page.locator(ADS_CONTAINER_XPATH).first.wait_for(timeout=budget_ms(10000))
+    outcome = await page.evaluate(
+        _SCROLL_FEED_SCRIPT,
+        [
+            ADS_CONTAINER_XPATH,
+            ADS_XPATH,
+            END_OF_LIST_XPATH,
+            ads_limit,
+            policy.signal_timeout_ms,
+            policy.min_delay,
+            policy.max_delay,
+        ],
+    )
+    if outcome["waits"]:
+        record_wait(
+            policy,
+            outcome["waited"],
+            signaled=outcome["reason"] != "stalled",
+            waits=outcome["waits"],
+        )
+    print(f"Tarjetas cargadas: {outcome['count']} ({outcome['reason']})")
+    return outcome
+
@@ -1,10 +1,45 @@
 import asyncio
-import json
-import random
-from typing import Dict, List, Optional
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus
 from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+from .browser_pool import BrowserPool
+from .cache import PlaceCache, place_cache, place_key
+from .deadline import DeadlineExceeded, budget_ms, expired, use_deadline, within
+from .extraction import (
+    Timer,
+    extract_fields,
+    extract_link_candidates,
+    extract_listing_cards,
+    link_domain,
+    matches_social_links,
+)
+from .link_resolver import (
+    RESOLVER_STATS,
+    get_resolver,
+    read_link_target,
+    unwrap_google_redirect,
+)
+from .metrics import PHASE_ERRORS, observe_phase, phase, track_scrape
+from .pacing import (
+    PacingPolicy,
+    read_text,
+    use_policy,
+    wait_for_element,
+    wait_for_text_change,
+)
+from .resource_blocking import DEFAULT_BLOCKING, BlockingConfig, apply_blocking
+from .scrolling import scroll_feed
+from .settings import EXTRACTION_ENGINE, EXTRACTION_SOURCE, MAPS_BASE_URL, SEARCH_NAVIGATION
+from .sinks import get_sink
+from .snapshots import IncrementalRefresh, get_snapshots
+from .storage_state import accept_consent, get_storage_state, new_context
+from .watchdog import dispose, query, query_all
+from .xhr import CARD_KEYS, SearchCapture, complete, from_capture, merge_fields
 from .utils.XPATHs.config import (
     URL_MAPS,
+    MAPS_ROOT,
     ADS_CONTAINER_XPATH,
     ADS_XPATH,
     TITLE_XPATH,
@@ -16,15 +51,62 @@ from .utils.XPATHs.config import (
 
 
 global url
-url = URL_MAPS
-
-async def search_page(page: Page, service: str, location: str) -> None:
-    """Navega a la URL y realiza la búsqueda con el servicio y ubicación proporcionados."""
+url = MAPS_BASE_URL or URL_MAPS
+
+# Recibe (posición del anuncio, datos) en cuanto cada anuncio termina
+ResultCallback = Callable[[int, Dict], None]
+# Vista del mapa: (latitud, longitud, zoom)
+Viewport = Tuple[float, float, float]
+
+
+def search_url(
+    query: str, viewport: Optional[Viewport] = None, base_url: Optional[str] = None
+) -> str:
+    """URL de búsqueda directa, opcionalmente limitada a una vista del mapa."""
+    root, _, options = (base_url or MAPS_BASE_URL or MAPS_ROOT).partition("?")
+    path = f"{root.rstrip('/')}/search/{quote_plus(query)}"
+    if viewport is not None:
+        lat, lng, zoom = viewport
+        path = f"{path}/@{lat:.6f},{lng:.6f},{zoom:g}z"
+    return f"{path}?{options}" if options else path
+
+
+async def search_page(
+    page: Page,
+    service: str,
+    location: str,
+    base_url: Optional[str] = None,
+    viewport: Optional[Viewport] = None,
+) -> None:
+    """Navega a la URL y realiza la búsqueda con el servicio y ubicación proporcionados.
+
+    Por defecto abre directamente la URL de búsqueda (una sola carga de página);
+    con viewport busca solo el servicio en esa zona del mapa.
+    """
     try:
-        await page.goto(url, wait_until="domcontentloaded")
-        await page.fill("#searchboxinput", f"{service} {location}")
-        await page.click("#searchbox-searchbutton")
-        await page.wait_for_selector(ADS_CONTAINER_XPATH, timeout=10000)
+        if viewport is not None:
+            await page.goto(
+                search_url(service, viewport, base_url),
+                wait_until="domcontentloaded",
+                timeout=budget_ms(30000),
+            )
+        elif SEARCH_NAVIGATION == "direct":
+            await page.goto(
+                search_url(f"{service} {location}", base_url=base_url),
+                wait_until="domcontentloaded",
+                timeout=budget_ms(30000),
+            )
+        else:
+            await page.goto(base_url or url, wait_until="domcontentloaded", timeout=budget_ms(30000))
+            await page.fill("#searchboxinput", f"{service} {location}")
+            await page.click("#searchbox-searchbutton")
+        if await accept_consent(page):
+            # El estado guardado ya no sirve: se renovará en el próximo contexto
+            store = get_storage_state()
+            if store is not None:
+                store.invalidate()
+        # locator.wait_for no deja un handle sin liberar, a diferencia de wait_for_selector
+        await page.locator(ADS_CONTAINER_XPATH).first.wait_for(timeout=budget_ms(10000))
     except Exception as e:
         print(f"Error al buscar en la página: {e}")
         raise
@@ -35,120 +117,216 @@ async def extract_ad_data(page: Page, context: BrowserContext, social_links:List
 
     await scroll_to_element(page,INFO_MODAL_XPATH)
 
+    with phase("extract_ad"), Timer(EXTRACTION_ENGINE):
+        try:
+            if EXTRACTION_ENGINE == "script":
+                data = await extract_fields(page)
+            else:
+                data = await _extract_fields_with_handles(page)
+            print(f"Extrayendo: {data['title']}")
+
+            with phase("social_links"):
+                data["social_media"] = await extract_social_media_links(
+                    page, context, social_links
+                )
+            return data
+        except Exception as e:
+            PHASE_ERRORS.inc(phase="extract_ad")
+            print(f"Error extrayendo datos del anuncio: {e}")
+            return {"title": "N/A", "phone": "N/A", "address": "N/A"}
+
+
+async def _extract_fields_with_handles(page: Page) -> Dict:
+    """Extrae los campos con una consulta por campo (motor "handles")."""
+    title = phone = address = None
     try:
-        title = await page.query_selector(TITLE_XPATH)
+        title = await query(page, TITLE_XPATH)
         title_text = await title.inner_text() if title else "N/A"
-        print(f"Extrayendo: {title_text}")
 
-        phone = await page.query_selector(PHONE_XPATH)
+        phone = await query(page, PHONE_XPATH)
         phone_number = await phone.inner_text() if phone else "N/A"
 
-        address = await page.query_selector(ADRESS_XPATH)
+        address = await query(page, ADRESS_XPATH)
         address_text = await address.inner_text() if address else "N/A"
-       
-
-        return {
-            "title": title_text,
-            "phone": phone_number,
-            "address": address_text,
-            "social_media": await extract_social_media_links(
-                page, context, social_links
-            ),
-        }
-    except Exception as e:
-        print(f"Error extrayendo datos del anuncio: {e}")
-        return {"title": "N/A", "phone": "N/A", "address": "N/A"}
+    finally:
+        await dispose(title, phone, address)
+
+    return {"title": title_text, "phone": phone_number, "address": address_text}
 
 
 async def extract_social_media_links(page: Page, context: BrowserContext,social_links:List[str]) -> List[str]:
 
+    if not social_links:
+        return []
+
+    iframe = handles = None
     try:
-        await page.wait_for_selector("//iframe", timeout=10000)
-        iframe = await page.query_selector("//iframe")
-        
+        await page.locator("//iframe").first.wait_for(timeout=budget_ms(10000))
+        iframe = await query(page, "//iframe")
+
         frame = await iframe.content_frame()
 
         if frame:
-            social_media_links = await frame.query_selector_all(SOCIAL_MEDIA_LINK_XPATH)
+            if EXTRACTION_ENGINE == "script":
+                candidates = await extract_link_candidates(frame, SOCIAL_MEDIA_LINK_XPATH)
+            else:
+                candidates = await _link_candidates_with_handles(frame)
             links = []
 
-            for link in social_media_links:
-
-                if await is_valid_link(link,social_links):
-                    await asyncio.sleep(
-                        random.uniform(1, 2)
-                    )  # Espera para cargar el enlace
-
-                    try:
-                        async with context.expect_page() as new_page_info:
-                            # Espera a que se abra el enlace
-                            await link.click()
-                        new_page = await new_page_info.value
-
-                        await new_page.wait_for_load_state("load", timeout=15000)
-                        current_url = new_page.url
-                        links.append(current_url)
-
+            for candidate in candidates:
+                if expired():
+                    print("Plazo agotado, se omiten los enlaces restantes")
+                    break
+                domain = link_domain(candidate["alt"])
+                if not matches_social_links(domain, social_links):
+                    continue
+                print(f"Dominio extraído: {domain}")
+
+                # Primero se intenta resolver el destino sin abrir pestañas
+                resolved = await get_resolver().resolve(candidate["target"])
+                if resolved:
+                    links.append(resolved)
+                    continue
+
+                if handles is None:
+                    handles = await query_all(frame, SOCIAL_MEDIA_LINK_XPATH)
+                link = handles[candidate["index"]]
+                await wait_for_element(link)  # Espera para cargar el enlace
+
+                new_page = None
+                try:
+                    RESOLVER_STATS["browser_fallback"] += 1
+                    # Popup de esta pestaña, para no mezclar pestañas concurrentes
+                    async with page.expect_popup(timeout=budget_ms(30000)) as new_page_info:
+                        # Espera a que se abra el enlace
+                        await link.click()
+                    new_page = await new_page_info.value
+
+                    # Basta con conocer la URL, no hace falta la carga completa
+                    await new_page.wait_for_url(
+                        lambda current: current != "about:blank",
+                        wait_until="commit",
+                        timeout=budget_ms(15000),
+                    )
+                    current_url = unwrap_google_redirect(new_page.url)
+                    links.append(current_url)
+                except Exception as e:
+                    PHASE_ERRORS.inc(phase="social_links")
+                    print(f"Error al abrir el enlace: {e}")
+                finally:
+                    # También si falla: una pestaña sin cerrar sigue ocupando memoria
+                    if new_page is not None:
                         await new_page.close()
-                    except Exception as e:
-                        print(f"Error al abrir el enlace: {e}")
-               
+
             return links
         else:
             print("No se pudo acceder al iframe de redes sociales.")
             return []
 
     except Exception as e:  
+        PHASE_ERRORS.inc(phase="social_links")
         print(f"Error al encontrar frame: {e}")
         return []
+    finally:
+        # Liberados al terminar cada anuncio, no al cerrar la página
+        await dispose(iframe, handles)
 
 
-async def is_valid_link(link, social_links) -> bool:
-
-    known_social_media = [
-            "facebook",
-            "twitter",
-            "instagram",
-            "linkedin",
-            "youtube",
-            "tiktok",
-        ]
+async def _link_candidates_with_handles(frame) -> List[Dict]:
+    """Lee alt y destino de cada enlace con llamadas por enlace (motor "handles")."""
+    candidates = []
+    links = await query_all(frame, SOCIAL_MEDIA_LINK_XPATH)
     try:
-        # Extrae el dominio del enlace (ejemplo: "facebook" de "www.facebook.com")
-        query_selector = await link.query_selector("//img")
-        if not query_selector:
-            return False
-        alt_text = await query_selector.get_attribute("alt")
-        alt_text = alt_text.split(".")[1].lower() if alt_text else "N/A"
-
-
-        # Si el dominio está en social_links, es válido
-        if alt_text in social_links:
-            print(f"Dominio extraído: {alt_text}")
-            return True
-        # Si "others" está en social_links, verifica que no sea una red social conocida
-        if "others" in social_links and alt_text not in known_social_media:
-            print(f"Dominio extraído: {alt_text}")
-            return True
-
-        return False
-    except Exception as e:
-        print(f"Error al procesar el enlace {link}: {e}")
-        return False
-
-async def scrape_ads(page: Page, context: BrowserContext, social_links:List[str], ads_limit: int = 5) -> List[Dict]:
-    """Extrae datos de los anuncios en la página."""
+        for index, link in enumerate(links):
+            image = None
+            try:
+                image = await query(link, "//img")
+                alt_text = (await image.get_attribute("alt") or "") if image else None
+                target = await read_link_target(link, frame.url)
+            except Exception as e:
+                print(f"Error al procesar el enlace {link}: {e}")
+                continue
+            finally:
+                await dispose(image)
+            candidates.append({"index": index, "alt": alt_text, "target": target})
+    finally:
+        await dispose(links)
+    return candidates
+
+
+def _notify(on_result: Optional[ResultCallback], index: int, ad_data: Dict) -> None:
+    # Entrega cada anuncio en cuanto está listo (p. ej. para respuestas en streaming)
+    if on_result is not None:
+        on_result(index, ad_data)
+
+
+def _place_cache_key(href: Optional[str], social_links: List[str]) -> Optional[str]:
+    place = place_key(href)
+    return PlaceCache.key(place, social_links) if place else None
+
+
+def _remember_place(key: Optional[str], ad_data: Dict) -> None:
+    # Solo se guardan los lugares extraídos correctamente
+    if key and ad_data.get("title", "N/A") != "N/A":
+        place_cache.put(key, ad_data)
+
+
+async def scrape_ads(
+    page: Page,
+    context: BrowserContext,
+    social_links: List[str],
+    ads_limit: int = 5,
+    on_result: Optional[ResultCallback] = None,
+    capture: Optional[SearchCapture] = None,
+    known: Optional[Dict[str, Dict]] = None,
+) -> List[Dict]:
+    """Extrae datos de los anuncios en la página.
+
+    Con capture, los anuncios cuyos campos llegaron completos en las respuestas de
+    búsqueda no se abren; del resto se toma de la página solo lo que falte. Los
+    lugares de known (por id) se devuelven tal cual, también sin abrirlos.
+    """
     results = []
     try:
-        ads = await page.query_selector_all(ADS_XPATH)
-        print(f"Cantidad de anuncios encontrados: {len(ads)}")
-        for ad in ads[:ads_limit]:
-            await ad.click()
-            await asyncio.sleep(random.uniform(1, 2))
-            ad_data = await extract_ad_data(page, context, social_links)
+        # Locators en lugar de handles: no retienen nodos del feed en memoria
+        ads = page.locator(ADS_XPATH)
+        total = await ads.count()
+        print(f"Cantidad de anuncios encontrados: {total}")
+        for index in range(min(total, ads_limit)):
+            if expired():
+                print("Plazo agotado, se devuelven los anuncios extraídos")
+                break
+            ad = ads.nth(index)
+            href = await ad.get_attribute("href")
+            if known and place_key(href) in known:
+                results.append(known[place_key(href)])
+                _notify(on_result, index, results[-1])
+                continue
+            key = _place_cache_key(href, social_links)
+            cached = place_cache.get(key) if key else None
+            if cached is not None:
+                cached = {**cached, "status": "cached"}
+                results.append(cached)
+                _notify(on_result, index, cached)
+                continue
+
+            place = capture.get(href) if capture else None
+            # Las redes sociales solo están en el panel del lugar
+            if not social_links and complete(place):
+                ad_data = from_capture(place)
+            else:
+                previous_title = await read_text(page, TITLE_XPATH)
+                await ad.click()
+                # Espera a que el panel muestre el nuevo lugar
+                await wait_for_text_change(page, TITLE_XPATH, previous_title)
+                ad_data = await extract_ad_data(page, context, social_links)
+                if capture:
+                    ad_data = merge_fields(place, ad_data)
+            ad_data["place_id"] = place_key(href) or "N/A"
+            _remember_place(key, ad_data)
             results.append(ad_data)
+            _notify(on_result, index, ad_data)
         if results:
-            await save_results(results, "scraped_data.json")
             return results
         else:
             print("No se obtuvieron resultados.")
@@ -157,59 +335,324 @@ async def scrape_ads(page: Page, context: BrowserContext, social_links:List[str]
         print(f"Error al procesar anuncios: {e}")
 
 
-async def save_results(data: List[Dict], output_file: str) -> None:
-    """Guarda los datos extraídos en un archivo JSON."""
+async def scrape_ads_concurrently(
+    page: Page,
+    context: BrowserContext,
+    social_links: List[str],
+    ads_limit: int = 5,
+    tabs: int = 2,
+    on_result: Optional[ResultCallback] = None,
+    capture: Optional[SearchCapture] = None,
+    known: Optional[Dict[str, Dict]] = None,
+) -> List[Dict]:
+    """Extrae los anuncios abriendo sus URLs en varias pestañas del mismo contexto."""
+    results: List[Optional[Dict]] = []
     try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        print(f"Datos guardados en {output_file}")
+        # href ya resuelto: el atributo puede ser relativo ("/maps/place/...")
+        hrefs = await page.locator(ADS_XPATH).evaluate_all(
+            "anchors => anchors.map(anchor => anchor.href)"
+        )
+        urls = [href for href in hrefs[:ads_limit] if href]
+        print(f"Cantidad de anuncios encontrados: {len(hrefs)}, pestañas: {tabs}")
+
+        results = [None] * len(urls)
+        keys = [_place_cache_key(href, social_links) for href in urls]
+        queue: "asyncio.Queue[int]" = asyncio.Queue()
+        places = [capture.get(href) if capture else None for href in urls]
+        for index, key in enumerate(keys):
+            place = place_key(urls[index])
+            cached = place_cache.get(key) if key else None
+            if known and place in known:
+                results[index] = known[place]
+                _notify(on_result, index, results[index])
+            elif cached is not None:
+                cached = {**cached, "status": "cached"}
+                results[index] = cached
+                _notify(on_result, index, cached)
+            elif not social_links and complete(places[index]):
+                results[index] = from_capture(places[index])
+                results[index]["place_id"] = place_key(urls[index]) or "N/A"
+                _notify(on_result, index, results[index])
+            else:
+                queue.put_nowait(index)
+
+        async def worker() -> None:
+            tab = await context.new_page()
+            try:
+                while not expired():
+                    try:
+                        index = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        await tab.goto(
+                            urls[index], wait_until="domcontentloaded", timeout=budget_ms(30000)
+                        )
+                        await tab.locator(TITLE_XPATH).first.wait_for(timeout=budget_ms(10000))
+                        results[index] = await extract_ad_data(tab, context, social_links)
+                        if capture:
+                            results[index] = merge_fields(places[index], results[index])
+                        results[index]["place_id"] = place_key(urls[index]) or "N/A"
+                        _remember_place(keys[index], results[index])
+                    except Exception as e:
+                        print(f"Error al abrir el anuncio {urls[index]}: {e}")
+                        results[index] = {"title": "N/A", "phone": "N/A", "address": "N/A"}
+                    _notify(on_result, index, results[index])
+            finally:
+                await tab.close()
+
+        await asyncio.gather(*(worker() for _ in range(min(tabs, queue.qsize()))))
+
+        # Los anuncios sin extraer (plazo agotado) se quedan en None
+        results = [result for result in results if result is not None]
+        if results:
+            return results
+        else:
+            print("No se obtuvieron resultados.")
+            return []
+    except Exception as e:
+        print(f"Error al procesar anuncios: {e}")
+        return [result for result in results if result is not None]
+
+
+async def scrape_listing(
+    page: Page,
+    ads_limit: int = 5,
+    on_result: Optional[ResultCallback] = None,
+    capture: Optional[SearchCapture] = None,
+) -> List[Dict]:
+    """Extrae los datos de las tarjetas del feed sin abrir cada anuncio."""
+    try:
+        results = await extract_listing_cards(page, ads_limit)
+        print(f"Tarjetas extraídas del listado: {len(results)}")
+        if capture:
+            results = [
+                merge_fields(capture.get(card.get("url")), card, CARD_KEYS) for card in results
+            ]
+        for index, card in enumerate(results):
+            card["place_id"] = place_key(card.get("url")) or "N/A"
+            _notify(on_result, index, card)
+        if not results:
+            print("No se obtuvieron resultados.")
+        return results
+    except Exception as e:
+        print(f"Error al procesar el listado: {e}")
+        return []
+
+
+def save_results(data: List[Dict], service: str, location: str) -> None:
+    """Entrega los datos extraídos al sink configurado sin bloquear el bucle de eventos."""
+    sink = get_sink()
+    if not sink.enabled:
+        return
+    try:
+        sink.write(
+            {
+                "request_id": uuid.uuid4().hex,
+                "service": service,
+                "location": location,
+                "created_at": time.time(),
+                "results": data,
+            }
+        )
     except Exception as e:
         print(f"Error al guardar los datos: {e}")
 
 
-async def scrape_page(service: str, location: str,ads_limit: str, social_links: List[str]) -> Optional[List[Dict]]:
-    """Orquesta el proceso de scraping para una página dada."""
-    async with async_playwright() as playwright:
-        try:
-            browser = await playwright.chromium.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
+class ScrapeResults(list):
+    """Anuncios extraídos; partial indica que el scraping no llegó a terminar.
 
-            await search_page(page, service, location)
-            await scroll_to_element(page, ADS_CONTAINER_XPATH, ads_limit)
-            results = await scrape_ads(page, context,social_links, ads_limit)
+    cards es el número de tarjetas que llegó a cargar el feed (None si no se sabe).
+    """
 
-            await page.close()
-            await context.close()
-            await browser.close()
-            return results
-        except Exception as e:
-            print(f"Error en el proceso de scraping: {e}")
-            return None
+    def __init__(self, items=(), partial: bool = False, cards: Optional[int] = None) -> None:
+        super().__init__(items)
+        self.partial = partial
+        self.cards = cards
 
 
-async def scroll_to_element(page: Page, selector: str,ads_limit:int=0) -> None:
-    """Desplaza un contenedor hasta cargar todo el contenido dinámico."""
-    try:
-        await page.wait_for_selector(selector, timeout=10000)
-        element = await page.query_selector(selector)
+def _ad_status(data: Dict) -> str:
+    if data.get("status"):
+        return data["status"]
+    return "error" if data.get("title", "N/A") in ("N/A", None) else "ok"
 
-        last_height = 0
 
-        while True:
-            await page.evaluate("el => el.scrollTop = el.scrollHeight", element)
-            await asyncio.sleep(random.uniform(1,2))  # Espera carga de contenido dinámico
-            new_height = await page.evaluate("el => el.scrollHeight", element)
+async def _run_scrape(
+    pool: Optional[BrowserPool],
+    service: str,
+    location: str,
+    ads_limit: int,
+    social_links: List[str],
+    **options,
+) -> Optional[List[Dict]]:
+    if pool is not None:
+        start = time.perf_counter()
+        async with pool.lease() as context:
+            observe_phase("acquire", time.perf_counter() - start)
+            return await scrape_with_context(
+                context, service, location, ads_limit, social_links, **options
+            )
 
-            ads_quantity = await page.query_selector_all(ADS_XPATH)
+    async with async_playwright() as playwright:
+        with phase("acquire"):
+            browser = await playwright.chromium.launch(headless=True)
+            context = await new_context(browser)
+        results = await scrape_with_context(
+            context, service, location, ads_limit, social_links, **options
+        )
+        await context.close()
+        await browser.close()
+        return results
+
+
+async def scrape_page(
+    service: str,
+    location: str,
+    ads_limit: int,
+    social_links: List[str],
+    pool: Optional[BrowserPool] = None,
+    tabs: int = 1,
+    pacing: Optional[PacingPolicy] = None,
+    blocking: BlockingConfig = DEFAULT_BLOCKING,
+    on_result: Optional[ResultCallback] = None,
+    mode: str = "detail",
+    base_url: Optional[str] = None,
+    viewport: Optional[Viewport] = None,
+    timeout_ms: Optional[int] = None,
+    source: str = EXTRACTION_SOURCE,
+    incremental: bool = False,
+    scan_limit: int = 0,
+) -> Optional[List[Dict]]:
+    """Orquesta el proceso de scraping para una página dada.
+
+    Con timeout_ms todas las fases heredan el plazo. Si se agota, o si falla algo
+    después de haber extraído anuncios, se devuelven los ya extraídos con
+    partial=True. Cada anuncio lleva su estado ("ok", "cached" o "error").
+    source elige de dónde salen los campos: "dom" o "xhr" (ver scrape_with_context).
+    Con incremental (modo detalle) solo se abren los lugares nuevos o cuya tarjeta
+    cambió, y cada anuncio lleva "change": "new", "changed" o "unchanged".
+    Con scan_limit el feed se desplaza hasta esa cantidad de tarjetas aunque solo
+    se extraigan ads_limit; el resultado indica en cards cuántas se cargaron.
+    """
+    collected: Dict[int, Dict] = {}
+    feed: Dict = {}
+
+    def record(index: int, data: Dict) -> None:
+        data = {**data, "status": _ad_status(data)}
+        collected[index] = data
+        _notify(on_result, index, data)
+
+    def gathered(partial: bool) -> ScrapeResults:
+        return ScrapeResults(
+            (collected[index] for index in sorted(collected)), partial, feed.get("count")
+        )
+
+    options = {
+        "base_url": base_url,
+        "viewport": viewport,
+        "mode": mode,
+        "source": source,
+        "incremental": incremental,
+        "tabs": tabs,
+        "blocking": blocking,
+        "on_result": record,
+        "scan_limit": scan_limit,
+        "feed": feed,
+    }
+    with use_policy(pacing), use_deadline(timeout_ms), track_scrape():
+        try:
+            results = await within(
+                _run_scrape(pool, service, location, ads_limit, social_links, **options)
+            )
+        except DeadlineExceeded:
+            PHASE_ERRORS.inc(phase="deadline")
+            print(f"Plazo agotado tras {len(collected)} anuncios")
+            return gathered(partial=True)
+        except Exception as e:
+            PHASE_ERRORS.inc(phase="scrape")
+            print(f"Error en el proceso de scraping: {e}")
+            return gathered(partial=True) if collected else None
+        if results is None and not collected:
+            return None
+        return gathered(partial=results is None or expired())
+
+
+async def scrape_with_context(
+    context: BrowserContext,
+    service: str,
+    location: str,
+    ads_limit: int,
+    social_links: List[str],
+    tabs: int = 1,
+    blocking: BlockingConfig = DEFAULT_BLOCKING,
+    on_result: Optional[ResultCallback] = None,
+    mode: str = "detail",
+    base_url: Optional[str] = None,
+    viewport: Optional[Viewport] = None,
+    source: str = "dom",
+    incremental: bool = False,
+    scan_limit: int = 0,
+    feed: Optional[Dict] = None,
+) -> Optional[List[Dict]]:
+    """Ejecuta la búsqueda, el desplazamiento y la extracción en un contexto dado.
+
+    Con source="xhr" se escuchan las respuestas internas de búsqueda que Maps pide
+    al cargar y desplazar el feed, y sus campos sustituyen a los de la página; la
+    página solo se consulta para los campos que no se pudieron leer. Si se pasa
+    feed, se guarda en él el resultado del desplazamiento (tarjetas cargadas).
+    """
+    await apply_blocking(context, blocking)
+    page = await context.new_page()
+    capture = SearchCapture(page) if source == "xhr" else None
+    if capture:
+        capture.attach()
+    try:
+        with phase("search"):
+            await search_page(page, service, location, base_url, viewport)
+        try:
+            with phase("scroll"):
+                outcome = await scroll_feed(page, max(ads_limit, scan_limit))
+            if feed is not None:
+                feed.update(outcome)
+        except Exception as e:
+            print(f"Error al desplazar el feed: {e}")
+        if capture:
+            with phase("xhr"):
+                await capture.settle()
+        refresh = known = None
+        if incremental and mode == "detail":
+            # Las tarjetas (una evaluación) deciden qué lugares hay que volver a abrir
+            with phase("fingerprint"):
+                refresh = IncrementalRefresh(get_snapshots(), social_links, on_result)
+                known = await refresh.plan(await extract_listing_cards(page, ads_limit))
+            on_result = refresh.record
+        if mode == "listing":
+            results = await scrape_listing(page, ads_limit, on_result, capture)
+        elif tabs > 1:
+            results = await scrape_ads_concurrently(
+                page, context, social_links, ads_limit, tabs, on_result, capture, known
+            )
+        else:
+            results = await scrape_ads(
+                page, context, social_links, ads_limit, on_result, capture, known
+            )
+        if refresh is not None:
+            await refresh.save()
+        if results:
+            with phase("save"):
+                save_results(results, service, location)
+        return results
+    finally:
+        await page.close()
 
-            if len(ads_quantity) >= ads_limit:
-                break
-            if new_height == last_height:
-                break
-            last_height = new_height
-       
 
+async def scroll_to_element(page: Page, selector: str) -> None:
+    """Desplaza el panel del lugar hasta el final para que cargue su contenido (p. ej. el iframe)."""
+    try:
+        modal = page.locator(selector).first
+        await modal.wait_for(timeout=budget_ms(10000))
+        # Una sola ida y vuelta: el panel de detalle no tiene carga por páginas
+        await modal.evaluate("el => el.scrollTop = el.scrollHeight")
     except Exception as e:
         print(f"Error al desplazar al elemento: {e}")
 
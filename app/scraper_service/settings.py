@@ -0,0 +1,106 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Pool de navegadores compartido entre peticiones
+BROWSER_POOL_SIZE = _env_int("BROWSER_POOL_SIZE", 2)
+BROWSER_MAX_USES = _env_int("BROWSER_MAX_USES", 50)
+BROWSER_HEADLESS = _env_bool("BROWSER_HEADLESS", True)
+
+# Política de espera por defecto ("fast", "polite") y timeout de las señales
+PACING_DEFAULT_POLICY = os.getenv("PACING_DEFAULT_POLICY", "polite")
+PACING_SIGNAL_TIMEOUT_MS = _env_int("PACING_SIGNAL_TIMEOUT_MS", 3000)
+
+# Bloqueo de recursos (tipos de Playwright separados por comas, "" para desactivar)
+BLOCKED_RESOURCE_TYPES = os.getenv("BLOCKED_RESOURCE_TYPES", "image,font,media")
+BLOCKED_URL_PATTERNS = os.getenv("BLOCKED_URL_PATTERNS", "")
+
+# Caché de resultados por consulta (ruta SQLite vacía = solo memoria)
+CACHE_TTL_SECONDS = _env_int("CACHE_TTL_SECONDS", 3600)
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 256)
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "")
+
+# Caché de detalles por lugar (clave: identificador de Google del lugar)
+PLACE_CACHE_TTL_SECONDS = _env_int("PLACE_CACHE_TTL_SECONDS", 86400)
+PLACE_CACHE_MAX_ENTRIES = _env_int("PLACE_CACHE_MAX_ENTRIES", 5000)
+
+# Cola de trabajos asíncronos
+JOB_WORKERS = _env_int("JOB_WORKERS", 2)
+JOB_QUEUE_SIZE = _env_int("JOB_QUEUE_SIZE", 100)
+JOB_RETENTION = _env_int("JOB_RETENTION", 500)
+
+# Motor de extracción del detalle: "script" (una evaluación) o "handles" (una llamada por campo)
+EXTRACTION_ENGINE = os.getenv("EXTRACTION_ENGINE", "script")
+# Origen de los datos por defecto: "dom" (la página) o "xhr" (respuestas internas de
+# búsqueda de Maps, con la página como respaldo por campo); directorio donde guardar
+# esas respuestas para reproducirlas en el servidor de pruebas
+EXTRACTION_SOURCE = os.getenv("EXTRACTION_SOURCE", "dom")
+XHR_RECORD_DIR = os.getenv("XHR_RECORD_DIR", "")
+
+# Refresco incremental: instantánea por lugar (huella de su tarjeta y último detalle)
+# y antigüedad máxima de un detalle antes de extraerlo de nuevo aunque no cambie
+SNAPSHOT_SQLITE_PATH = os.getenv("SNAPSHOT_SQLITE_PATH", "place_snapshots.sqlite")
+SNAPSHOT_MAX_AGE_SECONDS = _env_int("SNAPSHOT_MAX_AGE_SECONDS", 7 * 86400)
+
+# Persistencia de resultados: "jsonl", "files", "sqlite" o "none" para no guardarlos
+RESULT_SINK = os.getenv("RESULT_SINK", "jsonl")
+RESULT_SINK_PATH = os.getenv("RESULT_SINK_PATH", "scraped_data")
+RESULT_SINK_BATCH_SIZE = _env_int("RESULT_SINK_BATCH_SIZE", 50)
+RESULT_SINK_FLUSH_SECONDS = float(os.getenv("RESULT_SINK_FLUSH_SECONDS", "1.0"))
+# Cuándo hacer fsync: "never", "batch" (tras cada lote) o "always" (tras cada registro)
+RESULT_SINK_FSYNC = os.getenv("RESULT_SINK_FSYNC", "batch")
+
+# URL de entrada de Google Maps; permite apuntar a un servidor local de pruebas
+MAPS_BASE_URL = os.getenv("MAPS_BASE_URL", "")
+# "direct" abre /maps/search/<servicio ubicación>; "searchbox" escribe en la caja de búsqueda
+SEARCH_NAVIGATION = os.getenv("SEARCH_NAVIGATION", "direct")
+
+# Estado del navegador (cookies y localStorage tras aceptar el consentimiento)
+STORAGE_STATE_ENABLED = _env_bool("STORAGE_STATE_ENABLED", True)
+STORAGE_STATE_PATH = os.getenv("STORAGE_STATE_PATH", "storage_state.json")
+STORAGE_STATE_TTL_SECONDS = _env_int("STORAGE_STATE_TTL_SECONDS", 6 * 3600)
+
+# Vigilancia de recursos de cada pool: cada cuánto se revisa (0 = desactivada), RSS
+# máximo de un navegador con sus renderers y de todo el proceso (con el driver de
+# Playwright y Chromium), páginas abiertas por navegador y handles vivos (solo avisa)
+WATCHDOG_CHECK_SECONDS = _env_int("WATCHDOG_CHECK_SECONDS", 30)
+WATCHDOG_BROWSER_MAX_RSS_MB = _env_int("WATCHDOG_BROWSER_MAX_RSS_MB", 1024)
+WATCHDOG_MAX_RSS_MB = _env_int("WATCHDOG_MAX_RSS_MB", 0)
+WATCHDOG_MAX_PAGES = _env_int("WATCHDOG_MAX_PAGES", 20)
+WATCHDOG_MAX_HANDLES = _env_int("WATCHDOG_MAX_HANDLES", 1000)
+
+# Procesos scraper (0 = todo en el proceso de la API)
+SCRAPER_WORKERS = _env_int("SCRAPER_WORKERS", 0)
+WORKER_MAX_RSS_MB = _env_int("WORKER_MAX_RSS_MB", 2048)
+WORKER_CHECK_SECONDS = _env_int("WORKER_CHECK_SECONDS", 5)
+WORKER_DRAIN_SECONDS = _env_int("WORKER_DRAIN_SECONDS", 300)
+
+# Búsqueda por cuadrícula: casillas por lado, niveles de subdivisión, búsquedas
+# simultáneas, tarjetas pedidas por casilla y a partir de cuántas se subdivide
+TILE_GRID = _env_int("TILE_GRID", 2)
+TILE_MAX_DEPTH = _env_int("TILE_MAX_DEPTH", 3)
+TILE_CONCURRENCY = _env_int("TILE_CONCURRENCY", BROWSER_POOL_SIZE)
+TILE_RESULT_CAP = _env_int("TILE_RESULT_CAP", 120)
+TILE_SATURATION = _env_int("TILE_SATURATION", 100)
+
+# Control de admisión: sesiones de navegador simultáneas, cola de espera acotada
+# (total y por cliente) y espera máxima antes de responder 429
+ADMISSION_MAX_SESSIONS = _env_int(
+    "ADMISSION_MAX_SESSIONS", BROWSER_POOL_SIZE * max(1, SCRAPER_WORKERS)
+)
+ADMISSION_MAX_QUEUE = _env_int("ADMISSION_MAX_QUEUE", 20)
+ADMISSION_MAX_QUEUE_PER_CLIENT = _env_int("ADMISSION_MAX_QUEUE_PER_CLIENT", 5)
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
@@ -0,0 +1,248 @@
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+from .settings import (
+    RESULT_SINK,
+    RESULT_SINK_BATCH_SIZE,
+    RESULT_SINK_FLUSH_SECONDS,
+    RESULT_SINK_FSYNC,
+    RESULT_SINK_PATH,
+)
+
+FSYNC_POLICIES = ("never", "batch", "always")
+
+
+class ResultSink:
+    """Destino de los resultados; la implementación base no guarda nada."""
+
+    enabled = False
+
+    async def start(self) -> None:
+        pass
+
+    def write(self, record: Dict) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class NullSink(ResultSink):
+    """Persistencia desactivada: no cuesta nada en el camino de la petición."""
+
+
+class BackgroundSink(ResultSink, abc.ABC):
+    """Encola los registros y los escribe por lotes en un hilo, fuera del bucle de eventos."""
+
+    enabled = True
+
+    def __init__(
+        self,
+        batch_size: int = RESULT_SINK_BATCH_SIZE,
+        flush_seconds: float = RESULT_SINK_FLUSH_SECONDS,
+        fsync: str = RESULT_SINK_FSYNC,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync desconocida: {fsync}")
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self._queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.errors = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            await asyncio.to_thread(self.open)
+            self._task = asyncio.create_task(self._run())
+
+    def write(self, record: Dict) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._start_and_run())
+        self._queue.put_nowait(record)
+
+    async def close(self) -> None:
+        """Vacía la cola pendiente y cierra el destino."""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+        await asyncio.to_thread(self.release)
+
+    async def _start_and_run(self) -> None:
+        await asyncio.to_thread(self.open)
+        await self._run()
+
+    async def _run(self) -> None:
+        closing = False
+        while not closing:
+            record = await self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    closing = True
+                    break
+                batch.append(record)
+            try:
+                await asyncio.to_thread(self.write_batch, batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error al guardar los datos: {e}")
+
+    # Las siguientes se ejecutan en un hilo aparte
+    def open(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def write_batch(self, batch: List[Dict]) -> None:
+        """Escribe un lote de registros en el destino."""
+
+    def release(self) -> None:
+        pass
+
+
+def _fsync(handle) -> None:
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+class JsonlSink(BackgroundSink):
+    """Añade cada petición como una línea JSON a un único fichero."""
+
+    def __init__(self, path: str, **options) -> None:
+        super().__init__(**options)
+        self.path = path if path.endswith(".jsonl") else f"{path}.jsonl"
+        self._file = None
+
+    def open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write_batch(self, batch: List[Dict]) -> None:
+        for record in batch:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if self.fsync == "always":
+                _fsync(self._file)
+        if self.fsync == "batch":
+            _fsync(self._file)
+        else:
+            self._file.flush()
+
+    def release(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FileSink(BackgroundSink):
+    """Guarda cada petición en su propio fichero JSON dentro de un directorio."""
+
+    def __init__(self, directory: str, **options) -> None:
+        super().__init__(**options)
+        self.directory = directory
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write_batch(self, batch: List[Dict]) -> None:
+        for record in batch:
+            path = os.path.join(self.directory, f"{record['request_id']}.json")
+            temporary = f"{path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=4, ensure_ascii=False)
+                if self.fsync != "never":
+                    _fsync(f)
+            # Renombrado atómico: nunca queda un fichero a medio escribir
+            os.replace(temporary, path)
+
+
+class SqliteSink(BackgroundSink):
+    """Guarda cada petición como una fila en una base de datos SQLite."""
+
+    def __init__(self, path: str, **options) -> None:
+        super().__init__(**options)
+        self.path = path if path.endswith(".db") else f"{path}.db"
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        synchronous = "OFF" if self.fsync == "never" else "FULL"
+        self._db.execute(f"PRAGMA synchronous = {synchronous}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scrapes ("
+            "request_id TEXT PRIMARY KEY, service TEXT, location TEXT, "
+            "created_at REAL, results TEXT)"
+        )
+        self._db.commit()
+
+    def write_batch(self, batch: List[Dict]) -> None:
+        rows = [
+            (
+                record["request_id"],
+                record["service"],
+                record["location"],
+                record["created_at"],
+                json.dumps(record["results"], ensure_ascii=False),
+            )
+            for record in batch
+        ]
+        if self.fsync == "always":
+            for row in rows:
+                self._db.execute("INSERT OR REPLACE INTO scrapes VALUES (?, ?, ?, ?, ?)", row)
+                self._db.commit()
+        else:
+            self._db.executemany("INSERT OR REPLACE INTO scrapes VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def release(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def create_sink(kind: str = RESULT_SINK, path: str = RESULT_SINK_PATH) -> ResultSink:
+    """Crea el sink configurado ("none", "jsonl", "files" o "sqlite")."""
+    if kind == "none":
+        return NullSink()
+    if kind == "jsonl":
+        return JsonlSink(path)
+    if kind == "files":
+        return FileSink(path)
+    if kind == "sqlite":
+        return SqliteSink(path)
+    raise ValueError(f"Sink de resultados desconocido: {kind}")
+
+
+_sink: Optional[ResultSink] = None
+
+
+def get_sink() -> ResultSink:
+    global _sink
+    if _sink is None:
+        _sink = create_sink()
+    return _sink
+
+
+def set_sink(sink: ResultSink) -> None:
+    global _sink
+    _sink = sink
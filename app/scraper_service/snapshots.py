@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import PlaceCache, _normalize, place_cache, place_key
+from .settings import SNAPSHOT_MAX_AGE_SECONDS, SNAPSHOT_SQLITE_PATH
+
+# Campos de la tarjeta del listado que forman la huella de un lugar
+FINGERPRINT_FIELDS = ("title", "rating", "reviews", "short_address")
+# Campos del resultado que no forman parte del detalle guardado
+VOLATILE_FIELDS = ("status", "change")
+
+SNAPSHOT_STATS = {"new": 0, "changed": 0, "unchanged": 0, "details_skipped": 0}
+
+
+def fingerprint(card: Dict) -> str:
+    values = [_normalize(str(card.get(name) or "")) for name in FINGERPRINT_FIELDS]
+    return hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()
+
+
+def _detail(data: Dict) -> Dict:
+    return {name: value for name, value in data.items() if name not in VOLATILE_FIELDS}
+
+
+class Snapshot:
+    def __init__(self, fingerprint: str, data: Dict, updated_at: float) -> None:
+        self.fingerprint = fingerprint
+        self.data = data
+        self.updated_at = updated_at
+
+
+class SnapshotStore:
+    """Último detalle extraído de cada lugar junto a la huella de su tarjeta (SQLite)."""
+
+    def __init__(
+        self, path: str = SNAPSHOT_SQLITE_PATH, max_age: float = SNAPSHOT_MAX_AGE_SECONDS
+    ) -> None:
+        self.max_age = max_age
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "key TEXT PRIMARY KEY, fingerprint TEXT, data TEXT, updated_at REAL)"
+        )
+        self._db.commit()
+        self._lock = asyncio.Lock()
+
+    async def _call(self, func, *args):
+        # Igual que la caché de resultados: fuera del bucle de eventos y de una en una
+        async with self._lock:
+            return await asyncio.to_thread(func, *args)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Snapshot]:
+        return await self._call(self._get_many, list(keys))
+
+    async def put_many(self, entries: List[Tuple[str, str, Dict]]) -> None:
+        if entries:
+            await self._call(self._put_many, entries)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, Snapshot]:
+        found = {}
+        # Por tandas: SQLite limita el número de parámetros de una consulta
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = self._db.execute(
+                "SELECT key, fingerprint, data, updated_at FROM snapshots "
+                f"WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, digest, data, updated_at in rows:
+                found[key] = Snapshot(digest, json.loads(data), updated_at)
+        return found
+
+    def _put_many(self, entries: List[Tuple[str, str, Dict]]) -> None:
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+            [
+                (key, digest, json.dumps(data, ensure_ascii=False), now)
+                for key, digest, data in entries
+            ],
+        )
+        self._db.commit()
+
+
+class IncrementalRefresh:
+    """Decide qué lugares de una búsqueda necesitan el detalle y marca cada resultado.
+
+    Con las tarjetas del listado se calcula la huella de cada lugar. Si coincide con
+    la guardada (y el detalle no es más antiguo que max_age) el lugar se devuelve
+    desde la instantánea como "unchanged" sin abrirlo; los demás se extraen y se
+    marcan "new" o "changed", y su detalle sustituye a la instantánea.
+    """
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        social_links: List[str],
+        on_result: Optional[Callable[[int, Dict], None]] = None,
+    ) -> None:
+        self.store = store
+        self.social_links = social_links
+        self.on_result = on_result
+        # Por lugar: (clave de la instantánea, huella actual, instantánea anterior)
+        self._places: Dict[str, Tuple[str, str, Optional[Snapshot]]] = {}
+        self._reused: set = set()
+        self._pending: List[Tuple[str, str, Dict]] = []
+
+    async def plan(self, cards: List[Dict]) -> Dict[str, Dict]:
+        """Devuelve los lugares sin cambios (por id) con su detalle anterior."""
+        for card in cards:
+            place = place_key(card.get("url"))
+            if place:
+                self._places[place] = (
+                    PlaceCache.key(place, self.social_links),
+                    fingerprint(card),
+                    None,
+                )
+        snapshots = await self.store.get_many(key for key, _, _ in self._places.values())
+        known = {}
+        now = time.time()
+        for place, (key, digest, _) in self._places.items():
+            snapshot = snapshots.get(key)
+            self._places[place] = (key, digest, snapshot)
+            if (
+                snapshot is not None
+                and snapshot.fingerprint == digest
+                and now - snapshot.updated_at <= self.store.max_age
+            ):
+                known[place] = {**snapshot.data, "status": "cached"}
+                self._reused.add(place)
+                SNAPSHOT_STATS["details_skipped"] += 1
+            else:
+                # La caché de detalles podría devolver el lugar tal y como estaba
+                place_cache.discard(key)
+        return known
+
+    def _change(self, entry: Optional[Tuple[str, str, Optional[Snapshot]]], data: Dict) -> str:
+        if entry is None or entry[2] is None:
+            return "new"
+        _, digest, snapshot = entry
+        if snapshot.fingerprint != digest:
+            return "changed"
+        # Misma tarjeta, extraído de nuevo porque la instantánea era demasiado antigua
+        return "unchanged" if _detail(snapshot.data) == _detail(data) else "changed"
+
+    def record(self, index: int, data: Dict) -> None:
+        """Callback de resultados: añade "change" y apunta el detalle para guardarlo."""
+        place = data.get("place_id")
+        entry = self._places.get(place) if place else None
+        if place in self._reused:
+            change = "unchanged"
+        else:
+            change = self._change(entry, data)
+            if entry is not None and data.get("title", "N/A") not in ("N/A", None):
+                self._pending.append((entry[0], entry[1], _detail(data)))
+        SNAPSHOT_STATS[change] += 1
+        data = {**data, "change": change}
+        if self.on_result is not None:
+            self.on_result(index, data)
+
+    async def save(self) -> None:
+        pending, self._pending = self._pending, []
+        await self.store.put_many(pending)
+
+
+_store: Optional[SnapshotStore] = None
+
+
+def get_snapshots() -> SnapshotStore:
+    """Almacén compartido del proceso; se abre con el primer refresco incremental."""
+    global _store
+    if _store is None:
+        _store = SnapshotStore()
+    return _store
+
+
+def close_snapshots() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def snapshot_stats() -> Dict[str, int]:
+    return dict(SNAPSHOT_STATS)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from playwright.async_api import Browser, Page
+
+from .settings import (
+    MAPS_BASE_URL,
+    STORAGE_STATE_ENABLED,
+    STORAGE_STATE_PATH,
+    STORAGE_STATE_TTL_SECONDS,
+)
+from .utils.XPATHs.config import MAPS_ROOT
+
+# Botón de aceptar en la página de consentimiento de Google (varios idiomas)
+CONSENT_BUTTONS = (
+    "form[action*='consent'] button[aria-label*='Accept']",
+    "form[action*='consent'] button[aria-label*='Aceptar']",
+    "button:has-text('Accept all')",
+    "button:has-text('Aceptar todo')",
+)
+
+STORAGE_STATS = {"refreshes": 0, "failures": 0, "consent_accepted": 0, "reused": 0}
+
+# Contextos temporales abiertos para renovar el estado; no son huérfanos
+_refreshing: set = set()
+
+
+def is_consent_page(page: Page) -> bool:
+    return "consent." in page.url
+
+
+async def accept_consent(page: Page) -> bool:
+    """Acepta el interstitial de consentimiento si la página está en él."""
+    if not is_consent_page(page):
+        return False
+    for selector in CONSENT_BUTTONS:
+        button = page.locator(selector).first
+        if await button.count():
+            async with page.expect_navigation(wait_until="domcontentloaded"):
+                await button.click()
+            STORAGE_STATS["consent_accepted"] += 1
+            return True
+    return False
+
+
+class StorageStateStore:
+    """Estado de navegador ya calentado que se reutiliza en cada contexto nuevo.
+
+    Se construye una vez abriendo Maps y aceptando el consentimiento, se guarda en
+    un JSON y se renueva cuando supera el TTL o caduca alguna de sus cookies.
+    """
+
+    def __init__(
+        self, path: str = STORAGE_STATE_PATH, ttl: int = STORAGE_STATE_TTL_SECONDS
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.state: Optional[Dict] = None
+        self.created_at = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.state = json.load(f)
+            self.created_at = os.path.getmtime(self.path)
+        except (OSError, ValueError) as e:
+            print(f"No se pudo leer el estado del navegador: {e}")
+            self.state = None
+
+    def _save(self) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.path)
+
+    @property
+    def expires_at(self) -> float:
+        expiry = self.created_at + self.ttl
+        for cookie in (self.state or {}).get("cookies", []):
+            # expires -1 = cookie de sesión
+            if cookie.get("expires", -1) > 0:
+                expiry = min(expiry, cookie["expires"])
+        return expiry
+
+    @property
+    def valid(self) -> bool:
+        return self.state is not None and time.time() < self.expires_at
+
+    def invalidate(self) -> None:
+        self.state = None
+
+    async def get(self, browser: Browser) -> Optional[Dict]:
+        """Estado vigente, renovándolo con ese navegador si hace falta."""
+        if self.valid:
+            STORAGE_STATS["reused"] += 1
+            return self.state
+        if time.time() < self._retry_at:
+            return None
+        async with self._lock:
+            if not self.valid and time.time() >= self._retry_at:
+                await self.refresh(browser)
+            return self.state
+
+    async def refresh(self, browser: Browser) -> None:
+        context = await browser.new_context()
+        _refreshing.add(context)
+        try:
+            page = await context.new_page()
+            await page.goto(MAPS_BASE_URL or MAPS_ROOT, wait_until="domcontentloaded")
+            await accept_consent(page)
+            await page.wait_for_selector("#searchboxinput", timeout=15000)
+            self.state = await context.storage_state()
+            self.created_at = time.time()
+            STORAGE_STATS["refreshes"] += 1
+            if self.path:
+                await asyncio.to_thread(self._save)
+        except Exception as e:
+            # Sin estado se sigue funcionando, solo con más cargas de página
+            STORAGE_STATS["failures"] += 1
+            print(f"Error al calentar el estado del navegador: {e}")
+            self.state = None
+            self._retry_at = time.time() + 60
+        finally:
+            _refreshing.discard(context)
+            await context.close()
+
+
+def refreshing_contexts() -> set:
+    """Contextos que está usando ahora una renovación del estado."""
+    return set(_refreshing)
+
+
+_store: Optional[StorageStateStore] = None
+
+
+def get_storage_state() -> Optional[StorageStateStore]:
+    """Almacén compartido del proceso, o None si está desactivado."""
+    global _store
+    if not STORAGE_STATE_ENABLED:
+        return None
+    if _store is None:
+        _store = StorageStateStore()
+    return _store
+
+
+async def new_context(browser: Browser, storage_state: bool = True):
+    """Contexto nuevo con el estado calentado, si lo hay.
+
+    Con storage_state=False no se usa ni se calienta el estado (el calentamiento
+    abre Maps real, p. ej. cuando solo se va a visitar el servidor de pruebas).
+    """
+    store = get_storage_state() if storage_state else None
+    state = await store.get(browser) if store is not None else None
+    return await browser.new_context(storage_state=state)
+
+
+def storage_stats() -> Dict[str, object]:
+    store = get_storage_state()
+    return {
+        **STORAGE_STATS,
+        "enabled": store is not None,
+        "valid": bool(store and store.valid),
+        "expires_at": store.expires_at if store and store.state else None,
+    }
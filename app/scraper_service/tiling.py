@@ -0,0 +1,271 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .cache import place_key
+from .deadline import expired, remaining, use_deadline
+from .settings import (
+    TILE_CONCURRENCY,
+    TILE_GRID,
+    TILE_MAX_DEPTH,
+    TILE_RESULT_CAP,
+    TILE_SATURATION,
+)
+
+# Una búsqueda de Maps deja de dar tarjetas nuevas hacia los ~120 resultados.
+# Para zonas grandes se divide el área en una cuadrícula de búsquedas limitadas
+# a cada casilla y solo se subdividen las casillas que llegan al tope.
+
+EARTH_RADIUS_KM = 6371.0
+# Tamaño aproximado en píxeles del mapa que acompaña al feed
+VIEWPORT_WIDTH_PX = 1000
+VIEWPORT_HEIGHT_PX = 750
+
+BBox = Tuple[float, float, float, float]  # (sur, oeste, norte, este)
+
+
+class Tile:
+    """Casilla de la cuadrícula con su resultado."""
+
+    def __init__(self, bbox: BBox, tile_id: str, depth: int = 0) -> None:
+        self.bbox = bbox
+        self.id = tile_id
+        self.depth = depth
+        self.count = 0
+        self.new = 0
+        self.seconds = 0.0
+        self.status = "pending"
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        south, west, north, east = self.bbox
+        return (south + north) / 2, (west + east) / 2
+
+    @property
+    def zoom(self) -> float:
+        # Mayor zoom con el que la casilla entera cabe en el mapa visible
+        south, west, north, east = self.bbox
+        # En Mercator un grado de latitud ocupa 1/cos(lat) veces más que uno de longitud
+        stretch = 1 / max(math.cos(math.radians((south + north) / 2)), 1e-6)
+        span = max(
+            (east - west) / VIEWPORT_WIDTH_PX,
+            (north - south) * stretch / VIEWPORT_HEIGHT_PX,
+            1e-9,
+        )
+        zoom = math.log2(360 / (256 * span))
+        return round(min(21.0, max(3.0, zoom)), 2)
+
+    @property
+    def area_km2(self) -> float:
+        south, west, north, east = self.bbox
+        height = math.radians(north - south) * EARTH_RADIUS_KM
+        width = math.radians(east - west) * EARTH_RADIUS_KM * math.cos(math.radians((south + north) / 2))
+        return abs(height * width)
+
+    def split(self, grid: int = 2) -> List["Tile"]:
+        return [
+            Tile(bbox, f"{self.id}.{index}", self.depth + 1)
+            for index, bbox in enumerate(grid_bboxes(self.bbox, grid))
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "bbox": list(self.bbox),
+            "depth": self.depth,
+            "zoom": self.zoom,
+            "status": self.status,
+            "count": self.count,
+            "new": self.new,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def grid_bboxes(bbox: BBox, grid: int) -> List[BBox]:
+    south, west, north, east = bbox
+    lat_step = (north - south) / grid
+    lng_step = (east - west) / grid
+    return [
+        (
+            south + row * lat_step,
+            west + col * lng_step,
+            south + (row + 1) * lat_step,
+            west + (col + 1) * lng_step,
+        )
+        for row in range(grid)
+        for col in range(grid)
+    ]
+
+
+def parse_bbox(value: str) -> BBox:
+    """Lee "sur,oeste,norte,este" en grados."""
+    try:
+        south, west, north, east = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox debe ser 'sur,oeste,norte,este'")
+    if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+        raise ValueError("bbox fuera de rango o con los lados invertidos")
+    return south, west, north, east
+
+
+def bbox_around(center: str, radius_km: float) -> BBox:
+    """Caja que contiene el círculo de radius_km alrededor de "lat,lng"."""
+    try:
+        lat, lng = (float(part) for part in center.split(","))
+    except ValueError:
+        raise ValueError("center debe ser 'lat,lng'")
+    if radius_km <= 0:
+        raise ValueError("radius_km debe ser mayor que 0")
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lng_delta = lat_delta / max(math.cos(math.radians(lat)), 1e-6)
+    return parse_bbox(
+        f"{lat - lat_delta},{max(-180.0, lng - lng_delta)},"
+        f"{lat + lat_delta},{min(180.0, lng + lng_delta)}"
+    )
+
+
+def _dedupe_key(data: Dict) -> Optional[str]:
+    place = data.get("place_id")
+    if place and place != "N/A":
+        return place
+    place = place_key(data.get("url"))
+    if place:
+        return place
+    title = data.get("title", "N/A")
+    if title == "N/A":
+        return None
+    return f"{title}|{data.get('address') or data.get('short_address')}"
+
+
+async def scrape_tiled(
+    runner: Callable[..., Awaitable[Optional[List[Dict]]]],
+    bbox: BBox,
+    ads_limit: int,
+    on_result: Optional[Callable[[int, Dict], None]] = None,
+    grid: int = TILE_GRID,
+    max_depth: int = TILE_MAX_DEPTH,
+    concurrency: int = TILE_CONCURRENCY,
+    timeout_ms: Optional[int] = None,
+    **kwargs,
+) -> Tuple[List[Dict], Dict]:
+    """Cubre bbox con búsquedas por casilla y junta los lugares sin duplicados.
+
+    runner es scrape_page (o el de los workers) y recibe el resto de kwargs. Cada
+    casilla carga hasta TILE_RESULT_CAP tarjetas para saber si está saturada y
+    extrae lugares hasta que se reúnen ads_limit lugares distintos: los que ya
+    trajo otra casilla no cuentan. Las que cargan TILE_SATURATION tarjetas o más
+    se dividen en grid x grid hasta max_depth. En cuanto se reúnen ads_limit
+    lugares se cancelan todas las casillas en curso. Con
+    timeout_ms el plazo es común a todas las casillas. Devuelve los resultados y
+    un informe de cobertura y tiempos.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: List[Dict] = []
+    seen = set()
+    tiles: List[Tile] = []
+    # Búsqueda en curso de cada casilla, para cancelarlas al llegar a ads_limit
+    running: Dict[Tile, asyncio.Future] = {}
+    duplicates = 0
+    started = time.perf_counter()
+
+    def full() -> bool:
+        return len(results) >= ads_limit
+
+    def collect(tile: Tile, data: Dict) -> None:
+        nonlocal duplicates
+        key = _dedupe_key(data)
+        if key is not None and key in seen:
+            duplicates += 1
+            return
+        if key is not None:
+            seen.add(key)
+        if full():
+            return
+        tile.new += 1
+        results.append(data)
+        if on_result is not None:
+            on_result(len(results) - 1, data)
+        if full():
+            # Incluida la casilla en curso: le quedarían tarjetas por extraer
+            for search in running.values():
+                search.cancel()
+
+    async def run(tile: Tile) -> None:
+        tiles.append(tile)
+        async with semaphore:
+            if full() or expired():
+                tile.status = "skipped"
+                return
+            tile.status = "running"
+            lat, lng = tile.center
+            left = remaining()
+            start = time.perf_counter()
+            search = running[tile] = asyncio.ensure_future(
+                # No se le pide la cantidad que falta: sus primeras tarjetas pueden
+                # ser lugares ya vistos en otra casilla (las hijas solapan al padre)
+                runner(
+                    **kwargs,
+                    ads_limit=TILE_RESULT_CAP,
+                    scan_limit=TILE_RESULT_CAP,
+                    viewport=(lat, lng, tile.zoom),
+                    on_result=lambda index, data: collect(tile, data),
+                    timeout_ms=None if left is None else max(1, int(left * 1000)),
+                )
+            )
+            try:
+                tile_results = await search
+            except asyncio.CancelledError:
+                # Cancelada aquí por tener ya ads_limit lugares; si no, se propaga
+                if not full():
+                    raise
+                tile.status = "cancelled"
+                return
+            finally:
+                running.pop(tile, None)
+                tile.seconds = time.perf_counter() - start
+        if tile_results is None:
+            # Sin resultados por haberse agotado el plazo (p. ej. esperando sesión)
+            tile.status = "partial" if expired() else "failed"
+            return
+        cards = getattr(tile_results, "cards", None)
+        tile.count = len(tile_results) if cards is None else cards
+        if getattr(tile_results, "partial", False):
+            tile.status = "partial"
+            return
+        if tile.count < TILE_SATURATION:
+            tile.status = "complete"
+            return
+        if tile.depth >= max_depth or full():
+            # Sigue en el tope: puede haber lugares que no se vieron
+            tile.status = "saturated"
+            return
+        if expired():
+            tile.status = "partial"
+            return
+        tile.status = "subdivided"
+        await asyncio.gather(*(run(child) for child in tile.split(grid)))
+
+    roots = [Tile(box, str(index)) for index, box in enumerate(grid_bboxes(bbox, grid))]
+    with use_deadline(timeout_ms):
+        await asyncio.gather(*(run(tile) for tile in roots))
+
+    total_area = sum(tile.area_km2 for tile in roots)
+    # Área explorada hasta el final: casillas que no llegaron al tope
+    covered = sum(tile.area_km2 for tile in tiles if tile.status == "complete")
+    report = {
+        "bbox": list(bbox),
+        "tiles": len(tiles),
+        "searches": sum(1 for tile in tiles if tile.status not in ("pending", "skipped")),
+        "saturated": sum(1 for tile in tiles if tile.status == "saturated"),
+        "failed": sum(1 for tile in tiles if tile.status == "failed"),
+        "partial": any(tile.status in ("partial", "skipped") for tile in tiles) and not full(),
+        "unique_places": len(results),
+        "duplicates": duplicates,
+        "area_km2": round(total_area, 3),
+        "covered_km2": round(covered, 3),
+        "coverage": round(covered / total_area, 4) if total_area else 0.0,
+        "seconds": round(time.perf_counter() - started, 3),
+        "tile_details": [tile.to_dict() for tile in tiles],
+    }
+    return results, report
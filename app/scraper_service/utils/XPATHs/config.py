@@ -3,11 +3,19 @@ INFO_MODAL_XPATH = "//div[@class='m6QErb DxyBCb kA9KIf dS8AEf XiKgde ']"
 
 ADS_CONTAINER_XPATH = "//div[@role='feed']"
 ADS_XPATH = "//a[@class='hfpxzc']"
+END_OF_LIST_XPATH = "//span[@class='HlvSq']"
 
 SOCIAL_MEDIA_LINK_XPATH = "//div[@class='HTomEb P0BCpd GLttn wFAQK']"
 
 PHONE_XPATH = "//button[contains(@data-item-id,'phone')]//div[@class='rogA2c ']"
 ADRESS_XPATH = "//button[contains(@data-item-id,'address')]//div[@class='rogA2c ']"
 # data-item-id/phone
+
+# Campos de las tarjetas del listado, relativos a cada tarjeta del feed
+RATING_CARD_XPATH = ".//span[@class='MW4etd']"
+REVIEWS_CARD_XPATH = ".//span[@class='UY7F9']"
+CATEGORY_CARD_XPATH = ".//div[@class='W4Efsd']/div[@class='W4Efsd'][1]/span[1]/span"
+SHORT_ADDRESS_CARD_XPATH = ".//div[@class='W4Efsd']/div[@class='W4Efsd'][1]/span[2]/span[2]"
 URL_MAPS = "https://www.google.com/url?sa=t&rct=j&q=&esrc=s&source=web&cd=&cad=rja&uact=8&ved=2ahUKEwitoOn69qOMAxUIEzQIHWkJKIMQFnoECAoQAQ&url=https%3A%2F%2Fmaps.google.com%2Fmaps&usg=AOvVaw1nQWRIQz9dBndHi5i2aVaW&opi=89978449"
+MAPS_ROOT = "https://www.google.com/maps"
 SOCIAL_NETWORKS = ["https://www.facebook.com/", "https://twitter.com/", "https://www.instagram.com/", "https://www.linkedin.com/"]
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from playwright.async_api import ElementHandle
+
+from .browser_pool import BrowserPool
+from .metrics import registry
+from .procstats import (
+    chromium_processes,
+    descendants,
+    find_process,
+    rss_bytes,
+    tree_rss_bytes,
+)
+from .settings import (
+    WATCHDOG_BROWSER_MAX_RSS_MB,
+    WATCHDOG_CHECK_SECONDS,
+    WATCHDOG_MAX_HANDLES,
+    WATCHDOG_MAX_PAGES,
+    WATCHDOG_MAX_RSS_MB,
+)
+
+RSS_BYTES = registry.gauge(
+    "scraper_rss_bytes", "Resident memory of this process, the Playwright driver and Chromium."
+)
+RECYCLES = registry.counter(
+    "scraper_watchdog_recycles_total", "Browsers drained and recycled by the resource watchdog."
+)
+
+# Handles de elementos creados con query() / query_all() y liberados con dispose()
+HANDLE_STATS = {"created": 0, "disposed": 0}
+
+
+def live_handles() -> int:
+    return HANDLE_STATS["created"] - HANDLE_STATS["disposed"]
+
+
+async def query(scope, selector: str) -> Optional[ElementHandle]:
+    """query_selector contabilizado: el handle debe liberarse con dispose()."""
+    handle = await scope.query_selector(selector)
+    if handle is not None:
+        HANDLE_STATS["created"] += 1
+    return handle
+
+
+async def query_all(scope, selector: str) -> List[ElementHandle]:
+    handles = await scope.query_selector_all(selector)
+    HANDLE_STATS["created"] += len(handles)
+    return handles
+
+
+async def dispose(*handles: Optional[ElementHandle]) -> None:
+    """Libera los handles (acepta None y listas) sin propagar errores de páginas cerradas."""
+    for handle in handles:
+        if handle is None:
+            continue
+        if isinstance(handle, (list, tuple)):
+            await dispose(*handle)
+            continue
+        HANDLE_STATS["disposed"] += 1
+        try:
+            await handle.dispose()
+        except Exception:
+            # La página o el contexto ya se cerró: el handle ya no existe
+            pass
+
+
+def _mb(value: int) -> int:
+    return value * 2**20
+
+
+def _read_memory(markers: Sequence[str]) -> Dict:
+    """RSS por proceso y por navegador (lecturas de /proc, bloqueantes)."""
+    chromium = set(chromium_processes())
+    driver = [pid for pid in descendants() if pid not in chromium]
+    browsers = {}
+    for marker in markers:
+        pid = find_process(marker) if marker else None
+        browsers[marker] = tree_rss_bytes(pid) if pid else 0
+    return {
+        "python": rss_bytes(),
+        "driver": sum(rss_bytes(pid) for pid in driver),
+        "chromium": sum(rss_bytes(pid) for pid in chromium),
+        "chromium_processes": len(chromium),
+        "browsers": browsers,
+    }
+
+
+class ResourceWatchdog:
+    """Vigila la memoria y los recursos abiertos de un BrowserPool y recicla lo que se pasa.
+
+    Cada check_seconds lee el RSS de este proceso, del driver de Playwright y de cada
+    navegador (con sus renderers), y cuenta contextos, páginas y handles vivos. Un
+    navegador que supera su umbral se drena: termina el scraping en curso y se
+    reinicia al devolverse al pool (o en el momento si está libre). Si es la memoria
+    total la que se pasa, se reciclan todos. Los contextos huérfanos se cierran.
+    """
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        check_seconds: float = WATCHDOG_CHECK_SECONDS,
+        max_rss_mb: int = WATCHDOG_MAX_RSS_MB,
+        browser_max_rss_mb: int = WATCHDOG_BROWSER_MAX_RSS_MB,
+        max_pages: int = WATCHDOG_MAX_PAGES,
+        max_handles: int = WATCHDOG_MAX_HANDLES,
+    ) -> None:
+        self.pool = pool
+        self.check_seconds = check_seconds
+        self.max_rss_bytes = _mb(max_rss_mb)
+        self.browser_max_rss_bytes = _mb(browser_max_rss_mb)
+        self.max_pages = max_pages
+        self.max_handles = max_handles
+        self.last: Dict = {}
+        self.stats = {"checks": 0, "recycles": 0, "orphan_contexts_closed": 0, "handle_warnings": 0}
+        self._task: Optional[asyncio.Task] = None
+        # Contextos huérfanos vistos en la revisión anterior
+        self._suspects: set = set()
+
+    def start(self) -> None:
+        if self.check_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_seconds)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Error en la vigilancia de recursos: {e}")
+
+    def _retire(self, index: int, reason: str) -> None:
+        self.pool.retire(index, reason)
+        RECYCLES.inc(reason=reason)
+        self.stats["recycles"] += 1
+
+    async def _close_orphan(self, context) -> None:
+        try:
+            await context.close()
+            self.stats["orphan_contexts_closed"] += 1
+        except Exception as e:
+            print(f"Error al cerrar un contexto huérfano: {e}")
+
+    async def check(self) -> Dict:
+        """Toma una muestra, marca lo que hay que reciclar y la devuelve."""
+        usage = self.pool.usage()
+        memory = await asyncio.to_thread(_read_memory, [slot["marker"] for slot in usage])
+        total = memory["python"] + memory["driver"] + memory["chromium"]
+        for process in ("python", "driver", "chromium"):
+            RSS_BYTES.set(memory[process], process=process)
+
+        suspects = set()
+        for slot in usage:
+            slot["rss"] = memory["browsers"].get(slot["marker"], 0)
+            # Aparte del precalentado y el prestado no debería quedar ningún contexto
+            # abierto; se cierra si sigue ahí desde la revisión anterior
+            for context in self.pool.orphan_contexts(slot["index"]):
+                if context in self._suspects:
+                    await self._close_orphan(context)
+                else:
+                    suspects.add(context)
+            if slot["retiring"]:
+                continue
+            if self.browser_max_rss_bytes and slot["rss"] > self.browser_max_rss_bytes:
+                reason = "browser_rss"
+            elif self.max_rss_bytes and total > self.max_rss_bytes:
+                reason = "total_rss"
+            elif self.max_pages and slot["pages"] > self.max_pages:
+                reason = "pages"
+            else:
+                continue
+            print(
+                f"Navegador {slot['index']}: {slot['rss'] // 2**20} MiB, "
+                f"{slot['pages']} páginas, {slot['contexts']} contextos; se recicla ({reason})"
+            )
+            self._retire(slot["index"], reason)
+            slot["retiring"] = reason
+        self._suspects = suspects
+        self.pool.recycle_idle()
+
+        handles = live_handles()
+        if self.max_handles and handles > self.max_handles:
+            self.stats["handle_warnings"] += 1
+            print(f"Hay {handles} handles de elementos sin liberar")
+
+        self.stats["checks"] += 1
+        self.last = {
+            "checked_at": time.time(),
+            "pid": os.getpid(),
+            "rss": {key: memory[key] for key in ("python", "driver", "chromium")},
+            "rss_total": total,
+            "chromium_processes": memory["chromium_processes"],
+            "handles": {**HANDLE_STATS, "live": handles},
+            "browsers": usage,
+        }
+        return self.last
+
+    def to_dict(self) -> Dict:
+        return {
+            **self.stats,
+            "enabled": self._task is not None,
+            "recycled_by_reason": dict(self.pool.recycled_by_reason),
+            "limits": {
+                "max_rss_mb": self.max_rss_bytes // 2**20,
+                "browser_max_rss_mb": self.browser_max_rss_bytes // 2**20,
+                "max_pages": self.max_pages,
+                "max_handles": self.max_handles,
+            },
+            "last": self.last,
+        }
@@ -0,0 +1,404 @@
+import asyncio
+import copy
+import itertools
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+from .deadline import remaining
+from .metrics import add_numeric, merge_timings, numeric_delta, registry
+from .procstats import chromium_rss_bytes, rss_bytes
+from .settings import (
+    BROWSER_POOL_SIZE,
+    RESULT_SINK,
+    RESULT_SINK_PATH,
+    SCRAPER_WORKERS,
+    WORKER_CHECK_SECONDS,
+    WORKER_DRAIN_SECONDS,
+    WORKER_MAX_RSS_MB,
+)
+
+# Procesos scraper: cada uno con su Playwright y su pool, conectados por un Pipe.
+# Mensajes del proceso principal: ("scrape", id, kwargs), ("cancel", id), ("stop",)
+# Mensajes del worker: ("result", id, index, data), ("done", id, results, timings, stats),
+# ("error", id, mensaje, stats). stats son los contadores que cambiaron desde el
+# mensaje anterior y se suman a los del proceso principal (ver _collect_stats)
+
+WORKER_STATS = {"started": 0, "restarted_crash": 0, "restarted_memory": 0, "crashed_calls": 0}
+
+
+class WorkerCrashedError(Exception):
+    pass
+
+
+class WorkerPoolClosedError(Exception):
+    pass
+
+
+def _stats_dicts() -> Dict[str, Dict]:
+    """Contadores de cada subsistema que se actualizan donde corre el scraping."""
+    from .extraction import EXTRACTION_STATS
+    from .link_resolver import RESOLVER_STATS
+    from .pacing import WAIT_STATS
+    from .resource_blocking import BLOCKING_STATS
+    from .snapshots import SNAPSHOT_STATS
+    from .storage_state import STORAGE_STATS
+    from .watchdog import HANDLE_STATS
+    from .xhr import XHR_STATS
+
+    return {
+        "pacing": WAIT_STATS,
+        "links": RESOLVER_STATS,
+        "blocking": BLOCKING_STATS,
+        "extraction": EXTRACTION_STATS,
+        "xhr": XHR_STATS,
+        "storage": STORAGE_STATS,
+        "snapshots": SNAPSHOT_STATS,
+        "handles": HANDLE_STATS,
+    }
+
+
+def _collect_stats() -> Dict[str, Any]:
+    from .cache import place_cache
+
+    return {
+        "registry": registry.snapshot(),
+        "place_cache": {"hits": place_cache.hits, "misses": place_cache.misses},
+        # Copia: numeric_delta compara con la muestra anterior
+        **{name: copy.deepcopy(stats) for name, stats in _stats_dicts().items()},
+    }
+
+
+def merge_stats(delta: Dict[str, Any]) -> None:
+    """Suma a los contadores de este proceso los incrementos enviados por un worker."""
+    from .cache import place_cache
+
+    if not delta:
+        return
+    registry.merge(delta.get("registry", {}))
+    place_cache.hits += delta.get("place_cache", {}).get("hits", 0)
+    place_cache.misses += delta.get("place_cache", {}).get("misses", 0)
+    for name, stats in _stats_dicts().items():
+        add_numeric(stats, delta.get(name, {}))
+
+
+class _StatsReporter:
+    """Calcula lo que cambió en los contadores del worker desde el último envío."""
+
+    def __init__(self) -> None:
+        self._sent: Dict[str, Any] = {}
+
+    def delta(self) -> Dict[str, Any]:
+        current = _collect_stats()
+        delta = numeric_delta(current, self._sent)
+        self._sent = current
+        return delta
+
+
+def worker_sink_path(path: str, slot: int) -> str:
+    """Ruta del sink de un worker: un fichero por proceso para que no se mezclen registros."""
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker{slot}{extension}"
+
+
+def _worker_main(conn: Connection, slot: int, pool_size: int) -> None:
+    """Punto de entrada del proceso worker."""
+    asyncio.run(_serve(conn, slot, pool_size))
+
+
+async def _serve(conn: Connection, slot: int, pool_size: int) -> None:
+    # Importado aquí: el proceso principal no necesita Playwright en modo workers
+    from .browser_pool import BrowserPool
+    from .link_resolver import close_resolver
+    from .metrics import collect_timings
+    from .services import scrape_page
+    from .sinks import create_sink, set_sink
+    from .snapshots import close_snapshots
+    from .watchdog import ResourceWatchdog
+
+    loop = asyncio.get_running_loop()
+    pool = BrowserPool(size=pool_size)
+    await pool.start()
+    watchdog = ResourceWatchdog(pool)
+    watchdog.start()
+    # Los ficheros por petición no chocan; un JSONL o una base SQLite compartidos sí
+    path = RESULT_SINK_PATH if RESULT_SINK == "files" else worker_sink_path(RESULT_SINK_PATH, slot)
+    sink = create_sink(path=path)
+    await sink.start()
+    set_sink(sink)
+    reporter = _StatsReporter()
+    tasks: Dict[int, asyncio.Task] = {}
+    stopped = asyncio.Event()
+
+    async def run(call_id: int, kwargs: Dict[str, Any]) -> None:
+        def on_result(index: int, data: Dict) -> None:
+            conn.send(("result", call_id, index, data))
+
+        try:
+            with collect_timings() as timings:
+                results = await scrape_page(**kwargs, pool=pool, on_result=on_result)
+            conn.send(("done", call_id, results, timings, reporter.delta()))
+        except asyncio.CancelledError:
+            conn.send(("error", call_id, "cancelled", reporter.delta()))
+        except Exception as e:
+            conn.send(("error", call_id, str(e), reporter.delta()))
+        finally:
+            tasks.pop(call_id, None)
+
+    def on_message() -> None:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            # El proceso principal ya no existe
+            stopped.set()
+            return
+        kind = message[0]
+        if kind == "scrape":
+            _, call_id, kwargs = message
+            tasks[call_id] = asyncio.create_task(run(call_id, kwargs))
+        elif kind == "cancel":
+            task = tasks.get(message[1])
+            if task is not None:
+                task.cancel()
+        elif kind == "stop":
+            stopped.set()
+
+    loop.add_reader(conn.fileno(), on_message)
+    try:
+        await stopped.wait()
+    finally:
+        loop.remove_reader(conn.fileno())
+        for task in list(tasks.values()):
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await watchdog.close()
+        await pool.close()
+        await close_resolver()
+        close_snapshots()
+        await sink.close()
+
+
+class _Call:
+    def __init__(self, on_result) -> None:
+        self.on_result = on_result
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class WorkerProcess:
+    """Un proceso worker y las llamadas que tiene en curso."""
+
+    def __init__(self, slot: int, pool_size: int) -> None:
+        self.slot = slot
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, slot, pool_size),
+            name=f"scraper-worker-{slot}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.calls: Dict[int, _Call] = {}
+        self.handled = 0
+        self.draining_since: Optional[float] = None
+        self.rss = 0
+        self.closed = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.calls)
+
+    @property
+    def available(self) -> bool:
+        return not self.closed and self.draining_since is None and self.process.is_alive()
+
+    def send(self, message: Tuple) -> None:
+        self.conn.send(message)
+
+    def fail_calls(self, error: Exception) -> None:
+        for call in self.calls.values():
+            if not call.future.done():
+                call.future.set_exception(error)
+        WORKER_STATS["crashed_calls"] += len(self.calls)
+        self.calls.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "slot": self.slot,
+            "pid": self.process.pid,
+            "alive": self.process.is_alive(),
+            "in_flight": self.in_flight,
+            "handled": self.handled,
+            "draining": self.draining_since is not None,
+            "rss_bytes": self.rss,
+        }
+
+
+class WorkerPool:
+    """Reparte scrapings entre procesos worker supervisados.
+
+    Cada petición va al worker con menos trabajo en curso. Un worker que muere se
+    reemplaza y sus llamadas fallan; uno que supera WORKER_MAX_RSS_MB deja de
+    recibir trabajo y se reinicia cuando termina lo que tiene (o tras
+    WORKER_DRAIN_SECONDS).
+    """
+
+    def __init__(
+        self,
+        processes: int = SCRAPER_WORKERS,
+        pool_size: int = BROWSER_POOL_SIZE,
+        max_rss_mb: int = WORKER_MAX_RSS_MB,
+        check_seconds: int = WORKER_CHECK_SECONDS,
+        drain_seconds: int = WORKER_DRAIN_SECONDS,
+    ) -> None:
+        self.processes = max(1, processes)
+        self.pool_size = pool_size
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.check_seconds = check_seconds
+        self.drain_seconds = drain_seconds
+        self.workers: List[WorkerProcess] = []
+        self._ids = itertools.count()
+        self._monitor: Optional[asyncio.Task] = None
+        self.accepting = False
+
+    async def start(self) -> None:
+        self.workers = [self._spawn(slot) for slot in range(self.processes)]
+        self._monitor = asyncio.create_task(self._supervise())
+        self.accepting = True
+
+    async def close(self) -> None:
+        self.accepting = False
+        if self._monitor is not None:
+            self._monitor.cancel()
+        await asyncio.gather(*(self._retire(worker) for worker in self.workers))
+        self.workers = []
+
+    def _spawn(self, slot: int) -> WorkerProcess:
+        worker = WorkerProcess(slot, self.pool_size)
+        asyncio.get_running_loop().add_reader(worker.conn.fileno(), self._on_message, worker)
+        WORKER_STATS["started"] += 1
+        return worker
+
+    def _on_message(self, worker: WorkerProcess) -> None:
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            self._detach(worker)
+            worker.fail_calls(WorkerCrashedError(f"El worker {worker.slot} terminó"))
+            return
+        kind, call_id = message[0], message[1]
+        if kind != "result":
+            # También de llamadas ya abandonadas: los contadores avanzaron igualmente
+            merge_stats(message[-1])
+        call = worker.calls.get(call_id)
+        if call is None:
+            return
+        if kind == "result":
+            if call.on_result is not None:
+                call.on_result(message[2], message[3])
+            return
+        del worker.calls[call_id]
+        worker.handled += 1
+        if call.future.done():
+            return
+        if kind == "done":
+            call.future.set_result((message[2], message[3]))
+        else:
+            call.future.set_exception(WorkerCrashedError(message[2]))
+
+    def _detach(self, worker: WorkerProcess) -> None:
+        if not worker.closed:
+            worker.closed = True
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+
+    async def _retire(self, worker: WorkerProcess, timeout: float = 15.0) -> None:
+        """Pide al worker que se detenga y espera a que salga (o lo mata)."""
+        if not worker.closed:
+            try:
+                worker.send(("stop",))
+            except OSError:
+                pass
+        await asyncio.to_thread(worker.process.join, timeout)
+        if worker.process.is_alive():
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.join, 5)
+        self._detach(worker)
+        worker.fail_calls(WorkerCrashedError(f"El worker {worker.slot} se detuvo"))
+        worker.conn.close()
+
+    def _pick(self) -> WorkerProcess:
+        candidates = [worker for worker in self.workers if worker.available]
+        if not candidates:
+            # Todos drenando: mejor un worker pesado que rechazar la petición
+            candidates = [
+                worker
+                for worker in self.workers
+                if not worker.closed and worker.process.is_alive()
+            ]
+        if not candidates:
+            raise WorkerPoolClosedError("No hay workers disponibles")
+        return min(candidates, key=lambda worker: (worker.in_flight, worker.handled))
+
+    async def scrape_page(self, on_result=None, pool=None, **kwargs) -> Optional[List[Dict]]:
+        """Misma firma que services.scrape_page, ejecutado en un proceso worker."""
+        if not self.accepting:
+            raise WorkerPoolClosedError("El pool de workers no está disponible")
+        left = remaining()
+        if left is not None:
+            # El plazo no cruza al otro proceso: se envía lo que queda de él
+            budget = max(1, int(left * 1000))
+            timeout_ms = kwargs.get("timeout_ms")
+            kwargs["timeout_ms"] = budget if timeout_ms is None else min(timeout_ms, budget)
+        worker = self._pick()
+        call_id = next(self._ids)
+        call = _Call(on_result)
+        worker.calls[call_id] = call
+        try:
+            worker.send(("scrape", call_id, kwargs))
+        except OSError as e:
+            del worker.calls[call_id]
+            raise WorkerCrashedError(f"El worker {worker.slot} no responde: {e}")
+        try:
+            results, timings = await call.future
+        except asyncio.CancelledError:
+            if call_id in worker.calls and not worker.closed:
+                # El worker cancela su tarea y contesta con un error que se ignora
+                worker.send(("cancel", call_id))
+            raise
+        merge_timings(timings)
+        return results
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_seconds)
+            for index, worker in enumerate(self.workers):
+                if not worker.process.is_alive():
+                    print(f"Worker {worker.slot} caído (código {worker.process.exitcode}), reiniciando")
+                    WORKER_STATS["restarted_crash"] += 1
+                    await self._retire(worker)
+                    self.workers[index] = self._spawn(worker.slot)
+                    continue
+                pid = worker.process.pid
+                worker.rss = await asyncio.to_thread(
+                    lambda: rss_bytes(pid) + chromium_rss_bytes(pid)
+                )
+                if worker.draining_since is None:
+                    if self.max_rss_bytes and worker.rss > self.max_rss_bytes:
+                        print(f"Worker {worker.slot} usa {worker.rss // 2**20} MiB, drenando")
+                        worker.draining_since = time.monotonic()
+                    continue
+                drained = worker.in_flight == 0
+                if drained or time.monotonic() - worker.draining_since > self.drain_seconds:
+                    WORKER_STATS["restarted_memory"] += 1
+                    await self._retire(worker)
+                    self.workers[index] = self._spawn(worker.slot)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(worker.in_flight for worker in self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**WORKER_STATS, "workers": [worker.to_dict() for worker in self.workers]}
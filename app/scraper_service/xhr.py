@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page, Response
+
+from .cache import place_key
+from .settings import XHR_RECORD_DIR
+
+# Respuestas internas con las que el frontend de Maps carga el listado de resultados
+SEARCH_URL_MARKERS = ("tbm=map",)
+# Prefijo anti-XSSI que Google antepone al JSON
+XSSI_PREFIX = ")]}'"
+
+# Posición de cada campo dentro del array de un lugar (entrada[14] del payload)
+PLACE_PATHS = {
+    "title": (11,),
+    "address": (39,),
+    "phone": (178, 0, 0),
+    "rating": (4, 7),
+    "reviews": (4, 8),
+    "category": (13, 0),
+    "short_address": (2, 0),
+    "website": (7, 0),
+    "feature_id": (10,),
+    "place_ref": (78,),
+    "latitude": (9, 2),
+    "longitude": (9, 3),
+}
+# Campos que sustituyen a los del detalle y a los de las tarjetas
+DETAIL_KEYS = ("title", "phone", "address")
+CARD_KEYS = ("title", "rating", "reviews", "category", "short_address")
+
+XHR_STATS = {
+    "responses": 0,
+    "parse_errors": 0,
+    "places": 0,
+    "fields_from_xhr": 0,
+    "fields_from_dom": 0,
+    "clicks_saved": 0,
+}
+
+
+def _dig(data: Any, path) -> Any:
+    for index in path:
+        if not isinstance(data, list) or index >= len(data):
+            return None
+        data = data[index]
+    return data
+
+
+def _load(text: str) -> Any:
+    text = text.strip()
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    return json.loads(text)
+
+
+def is_search_response(url: str) -> bool:
+    return any(marker in url for marker in SEARCH_URL_MARKERS)
+
+
+def parse_place(place: List) -> Dict[str, Any]:
+    """Campos de un lugar del payload; los que no se encuentran quedan en None."""
+    values = {}
+    for name, path in PLACE_PATHS.items():
+        value = _dig(place, path)
+        values[name] = value if isinstance(value, (str, int, float)) else None
+    if values["rating"] is not None:
+        values["rating"] = str(values["rating"])
+    if values["reviews"] is not None:
+        values["reviews"] = f"({values['reviews']})"
+    # Misma preferencia que cache.place_key: place ID si lo hay, si no el id 0x…:0x…
+    values["place_id"] = values["place_ref"] or values["feature_id"]
+    return values
+
+
+def parse_search_payload(body: str) -> List[Dict[str, Any]]:
+    """Convierte la respuesta de búsqueda de Maps en una lista de lugares.
+
+    Acepta el cuerpo tal cual (``)]}'`` seguido del array) o envuelto en
+    ``{"d": "..."}`` como en algunas versiones del frontend.
+    """
+    data = _load(body)
+    if isinstance(data, dict) and isinstance(data.get("d"), str):
+        data = _load(data["d"])
+    entries = _dig(data, (0, 1))
+    if not isinstance(entries, list):
+        raise ValueError("El payload no contiene la lista de resultados")
+    places = []
+    for entry in entries:
+        place = _dig(entry, (14,))
+        if isinstance(place, list):
+            places.append(parse_place(place))
+    return places
+
+
+class SearchCapture:
+    """Escucha las respuestas de búsqueda de una página y guarda los lugares por id."""
+
+    def __init__(self, page: Page, record_dir: str = XHR_RECORD_DIR) -> None:
+        self.page = page
+        self.record_dir = record_dir
+        self.places: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: set = set()
+
+    def attach(self) -> None:
+        self.page.on("response", self._on_response)
+
+    def detach(self) -> None:
+        self.page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response: Response) -> None:
+        if not is_search_response(response.url):
+            return
+        task = asyncio.create_task(self._read(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, response: Response) -> None:
+        try:
+            body = await response.text()
+        except Exception as e:
+            print(f"No se pudo leer la respuesta de búsqueda: {e}")
+            return
+        XHR_STATS["responses"] += 1
+        if self.record_dir:
+            await asyncio.to_thread(self._record, body)
+        try:
+            places = parse_search_payload(body)
+        except (ValueError, TypeError) as e:
+            XHR_STATS["parse_errors"] += 1
+            print(f"Respuesta de búsqueda no reconocida: {e}")
+            return
+        for place in places:
+            # Se indexa por ambos ids: la URL de la tarjeta puede llevar cualquiera
+            for key in (place["place_ref"], place["feature_id"]):
+                if key:
+                    self.places.setdefault(key, place)
+        XHR_STATS["places"] += len(places)
+
+    def _record(self, body: str) -> None:
+        # Respuestas reales para reproducirlas después en el servidor de pruebas
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"search_{time.time_ns()}.txt"
+        with open(os.path.join(self.record_dir, name), "w", encoding="utf-8") as f:
+            f.write(body)
+
+    async def settle(self) -> None:
+        """Espera a que se hayan leído las respuestas ya recibidas."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def get(self, href: Optional[str]) -> Optional[Dict[str, Any]]:
+        key = place_key(href)
+        return self.places.get(key) if key else None
+
+
+def complete(place: Optional[Dict[str, Any]], keys=DETAIL_KEYS) -> bool:
+    return place is not None and all(place.get(key) is not None for key in keys)
+
+
+def merge_fields(
+    place: Optional[Dict[str, Any]], dom: Dict[str, Any], keys=DETAIL_KEYS
+) -> Dict[str, Any]:
+    """Toma cada campo del payload y, si no se pudo leer, el de la página."""
+    merged = dict(dom)
+    for key in keys:
+        value = place.get(key) if place else None
+        if value is not None:
+            merged[key] = value
+            XHR_STATS["fields_from_xhr"] += 1
+        else:
+            XHR_STATS["fields_from_dom"] += 1
+    return merged
+
+
+def from_capture(place: Dict[str, Any], keys=DETAIL_KEYS) -> Dict[str, Any]:
+    XHR_STATS["fields_from_xhr"] += len(keys)
+    XHR_STATS["clicks_saved"] += 1
+    return {key: place[key] for key in keys}
+
+
+def xhr_stats() -> Dict[str, int]:
+    return dict(XHR_STATS)
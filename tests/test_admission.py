@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+
+from app.scraper_service.admission import AdmissionController, AdmissionRejected
+from app.scraper_service.deadline import use_deadline
+
+
+async def queued(admission: AdmissionController, client: str, **kwargs) -> asyncio.Task:
+    """Lanza un acquire y espera a que quede en la cola."""
+    task = asyncio.create_task(admission.acquire(client, **kwargs))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_grants_immediately_while_sessions_are_free():
+    async def main():
+        admission = AdmissionController(max_sessions=2)
+        first = await admission.acquire("a")
+        second = await admission.acquire("b")
+        return admission.active, admission.queued, first.client, second.client
+
+    assert asyncio.run(main()) == (2, 0, "a", "b")
+
+
+def test_release_goes_to_client_with_fewer_active_sessions():
+    async def main():
+        admission = AdmissionController(max_sessions=2, max_queue=10, max_queue_per_client=0)
+        busy = [await admission.acquire("heavy"), await admission.acquire("heavy")]
+        waiting = {
+            "heavy0": await queued(admission, "heavy"),
+            "heavy1": await queued(admission, "heavy"),
+            "light": await queued(admission, "light"),
+        }
+        order = []
+        for name, task in waiting.items():
+            task.add_done_callback(lambda _, name=name: order.append(name))
+
+        # light llegó el último pero no tiene ninguna sesión
+        admission.release(busy[0])
+        light = await waiting["light"]
+        # Ahora heavy tiene menos sesiones que light; pasa su primera petición
+        admission.release(busy[1])
+        heavy = await waiting["heavy0"]
+        admission.release(light)
+        admission.release(heavy)
+        admission.release(await waiting["heavy1"])
+        return order, admission.active
+
+    assert asyncio.run(main()) == (["light", "heavy0", "heavy1"], 0)
+
+
+def test_rejects_when_queue_is_full():
+    async def main():
+        admission = AdmissionController(max_sessions=1, max_queue=1, max_queue_per_client=0)
+        ticket = await admission.acquire("a")
+        waiting = await queued(admission, "b")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("c")
+        admission.release(ticket)
+        admission.release(await waiting)
+        return rejected.value, admission.stats["rejected"]
+
+    rejected, count = asyncio.run(main())
+
+    assert rejected.reason == "queue_full"
+    assert rejected.retry_after >= 1
+    assert count == 1
+
+
+def test_rejects_when_client_queue_is_full():
+    async def main():
+        admission = AdmissionController(max_sessions=1, max_queue=10, max_queue_per_client=1)
+        ticket = await admission.acquire("a")
+        waiting = await queued(admission, "a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("a")
+        # Otro cliente sí puede ponerse en cola
+        other = await queued(admission, "b")
+        queue_length = admission.queued
+        admission.release(ticket)
+        admission.release(await waiting)
+        admission.release(await other)
+        return rejected.value.reason, queue_length
+
+    assert asyncio.run(main()) == ("client_queue_full", 2)
+
+
+def test_unbounded_acquire_skips_queue_limits():
+    async def main():
+        admission = AdmissionController(max_sessions=1, max_queue=0, max_wait_seconds=0.01)
+        ticket = await admission.acquire("a")
+        waiting = await queued(admission, "a", bounded=False)
+        await asyncio.sleep(0.05)
+        still_waiting = not waiting.done()
+        admission.release(ticket)
+        admission.release(await waiting)
+        return still_waiting, admission.active
+
+    assert asyncio.run(main()) == (True, 0)
+
+
+def test_rejects_after_max_wait():
+    async def main():
+        admission = AdmissionController(max_sessions=1, max_wait_seconds=0.05)
+        ticket = await admission.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("b")
+        admission.release(ticket)
+        return rejected.value.reason, admission.queued, admission.active
+
+    assert asyncio.run(main()) == ("wait_timeout", 0, 0)
+
+
+def test_wait_is_capped_by_request_deadline():
+    async def main():
+        admission = AdmissionController(max_sessions=1, max_wait_seconds=30)
+        ticket = await admission.acquire("a")
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with use_deadline(50), pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("b")
+        waited = loop.time() - start
+        admission.release(ticket)
+        return rejected.value.reason, waited
+
+    reason, waited = asyncio.run(main())
+
+    assert reason == "deadline"
+    assert waited < 1
+
+
+def test_session_granted_as_waiter_leaves_is_returned():
+    async def main():
+        admission = AdmissionController(max_sessions=1)
+        ticket = await admission.acquire("a")
+        waiting = await queued(admission, "b")
+        # Se cancela y se le concede la sesión antes de que llegue a enterarse
+        waiting.cancel()
+        admission.release(ticket)
+        await asyncio.gather(waiting, return_exceptions=True)
+        return waiting.cancelled(), admission.active, admission.queued
+
+    assert asyncio.run(main()) == (True, 0, 0)
+
+
+def test_release_twice_frees_one_session():
+    async def main():
+        admission = AdmissionController(max_sessions=2)
+        first = await admission.acquire("a")
+        second = await admission.acquire("a")
+        admission.release(first)
+        admission.release(first)
+        active = admission.active
+        by_client = admission.to_dict()["active_by_client"]
+        admission.release(second)
+        return active, by_client, admission.active
+
+    assert asyncio.run(main()) == (1, {"a": 1}, 0)
+
+
+def test_wrap_tiles_shares_ticket_and_queues_extra_tiles():
+    async def main():
+        admission = AdmissionController(max_sessions=2, max_queue=0)
+        ticket = await admission.acquire("a")
+        peak = 0
+
+        async def runner(**kwargs):
+            nonlocal peak
+            peak = max(peak, admission.active)
+            await asyncio.sleep(0.01)
+            return [kwargs["tile"]]
+
+        tile = admission.wrap_tiles(runner, ticket)
+        results = await asyncio.gather(*(tile(tile=index) for index in range(4)))
+        admission.release(ticket)
+        return results, peak, admission.active
+
+    results, peak, active = asyncio.run(main())
+
+    assert results == [[0], [1], [2], [3]]
+    assert peak == 2
+    assert active == 0
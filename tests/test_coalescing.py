@@ -0,0 +1,160 @@
+import asyncio
+
+from app.scraper_service.coalescing import COALESCING_STATS, SingleFlight
+
+
+class FakeScrape:
+    """Factory de SingleFlight que entrega un resultado cada `step` segundos."""
+
+    def __init__(self, count: int = 5, step: float = 0.05) -> None:
+        self.count = count
+        self.step = step
+        self.started = 0
+        self.cancelled = False
+
+    async def __call__(self, on_result):
+        self.started += 1
+        try:
+            for index in range(self.count):
+                await asyncio.sleep(self.step)
+                on_result(index, f"ad{index}")
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return [f"ad{index}" for index in range(self.count)]
+
+
+def partial(collected):
+    return {"partial": collected}
+
+
+def test_follower_joins_leader():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape()
+        leader = asyncio.create_task(flight.run("k", 5, scrape))
+        await asyncio.sleep(0)
+        follower = await flight.run("k", 3, scrape)
+        return await leader, follower, scrape.started
+
+    leader, follower, started = asyncio.run(main())
+
+    assert leader == (["ad0", "ad1", "ad2", "ad3", "ad4"], False)
+    assert follower == (["ad0", "ad1", "ad2", "ad3", "ad4"], True)
+    assert started == 1
+
+
+def test_larger_request_does_not_join_smaller_flight():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(step=0.01)
+        leader = asyncio.create_task(flight.run("k", 3, scrape))
+        await asyncio.sleep(0)
+        _, shared = await flight.run("k", 5, scrape)
+        await leader
+        return shared, scrape.started
+
+    assert asyncio.run(main()) == (False, 2)
+
+
+def test_follower_timeout_returns_partial_snapshot():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(count=5, step=0.1)
+        leader = asyncio.create_task(flight.run("k", 5, scrape, timeout=5))
+        await asyncio.sleep(0)
+        before = COALESCING_STATS["timed_out"]
+        follower = await flight.run("k", 5, scrape, timeout=0.25, partial=partial)
+        timed_out = COALESCING_STATS["timed_out"] - before
+        return follower, timed_out, await leader, scrape.cancelled
+
+    follower, timed_out, leader, cancelled = asyncio.run(main())
+
+    assert follower == ({"partial": ["ad0", "ad1"]}, True)
+    assert timed_out == 1
+    # El líder sigue esperando: el scraping no se cancela
+    assert leader[0] == ["ad0", "ad1", "ad2", "ad3", "ad4"]
+    assert not cancelled
+
+
+def test_follower_timeout_limits_snapshot_to_its_ads_limit():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(count=5, step=0.05)
+        leader = asyncio.create_task(flight.run("k", 5, scrape, timeout=5))
+        await asyncio.sleep(0)
+        follower = await flight.run("k", 2, scrape, timeout=0.2, partial=partial)
+        await leader
+        return follower
+
+    assert asyncio.run(main()) == ({"partial": ["ad0", "ad1"]}, True)
+
+
+def test_earlier_deadline_flight_opens_new_one():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(step=0.01)
+        # El líder corta antes: quien tiene más plazo no se engancha
+        leader = asyncio.create_task(flight.run("k", 5, scrape, timeout=1))
+        await asyncio.sleep(0)
+        _, longer = await flight.run("k", 5, scrape, timeout=10)
+        # Sin plazo tampoco: el líder podría devolver un parcial
+        _, unbounded = await flight.run("k", 5, scrape)
+        await leader
+        return longer, unbounded, scrape.started
+
+    assert asyncio.run(main()) == (False, False, 3)
+
+
+def test_shorter_deadline_joins_unbounded_flight():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(step=0.01)
+        leader = asyncio.create_task(flight.run("k", 5, scrape))
+        await asyncio.sleep(0)
+        _, shared = await flight.run("k", 5, scrape, timeout=10)
+        await leader
+        return shared, scrape.started
+
+    assert asyncio.run(main()) == (True, 1)
+
+
+def test_last_waiter_leaving_cancels_scrape():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(step=0.1)
+        leader = asyncio.create_task(flight.run("k", 5, scrape))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("k", 5, scrape))
+        await asyncio.sleep(0.05)
+        before = COALESCING_STATS["abandoned"]
+
+        leader.cancel()
+        await asyncio.sleep(0.05)
+        # Aún lo espera el seguidor
+        still_running = not scrape.cancelled and flight.in_flight == 1
+
+        follower.cancel()
+        await asyncio.gather(leader, follower, return_exceptions=True)
+        await asyncio.sleep(0)
+        abandoned = COALESCING_STATS["abandoned"] - before
+        return still_running, scrape.cancelled, abandoned, flight.in_flight
+
+    assert asyncio.run(main()) == (True, True, 1, 0)
+
+
+def test_last_follower_timing_out_cancels_scrape():
+    async def main():
+        flight = SingleFlight()
+        scrape = FakeScrape(step=0.1)
+        leader = asyncio.create_task(flight.run("k", 5, scrape))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("k", 5, scrape, timeout=0.15, partial=partial))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        result = await follower
+        await asyncio.gather(leader, return_exceptions=True)
+        await asyncio.sleep(0)
+        return result, scrape.cancelled
+
+    assert asyncio.run(main()) == (({"partial": ["ad0"]}, True), True)
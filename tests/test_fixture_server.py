@@ -0,0 +1,32 @@
+import os
+import shutil
+
+from fastapi.testclient import TestClient
+
+from app.scraper_service.bench.fixture_server import create_fixture_app
+from app.scraper_service.xhr import parse_search_payload
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "fixtures", "search_tbm_map.txt")
+
+
+def replay_client(tmp_path) -> TestClient:
+    shutil.copy(SAMPLE, tmp_path / "search_0001.txt")
+    return TestClient(create_fixture_app(latency_ms=0, replay_dir=str(tmp_path)))
+
+
+def test_replays_recorded_page(tmp_path):
+    response = replay_client(tmp_path).get("/search", params={"q": "cafés", "tbm": "map"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Fixture-Done"] == "1"
+    assert len(parse_search_payload(response.text)) == 3
+
+
+def test_offset_past_recordings_returns_empty_final_page(tmp_path):
+    response = replay_client(tmp_path).get(
+        "/search", params={"q": "cafés", "tbm": "map", "offset": 5}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["X-Fixture-Done"] == "1"
+    assert parse_search_payload(response.text) == []
@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+from app.scraper_service.bench.fixture_server import feature_id_for, make_place, search_payload
+from app.scraper_service.xhr import DETAIL_KEYS, complete, merge_fields, parse_search_payload
+
+# Respuesta de /search?tbm=map con la forma que graba XHR_RECORD_DIR
+SAMPLE = os.path.join(os.path.dirname(__file__), "fixtures", "search_tbm_map.txt")
+
+
+@pytest.fixture
+def sample_body() -> str:
+    with open(SAMPLE, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parse_search_payload_reads_sample(sample_body):
+    places = parse_search_payload(sample_body)
+
+    # La primera entrada es la de la consulta y no tiene lugar
+    assert [place["title"] for place in places] == [
+        "Café Central",
+        "Bar La Esquina",
+        "Restaurante Botín",
+    ]
+    first = places[0]
+    assert first["address"] == "Calle Mayor 12, 28013 Madrid"
+    assert first["phone"] == "+34 915 21 24 53"
+    assert first["rating"] == "4.5"
+    assert first["reviews"] == "(2391)"
+    assert first["category"] == "Cafetería"
+    assert first["short_address"] == "Calle Mayor 12"
+    assert first["website"] == "https://cafecentral.example"
+    assert (first["latitude"], first["longitude"]) == (40.4154, -3.7074)
+
+
+def test_parse_search_payload_prefers_place_ref_as_id(sample_body):
+    first, second, _ = parse_search_payload(sample_body)
+
+    assert first["place_id"] == "ChIJo9m9LX4oQg0RxOH1t0JcLFw"
+    # Sin place ID se usa el id 0x…:0x…
+    assert second["place_ref"] is None
+    assert second["place_id"] == second["feature_id"] == "0xd42287dbd3b1f4d:0x1b8e1b9b2f1c6a7e"
+
+
+def test_parse_search_payload_missing_fields_are_none(sample_body):
+    second = parse_search_payload(sample_body)[1]
+
+    assert second["phone"] is None
+    assert second["website"] is None
+
+
+def test_parse_search_payload_accepts_wrapped_body(sample_body):
+    wrapped = json.dumps({"c": 0, "d": sample_body})
+
+    assert parse_search_payload(wrapped) == parse_search_payload(sample_body)
+
+
+@pytest.mark.parametrize("body", [")]}'\n[]", ")]}'\n[[\"consulta\", null]]", "{\"d\": \"[]\"}"])
+def test_parse_search_payload_rejects_unknown_layout(body):
+    with pytest.raises(ValueError):
+        parse_search_payload(body)
+
+
+def omitted_place(omit):
+    place = make_place(feature_id_for("cafés", 0))
+    return place, parse_search_payload(search_payload("cafés", [place], omit))[0]
+
+
+def test_complete_needs_every_detail_field():
+    _, full = omitted_place(())
+    _, without_phone = omitted_place(("phone",))
+
+    assert complete(full)
+    assert not complete(without_phone)
+    assert complete(without_phone, keys=("title", "address"))
+    assert not complete(None)
+
+
+def test_merge_fields_falls_back_to_page_per_field():
+    place, without_phone = omitted_place(("phone",))
+    dom = {"title": "título de la página", "address": "dirección de la página", "phone": "+1 555-0000", "url": "u"}
+
+    merged = merge_fields(without_phone, dom)
+
+    # Cada campo sale del payload si está; el teléfono, que falta, de la página
+    assert merged["title"] == place["name"]
+    assert merged["address"] == place["address"]
+    assert merged["phone"] == "+1 555-0000"
+    assert merged["url"] == "u"
+
+
+def test_merge_fields_without_place_keeps_page():
+    dom = {key: f"{key} de la página" for key in DETAIL_KEYS}
+
+    assert merge_fields(None, dom) == dom